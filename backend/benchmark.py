@@ -0,0 +1,178 @@
+# benchmark.py
+# End-to-end scaling benchmark on synthetic inputs (src/timetable/synthetic.py).
+# For every scale: generate inputs, then time and measure peak memory of
+# load -> prepare -> build_cp_model -> solve -> outputs, and append one JSON record per
+# scale to the results file (JSON lines) so scaling curves can be compared across versions.
+# Stage times come from an uninstrumented pass; peak Python memory (tracemalloc) from a
+# second pass that reuses the solve result; max_rss_mb is the process high-water mark.
+# Run from project root: python benchmark.py --scales tiny,small,medium [--weekly-template]
+import argparse
+import json
+import logging
+import platform
+import resource
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+import ortools
+from ortools.sat.python import cp_model
+
+from src.timetable import loader, precompute, runner, solver, synthetic
+
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger("benchmark")
+logger.setLevel(logging.INFO)
+for name in ("src.timetable.solver", "src.timetable.precompute", "src.timetable.runner",
+             "src.timetable.outputs", "src.timetable.template", "src.timetable.warmstart",
+             "src.timetable.synthetic", "src.timetable.loader"):
+    logging.getLogger(name).setLevel(logging.WARNING)
+
+# synthetic.generate_inputs keyword arguments per named scale
+SCALES: Dict[str, Dict[str, Any]] = {
+    "tiny": {"sections_per_semester": 1, "faculty": 12},
+    "small": {"sections_per_semester": 2, "faculty": 24},
+    "medium": {"sections_per_semester": 5, "faculty": 60, "lab_rooms": 4},
+    "college": {"sections_per_semester": 10, "faculty": 150, "elective_groups": 2, "lab_rooms": 8},
+}
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux: process high-water mark, including OR-Tools' C++ heap
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def measure(fn: Callable[[], Any], trace_memory: bool) -> Tuple[Any, Dict[str, Any]]:
+    """Run one stage; returns (value, {seconds, peak_python_mb, max_rss_mb})."""
+    if trace_memory:
+        tracemalloc.reset_peak()
+    t0 = time.perf_counter()
+    value = fn()
+    stats = {"seconds": round(time.perf_counter() - t0, 3)}
+    if trace_memory:
+        stats["peak_python_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+    stats["max_rss_mb"] = _max_rss_mb()
+    return value, stats
+
+
+def run_stages(input_dir: Path, output_dir: Path, lab_rooms: int, weekly_template: bool, time_limit: int,
+               num_workers: int, trace_memory: bool, result: Dict[str, Any] = None):
+    """
+    One pass over the pipeline stages; returns (stages, result, model, meta).
+
+    A traced pass (tracemalloc makes the Python-heavy stages many times slower) is only used
+    for memory: it reuses `result` from the timed pass instead of solving again, since the
+    solver's memory is native and invisible to tracemalloc anyway.
+    """
+    stages: Dict[str, Dict[str, Any]] = {}
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        inputs, stages["load"] = measure(lambda: loader.load_all_inputs(str(input_dir)), trace_memory)
+        normalized, stages["prepare"] = measure(
+            lambda: precompute.prepare(inputs, outputs_dir=str(output_dir)), trace_memory)
+        (model, meta), stages["build_cp_model"] = measure(
+            lambda: solver.build_cp_model(normalized, inputs, weekly_template=weekly_template,
+                                          lab_room_capacity=lab_rooms), trace_memory)
+
+        def solve():
+            cp = cp_model.CpSolver()
+            cp.parameters.max_time_in_seconds = time_limit
+            cp.parameters.num_search_workers = num_workers
+            status = cp.Solve(model)
+            out = {"status": cp.StatusName(status), "objective": None, "violations": None, "assigned": []}
+            if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                mask = solver.solution_mask(cp.ResponseProto().solution, meta)
+                out.update(objective=cp.ObjectiveValue(), violations=int(cp.ObjectiveValue()),
+                           assigned=solver.masked_keys(meta, mask), assigned_mask=mask)
+            return out
+
+        if result is None:
+            result, stages["solve"] = measure(solve, trace_memory)
+        if result["assigned"]:
+            _, stages["outputs"] = measure(lambda: runner.write_solution(dict(result), meta, str(output_dir)),
+                                           trace_memory)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return stages, result, model, meta
+
+
+def run_scale(name: str, work_dir: Path, time_limit: int, num_workers: int, weekly_template: bool,
+              trace_memory: bool, seed: int) -> Dict[str, Any]:
+    params = dict(SCALES[name], seed=seed)
+    input_dir, output_dir = work_dir / name / "input", work_dir / name / "output"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    generated = synthetic.generate_inputs(input_dir, **params)
+
+    stages, result, model, meta = run_stages(input_dir, output_dir, generated["lab_rooms"], weekly_template,
+                                             time_limit, num_workers, trace_memory=False)
+    if trace_memory:
+        traced, _, _, _ = run_stages(input_dir, output_dir, generated["lab_rooms"], weekly_template,
+                                     time_limit, num_workers, trace_memory=True, result=result)
+        for stage, stats in traced.items():
+            stages[stage]["peak_python_mb"] = stats["peak_python_mb"]
+
+    proto = model.Proto()
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "ortools": ortools.__version__,
+        "python": platform.python_version(),
+        "scale": name,
+        "params": params,
+        "generated": generated,
+        "weekly_template": weekly_template,
+        "time_limit": time_limit,
+        "num_workers": num_workers,
+        "model": {
+            "variables": len(proto.variables),
+            "constraints": len(proto.constraints),
+            "start_vars": len(meta["assign_vars"]),
+        },
+        "status": result["status"],
+        "objective": result["objective"],
+        "stages": stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and measure every pipeline stage on synthetic inputs.")
+    parser.add_argument("--scales", default="tiny,small", help=f"comma list of {', '.join(SCALES)}")
+    parser.add_argument("--work-dir", default="output/benchmark")
+    parser.add_argument("--results", default="output/benchmark_results.jsonl")
+    parser.add_argument("--time-limit", type=int, default=60)
+    parser.add_argument("--num-workers", type=int, default=8)
+    parser.add_argument("--weekly-template", action="store_true")
+    parser.add_argument("--no-trace-memory", action="store_true",
+                        help="skip the second, tracemalloc-instrumented pass that measures peak Python memory")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results_path = Path(args.results)
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    for name in [s for s in args.scales.split(",") if s]:
+        if name not in SCALES:
+            parser.error(f"unknown scale {name!r}; choose from {', '.join(SCALES)}")
+        logger.info("=== scale=%s ===", name)
+        record = run_scale(name, Path(args.work_dir), args.time_limit, args.num_workers,
+                           args.weekly_template, not args.no_trace_memory, args.seed)
+        with open(results_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        logger.info("%s: status=%s vars=%d %s", name, record["status"], record["model"]["variables"],
+                    {stage: s["seconds"] for stage, s in record["stages"].items()})
+    logger.info("Results appended to %s", results_path)
+
+
+if __name__ == "__main__":
+    main()
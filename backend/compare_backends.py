@@ -0,0 +1,121 @@
+# compare_backends.py
+# Side-by-side comparison of the "boolean" and "interval" model backends of solver.build_cp_model.
+# Run from project root: python compare_backends.py [--weekly-template] [--time-limit 120]
+import argparse
+import json
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from ortools.sat.python import cp_model
+from tabulate import tabulate
+
+from src.timetable import loader, precompute, solver
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger("compare_backends")
+# per-variable DEBUG lines would dominate the build timings
+logging.getLogger("src.timetable.solver").setLevel(logging.INFO)
+
+
+class _FirstSolutionTimer(cp_model.CpSolverSolutionCallback):
+    def __init__(self):
+        super().__init__()
+        self.first_wall_time = None
+
+    def OnSolutionCallback(self):
+        if self.first_wall_time is None:
+            self.first_wall_time = self.WallTime()
+
+
+def presolve_stats(model: cp_model.CpModel, num_workers: int) -> Dict[str, Any]:
+    """Run presolve only and read the presolved model size from the solve log."""
+    cp = cp_model.CpSolver()
+    cp.parameters.stop_after_presolve = True
+    cp.parameters.num_search_workers = num_workers
+    cp.parameters.log_search_progress = True
+    cp.parameters.log_to_stdout = False
+    cp.parameters.log_to_response = True
+    cp.Solve(model)
+    log = cp.ResponseProto().solve_log
+    stats = {"presolve_seconds": round(cp.WallTime(), 3)}
+    for field in ("PresolvedNumVariables", "PresolvedNumConstraints", "PresolvedNumTerms"):
+        m = re.search(rf"{field}: (\d+)", log)
+        stats[field] = int(m.group(1)) if m else None
+    return stats
+
+
+def time_to_first_feasible(model: cp_model.CpModel, time_limit: int, num_workers: int) -> Dict[str, Any]:
+    cp = cp_model.CpSolver()
+    cp.parameters.max_time_in_seconds = time_limit
+    cp.parameters.num_search_workers = num_workers
+    cp.parameters.stop_after_first_solution = True
+    timer = _FirstSolutionTimer()
+    status = cp.Solve(model, timer)
+    return {
+        "first_feasible_status": cp.StatusName(status),
+        "first_feasible_seconds": round(timer.first_wall_time, 3) if timer.first_wall_time is not None else None,
+    }
+
+
+def compare(input_dir: str, output_dir: str, weekly_template: bool, cycle_weeks: int,
+            time_limit: int, num_workers: int) -> Dict[str, Any]:
+    inputs = loader.load_all_inputs(input_dir)
+    normalized = precompute.prepare(inputs, outputs_dir=output_dir)
+
+    rows = {}
+    for backend in solver.MODEL_BACKENDS:
+        logger.info("=== backend=%s ===", backend)
+        t0 = time.perf_counter()
+        model, meta = solver.build_cp_model(normalized, inputs, weekly_template=weekly_template,
+                                            cycle_weeks=cycle_weeks, backend=backend)
+        build_seconds = time.perf_counter() - t0
+        proto = model.Proto()
+        row = {
+            "build_seconds": round(build_seconds, 3),
+            "model_variables": len(proto.variables),
+            "model_constraints": len(proto.constraints),
+            "start_vars": len(meta["assign_vars"]),
+        }
+        row.update(presolve_stats(model, num_workers))
+        row.update(time_to_first_feasible(model, time_limit, num_workers))
+        rows[backend] = row
+
+    return {
+        "input_dir": input_dir,
+        "weekly_template": weekly_template,
+        "cycle_weeks": cycle_weeks if weekly_template else None,
+        "time_limit": time_limit,
+        "num_workers": num_workers,
+        "backends": rows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare solver model backends on the same inputs.")
+    parser.add_argument("--input-dir", default="input")
+    parser.add_argument("--output-dir", default="output")
+    parser.add_argument("--weekly-template", action="store_true")
+    parser.add_argument("--cycle-weeks", type=int, default=1)
+    parser.add_argument("--time-limit", type=int, default=120)
+    parser.add_argument("--num-workers", type=int, default=8)
+    args = parser.parse_args()
+
+    report = compare(args.input_dir, args.output_dir, args.weekly_template, args.cycle_weeks,
+                     args.time_limit, args.num_workers)
+
+    fields = list(next(iter(report["backends"].values())).keys())
+    table = [[f] + [report["backends"][b][f] for b in solver.MODEL_BACKENDS] for f in fields]
+    logger.info("\n" + tabulate(table, headers=["metric"] + list(solver.MODEL_BACKENDS), tablefmt="grid"))
+
+    out = Path(args.output_dir) / "backend_comparison.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info("Comparison written to %s", out)
+
+
+if __name__ == "__main__":
+    main()
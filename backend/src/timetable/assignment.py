@@ -0,0 +1,170 @@
+"""
+assignment.py - balanced faculty assignment, solved for all (section, subject) pairs at once.
+
+precompute.assign_faculty_to_section_subjects fills faculty one pair at a time in section
+order, so its result depends on that order and tends to load a few people heavily.
+balance_faculty_assignment instead solves the whole assignment as one small CP-SAT model:
+ - one boolean per (pair, eligible faculty), exactly one faculty per pair,
+ - a faculty's load is the periods of the pairs it takes, capped at max_share of the
+   periods available to it (the cap is dropped, with a warning, when it cannot be met),
+ - phase 1 minimizes the largest load, phase 2 keeps that maximum and minimizes the sum
+   of squared loads, which spreads the rest of the work as evenly as eligibility allows.
+Every section gets its own copies of its subjects before assigned_faculty_id is written
+(precompute shares one subject list between the sections of a semester).
+The workload table (one row per faculty) is returned alongside the updated metrics.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from ortools.sat.python import cp_model
+
+from src.timetable.models import FacultyWorkloadMetrics
+
+logger = logging.getLogger("src.timetable.assignment")
+logger.setLevel(logging.INFO)
+
+
+def _solve_phase(model: cp_model.CpModel, time_limit: float, num_workers: int) -> Tuple[int, cp_model.CpSolver]:
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_search_workers = num_workers
+    solver.parameters.random_seed = 0
+    return solver.Solve(model), solver
+
+
+def balance_faculty_assignment(
+    normalized_sections,
+    fac_sems_sub_map: Dict[str, List[str]],
+    sec_sub_periods_map: Dict[str, int],
+    workloads: List[FacultyWorkloadMetrics],
+    max_share: float = 0.5,
+    time_limit: float = 10.0,
+    num_workers: int = 1,
+) -> Tuple[List[FacultyWorkloadMetrics], Dict[str, Any]]:
+    """
+    Assign one eligible faculty to every (section, subject) pair, writing
+    subj.assigned_faculty_id like assign_faculty_to_section_subjects.
+
+    `workloads` (calculate_faculty_workloads) supplies the faculty and the periods each
+    has available; their actual_allocated_periods are set to the new loads. time_limit
+    bounds all solver phases together. Returns the
+    metrics and a report with status, max_load, capped, seconds, unassigned pairs and
+    `table`: [{faculty, name, pairs, periods, capacity, utilization}] by load.
+    """
+    t0 = time.perf_counter()
+    deadline = t0 + time_limit
+
+    def left() -> float:
+        return max(0.0, deadline - time.perf_counter())
+
+    metrics = {m.facultyDetails.id: m for m in workloads}
+    eligible_for: Dict[str, List[str]] = defaultdict(list)
+    for fac_id, subjects in fac_sems_sub_map.items():
+        if fac_id in metrics:
+            for subj_id in subjects:
+                eligible_for[subj_id].append(fac_id)
+
+    # one entry per (section, subject) pair that needs a teacher
+    pairs: List[Tuple[Any, int, List[str], int]] = []
+    unassigned: List[Tuple[str, str]] = []
+    for sec in normalized_sections:
+        # per-section subject copies, so sections sharing a subject list get their own faculty
+        sec.subjects = [subj.model_copy() for subj in sec.subjects]
+        for i, subj in enumerate(sec.subjects):
+            eligible = eligible_for.get(subj.id, [])
+            if not eligible:
+                logger.warning("No eligible faculty for subj=%s in section=%s", subj.id, sec.id)
+                unassigned.append((sec.id, subj.id))
+                continue
+            pairs.append((sec, i, eligible, int(sec_sub_periods_map.get(subj.id, 0))))
+
+    faculty = sorted({f for _, _, eligible, _ in pairs for f in eligible}, key=str)
+    capacity = {f: int(max_share * metrics[f].periods_available) for f in faculty}
+    total = sum(periods for _, _, _, periods in pairs)
+
+    model = cp_model.CpModel()
+    choice: Dict[Tuple[int, str], cp_model.IntVar] = {}
+    for k, (_, _, eligible, _) in enumerate(pairs):
+        for f in eligible:
+            choice[(k, f)] = model.NewBoolVar(f"x_{k}_{f}")
+        model.AddExactlyOne(choice[(k, f)] for f in eligible)
+    terms: Dict[str, List[Tuple[cp_model.IntVar, int]]] = defaultdict(list)
+    for (k, f), var in choice.items():
+        terms[f].append((var, pairs[k][3]))
+    load = {f: model.NewIntVar(0, total, f"load_{f}") for f in faculty}
+    for f in faculty:
+        model.Add(load[f] == sum(periods * var for var, periods in terms[f]))
+    # the caps hold while `capped` is assumed; dropping the assumption relaxes them
+    cap_on = model.NewBoolVar("capacity")
+    for f in faculty:
+        model.Add(load[f] <= capacity[f]).OnlyEnforceIf(cap_on)
+    model.AddAssumption(cap_on)
+    max_load = model.NewIntVar(0, total, "max_load")
+    model.AddMaxEquality(max_load, list(load.values()) or [0])
+
+    # phase 1: smallest possible maximum load (each solve of it keeps half the time left for later)
+    model.Minimize(max_load)
+    status, solver = _solve_phase(model, left() / 2, num_workers)
+    capped = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    if not capped:
+        logger.warning("Faculty loads cannot stay within %.0f%% of available periods (%s); assigning uncapped",
+                       100 * max_share, solver.StatusName(status))
+        model.ClearAssumptions()
+        status, solver = _solve_phase(model, left() / 2, num_workers)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        raise RuntimeError(f"Faculty assignment failed: {solver.StatusName(status)}")
+    best_max = int(solver.Value(max_load))
+
+    # phase 2: keep that maximum, spread the rest (sum of squared loads), hinted from phase 1
+    model.Add(max_load <= best_max)
+    if capped:
+        model.Add(cap_on == 1)
+    squares = []
+    for f in faculty:
+        sq = model.NewIntVar(0, total * total, f"load_sq_{f}")
+        model.AddMultiplicationEquality(sq, [load[f], load[f]])
+        squares.append(sq)
+    for var in choice.values():
+        model.AddHint(var, solver.Value(var))
+    model.Minimize(sum(squares))
+    status2, solver2 = _solve_phase(model, left(), num_workers)
+    if status2 in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        status, solver = status2, solver2
+
+    # write the assignment back
+    loads = {f: 0 for f in metrics}
+    counts = defaultdict(int)
+    for k, (sec, i, eligible, periods) in enumerate(pairs):
+        chosen = next(f for f in eligible if solver.Value(choice[(k, f)]))
+        sec.subjects[i].assigned_faculty_id = chosen
+        loads[chosen] += periods
+        counts[chosen] += 1
+        logger.debug("Assigned subj=%s (periods=%d) sec=%s -> faculty=%s", sec.subjects[i].id, periods, sec.id, chosen)
+    for f, m in metrics.items():
+        m.actual_allocated_periods = loads[f]
+
+    table = [{
+        "faculty": f,
+        "name": m.facultyDetails.name,
+        "pairs": counts[f],
+        "periods": loads[f],
+        "capacity": capacity.get(f, int(max_share * m.periods_available)),
+        "utilization": round(m.actual_utilization, 2),
+    } for f, m in metrics.items()]
+    table.sort(key=lambda row: (-row["periods"], str(row["faculty"])))
+    report = {
+        "engine": "balanced",
+        "status": solver.StatusName(status),
+        "pairs": len(pairs),
+        "max_load": max(loads.values(), default=0),
+        "capped": capped,
+        "unassigned": [list(p) for p in unassigned],
+        "seconds": round(time.perf_counter() - t0, 3),
+        "table": table,
+    }
+    logger.info("Balanced faculty assignment: %d pairs over %d faculty, max load %d periods (%s, %.3fs)",
+                len(pairs), len(faculty), report["max_load"], report["status"], report["seconds"])
+    return list(metrics.values()), report
@@ -0,0 +1,366 @@
+"""
+candidates.py - columnar store of candidate starts.
+
+One row per candidate start (section, subject, week, day, start period) with integer
+columns:
+ - section / subject / faculty / room: ids from the shared IdRegistry (-1 = none),
+ - week / day / period / length,
+ - var: proto index of the start BoolVar.
+Covered slots are derived arithmetically (period .. period + length - 1) instead of being
+materialised per key. Rows of one (section, subject) pair are contiguous, and a dense
+row_lookup over (pair, week, day, period) maps a start-key back to its row.
+
+slot_rows(family, ...) answers "which starts cover this slot" from a CSR index
+(indptr + rows sorted by slot) per family: section / faculty / room / lab.
+
+The dict-shaped meta entries callers already use (assign_vars, assignment_meta,
+assign_var_covers, sec_subj_vars, slot_index, assign_keys) are thin read-only views over
+the store; see meta_views.
+"""
+
+import abc
+from array import array
+from collections.abc import Mapping, Sequence
+from itertools import groupby
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from src.timetable.registry import IdRegistry
+
+COLUMNS = ("section", "subject", "faculty", "room", "week", "day", "period", "length", "var")
+SLOT_FAMILIES = ("section", "faculty", "room", "lab")
+
+# meta entries that meta_views rebuilds from the store (never pickled on their own)
+VIEW_KEYS = ("assign_vars", "assignment_meta", "assign_var_covers", "sec_subj_vars", "slot_index",
+             "assign_keys", "assign_indices")
+
+
+class CandidateStore:
+    """Append rows per (section, subject) pair with add_pair, then freeze() before reading."""
+
+    def __init__(self, weeks: int, days_per_week: int, periods_per_day: int, registry: IdRegistry = None):
+        self.weeks = weeks
+        self.days_per_week = days_per_week
+        self.periods_per_day = periods_per_day
+        # entity ids are the registry's; names it has not seen yet are interned on add
+        self.registry = registry if registry is not None else IdRegistry()
+        self.tables: Dict[str, List[Any]] = self.registry.tables
+        self._codes: Dict[str, Dict[Any, int]] = self.registry.codes
+        # pair -> (section code, subject code) and its [first, end) row range
+        self.pairs: List[Tuple[int, int]] = []
+        self.pair_rows: List[Tuple[int, int]] = []
+        self._pair_index: Dict[Tuple[int, int], int] = {}
+        self._buffers = {c: array("i") for c in COLUMNS}
+        self._csr: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.frozen = False
+
+    # ---- building ----
+    def code(self, table: str, value: Any) -> int:
+        """Registry id of `value` in `table`, interning it on first use; None is -1."""
+        return self.registry.intern(table, value)
+
+    def add_pair(self, sid: str, subj_id: str, fac: Any, room: Any, length: int,
+                 starts: List[Tuple[int, int, int]], var_indices: List[int]) -> range:
+        """Append the candidate starts of one (section, subject) pair; returns its row range."""
+        if self.frozen:
+            raise RuntimeError("CandidateStore is frozen")
+        pair = (self.code("section", sid), self.code("subject", subj_id))
+        if pair in self._pair_index:
+            raise ValueError(f"Duplicate candidate pair ({sid}, {subj_id})")
+        first = len(self._buffers["var"])
+        n = len(starts)
+        b = self._buffers
+        b["section"].extend([pair[0]] * n)
+        b["subject"].extend([pair[1]] * n)
+        b["faculty"].extend([self.code("faculty", fac)] * n)
+        b["room"].extend([self.code("room", room)] * n)
+        b["length"].extend([length] * n)
+        for (w, d, p) in starts:
+            b["week"].append(w)
+            b["day"].append(d)
+            b["period"].append(p)
+        b["var"].extend(var_indices)
+        self._pair_index[pair] = len(self.pairs)
+        self.pairs.append(pair)
+        self.pair_rows.append((first, first + n))
+        return range(first, first + n)
+
+    def freeze(self) -> "CandidateStore":
+        """Turn the row buffers into NumPy columns and build the key -> row lookup."""
+        for c in COLUMNS:
+            setattr(self, c, np.frombuffer(self._buffers[c], dtype=np.int32).copy())
+        self._buffers = None
+        n = len(self.var)
+        grid = self._grid
+        pair_of_row = np.repeat(np.arange(len(self.pairs), dtype=np.int64),
+                                [hi - lo for lo, hi in self.pair_rows])
+        self.row_lookup = np.full(len(self.pairs) * grid, -1, dtype=np.int32)
+        self.row_lookup[pair_of_row * grid + self._slot_offset(self.week, self.day, self.period)] = \
+            np.arange(n, dtype=np.int32)
+        self.frozen = True
+        return self
+
+    # ---- lookups ----
+    @property
+    def _grid(self) -> int:
+        return self.weeks * self.days_per_week * self.periods_per_day
+
+    def _slot_offset(self, w, d, p):
+        return (w * self.days_per_week + d) * self.periods_per_day + p
+
+    def __len__(self) -> int:
+        return len(self.var) if self.frozen else len(self._buffers["var"])
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_csr"] = {}
+        return state
+
+    def pair_of(self, sid: str, subj_id: str) -> int:
+        sc = self._codes["section"].get(sid)
+        jc = self._codes["subject"].get(subj_id)
+        return self._pair_index.get((sc, jc), -1)
+
+    def rows_of(self, sid: str, subj_id: str) -> range:
+        pair = self.pair_of(sid, subj_id)
+        return range(*self.pair_rows[pair]) if pair >= 0 else range(0)
+
+    def row(self, key: Tuple) -> int:
+        """Row of start-key (sid, subj, w, d, p), or -1 when it is not a candidate."""
+        try:
+            sid, subj_id, w, d, p = key
+        except (TypeError, ValueError):
+            return -1
+        pair = self.pair_of(sid, subj_id)
+        if pair < 0 or not (0 <= w < self.weeks and 0 <= d < self.days_per_week and 0 <= p < self.periods_per_day):
+            return -1
+        return int(self.row_lookup[pair * self._grid + self._slot_offset(w, d, p)])
+
+    def key(self, row: int) -> Tuple[str, str, int, int, int]:
+        return (self.tables["section"][self.section[row]], self.tables["subject"][self.subject[row]],
+                int(self.week[row]), int(self.day[row]), int(self.period[row]))
+
+    def iter_keys(self, rows: Iterable[int] = None) -> Iterator[Tuple[str, str, int, int, int]]:
+        sections, subjects = self.tables["section"], self.tables["subject"]
+        if rows is None:
+            cols = (self.section, self.subject, self.week, self.day, self.period)
+        else:
+            idx = np.asarray(list(rows) if not isinstance(rows, np.ndarray) else rows, dtype=np.int64)
+            cols = (self.section[idx], self.subject[idx], self.week[idx], self.day[idx], self.period[idx])
+        for s, j, w, d, p in zip(*(c.tolist() for c in cols)):
+            yield (sections[s], subjects[j], w, d, p)
+
+    def meta_tuple(self, row: int) -> Tuple[str, str, Any, int]:
+        """(sid, subj, faculty, length) - the assignment_meta value of a row."""
+        fac = self.faculty[row]
+        return (self.tables["section"][self.section[row]], self.tables["subject"][self.subject[row]],
+                self.tables["faculty"][fac] if fac >= 0 else None, int(self.length[row]))
+
+    def covers(self, row: int) -> List[Tuple[str, int, int, int]]:
+        sid = self.tables["section"][self.section[row]]
+        w, d, p = int(self.week[row]), int(self.day[row]), int(self.period[row])
+        return [(sid, w, d, pp) for pp in range(p, p + int(self.length[row]))]
+
+    def day_groups(self, rows: range) -> Iterator[Tuple[Tuple[int, int], List[int]]]:
+        """Consecutive rows of a pair grouped by (week, day)."""
+        wd = zip(self.week[rows.start:rows.stop].tolist(), self.day[rows.start:rows.stop].tolist())
+        for (w, d), grp in groupby(zip(rows, wd), key=lambda t: t[1]):
+            yield (w, d), [r for r, _ in grp]
+
+    # ---- slot -> covering rows ----
+    def slot_count(self, family: str) -> int:
+        entities = 1 if family == "lab" else len(self.tables[family])
+        return entities * self._grid
+
+    def slot_id(self, family: str, entity_code: int, w: int, d: int, p: int) -> int:
+        base = 0 if family == "lab" else entity_code * self._grid
+        return base + self._slot_offset(w, d, p)
+
+    def slot_csr(self, family: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(indptr, rows): rows[indptr[s]:indptr[s + 1]] are the starts covering slot id s."""
+        if family not in self._csr:
+            if family not in SLOT_FAMILIES:
+                raise ValueError(f"Unknown slot family '{family}', expected one of {SLOT_FAMILIES}")
+            all_rows = np.arange(len(self.var), dtype=np.int64)
+            entity = None if family == "lab" else getattr(self, family).astype(np.int64)
+            keep = (self.length == 2) if family == "lab" else (entity >= 0)
+            base = self._slot_offset(self.week.astype(np.int64), self.day.astype(np.int64),
+                                     self.period.astype(np.int64))
+            if entity is not None:
+                base = base + entity * self._grid
+            slot_parts, row_parts = [], []
+            for k in range(int(self.length.max()) if len(self.length) else 0):
+                sel = keep & (self.length > k)
+                slot_parts.append(base[sel] + k)
+                row_parts.append(all_rows[sel])
+            slots = np.concatenate(slot_parts) if slot_parts else np.zeros(0, dtype=np.int64)
+            rows = np.concatenate(row_parts) if row_parts else np.zeros(0, dtype=np.int64)
+            order = np.argsort(slots, kind="stable")
+            counts = np.bincount(slots, minlength=self.slot_count(family))
+            indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(counts, out=indptr[1:])
+            self._csr[family] = (indptr, rows[order].astype(np.int32))
+        return self._csr[family]
+
+    def slot_rows_by_id(self, family: str, slot: int) -> List[int]:
+        indptr, rows = self.slot_csr(family)
+        return rows[indptr[slot]:indptr[slot + 1]].tolist()
+
+    def slot_rows(self, family: str, entity: Any, w: int, d: int, p: int) -> List[int]:
+        """Rows covering (entity, w, d, p); entity is ignored for the lab family."""
+        if not (0 <= w < self.weeks and 0 <= d < self.days_per_week and 0 <= p < self.periods_per_day):
+            return []
+        code = 0
+        if family != "lab":
+            code = self._codes[family].get(entity, -1)
+            if code < 0:
+                return []
+        return self.slot_rows_by_id(family, self.slot_id(family, code, w, d, p))
+
+
+# -------------------------
+# Read-only views for dict-shaped callers
+# -------------------------
+class _KeyMapping(Mapping):
+    def __init__(self, store: CandidateStore):
+        self._store = store
+
+    def __len__(self):
+        return len(self._store)
+
+    def __iter__(self):
+        return self._store.iter_keys()
+
+    def __contains__(self, key):
+        return self._store.row(key) >= 0
+
+    def __getitem__(self, key):
+        row = self._store.row(key)
+        if row < 0:
+            raise KeyError(key)
+        return self._value(row)
+
+    @abc.abstractmethod
+    def _value(self, row: int):
+        """The mapped value for one store row."""
+
+    def values(self):
+        return (self._value(r) for r in range(len(self._store)))
+
+    def items(self):
+        return zip(self._store.iter_keys(), self.values())
+
+
+class AssignVarsView(_KeyMapping):
+    """start-key -> BoolVar (wrapper created on access from the proto index)."""
+
+    def __init__(self, store: CandidateStore, model):
+        super().__init__(store)
+        self._model = model
+
+    def _value(self, row):
+        return self._model.GetBoolVarFromProtoIndex(int(self._store.var[row]))
+
+
+class AssignmentMetaView(_KeyMapping):
+    """start-key -> (sid, subj, faculty, length)."""
+
+    def _value(self, row):
+        return self._store.meta_tuple(row)
+
+
+class CoversView(_KeyMapping):
+    """start-key -> covered (sid, w, d, period) slots."""
+
+    def _value(self, row):
+        return self._store.covers(row)
+
+
+class SecSubjVarsView(Mapping):
+    """(sid, subj) -> [(w, d, p), ...] candidate starts."""
+
+    def __init__(self, store: CandidateStore):
+        self._store = store
+
+    def __len__(self):
+        return len(self._store.pairs)
+
+    def __iter__(self):
+        t = self._store.tables
+        return ((t["section"][s], t["subject"][j]) for s, j in self._store.pairs)
+
+    def __getitem__(self, pair):
+        rows = self._store.rows_of(*pair)
+        if not rows and self._store.pair_of(*pair) < 0:
+            raise KeyError(pair)
+        st = self._store
+        return list(zip(st.week[rows.start:rows.stop].tolist(), st.day[rows.start:rows.stop].tolist(),
+                        st.period[rows.start:rows.stop].tolist()))
+
+
+class SlotIndexView(Mapping):
+    """Covered slot -> start-keys for one family; keys are (entity, w, d, p) or (w, d, p) for labs."""
+
+    def __init__(self, store: CandidateStore, family: str):
+        self._store = store
+        self._family = family
+
+    def _slot_key(self, slot: int) -> Tuple:
+        st = self._store
+        entity, rest = divmod(slot, st._grid)
+        wd, p = divmod(rest, st.periods_per_day)
+        w, d = divmod(wd, st.days_per_week)
+        if self._family == "lab":
+            return (w, d, p)
+        return (st.tables[self._family][entity], w, d, p)
+
+    def __iter__(self):
+        indptr, _ = self._store.slot_csr(self._family)
+        return (self._slot_key(int(s)) for s in np.flatnonzero(np.diff(indptr)))
+
+    def __len__(self):
+        indptr, _ = self._store.slot_csr(self._family)
+        return int(np.count_nonzero(np.diff(indptr)))
+
+    def __getitem__(self, slot):
+        rows = self._store.slot_rows(self._family, None, *slot) if self._family == "lab" \
+            else self._store.slot_rows(self._family, *slot)
+        if not rows:
+            raise KeyError(slot)
+        return list(self._store.iter_keys(rows))
+
+
+class KeySequence(Sequence):
+    """Row-ordered start-keys (aligned with the store's var column)."""
+
+    def __init__(self, store: CandidateStore):
+        self._store = store
+
+    def __len__(self):
+        return len(self._store)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(self._store.iter_keys(range(len(self))[i]))
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._store.key(i)
+
+    def __iter__(self):
+        return self._store.iter_keys()
+
+
+def meta_views(store: CandidateStore, model) -> Dict[str, Any]:
+    """The dict-shaped meta entries, backed by `store` (see VIEW_KEYS)."""
+    return {
+        "assign_vars": AssignVarsView(store, model),
+        "assignment_meta": AssignmentMetaView(store),
+        "assign_var_covers": CoversView(store),
+        "sec_subj_vars": SecSubjVarsView(store),
+        "slot_index": {family: SlotIndexView(store, family) for family in SLOT_FAMILIES},
+        "assign_keys": KeySequence(store),
+        "assign_indices": store.var,
+    }
@@ -0,0 +1,264 @@
+"""
+capacity.py - max-flow capacity pre-check, run on the prepared inputs before any model is built.
+
+Every (section, subject) pair the solver would schedule must receive its required periods
+over the teaching calendar. check_capacity models that as flow networks over the calendar
+days and solves them with OR-Tools SimpleMaxFlow. The main network keeps the pair's
+faculty, section and room on every path:
+
+    source -> pair (required periods)
+           -> faculty-day (theory: teachable periods of the day; labs: lab-block periods)
+           -> faculty-day (teachable periods of the day)
+           -> section-day (teachable periods of the day)
+           -> room-day (teachable periods of the day) -> sink
+
+The shared lab rooms cannot sit on those paths without pooling every faculty's labs
+(a pooled unit could leave towards any faculty), so labs get a second network that ends
+at the pool:
+
+    source -> lab pair -> lab faculty-day (lab-block periods)
+           -> lab rooms-day (lab_room_capacity x lab-block periods) -> sink
+
+A feasible timetable routes every period along both, so a maximum flow below the demand
+of either network proves the inputs infeasible (the networks relax elective blocking,
+block alignment beyond one day's lab blocks and the soft constraints, so full flows prove
+nothing). The report lists the pairs left short and the source-side min cut grouped by
+entity - the faculty / sections / rooms / lab-room days that bound the flow.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from ortools.graph.python import max_flow
+
+from src.timetable import solver
+
+logger = logging.getLogger("src.timetable.capacity")
+logger.setLevel(logging.INFO)
+
+SOURCE, SINK = 0, 1
+
+
+def demand_pairs(normalized: Dict[str, Any], inputs: Dict[str, Any]) -> List[Tuple[str, str, Any, int, int]]:
+    """(sid, subj, faculty, block length, required periods) for every pair build_cp_model schedules."""
+    subjects_lookup = {s.id: s for s in inputs.get("subjects_master", []) or []}
+    periods_map = normalized.get("sec_sub_periods_map", {})
+    overrides = normalized.get("pair_quotas") or {}
+    pairs, seen = [], set()
+    for sec in normalized.get("normalized_sections", []):
+        for subj in sec.subjects:
+            fac = getattr(subj, "assigned_faculty_id", None)
+            if not fac or (sec.id, subj.id) in seen:
+                continue
+            seen.add((sec.id, subj.id))
+            is_lab = bool(getattr(subj, "is_lab", False))
+            if not is_lab and subj.id in subjects_lookup:
+                is_lab = bool(getattr(subjects_lookup[subj.id], "is_lab", False))
+            required = int(periods_map.get(subj.id, 0))
+            if (sec.id, subj.id) in overrides:
+                override = overrides[(sec.id, subj.id)]
+                required = int(override[0] if isinstance(override, (tuple, list)) else override)
+            if required > 0:
+                pairs.append((sec.id, subj.id, fac, 2 if is_lab else 1, required))
+    return pairs
+
+
+def lab_periods_per_day(available: np.ndarray) -> np.ndarray:
+    """Periods coverable by disjoint 2-period blocks on each (week, day), flattened."""
+    days = available.reshape(-1, available.shape[-1])
+    out = np.zeros(len(days), dtype=np.int64)
+    for i, row in enumerate(days):
+        run = 0
+        for free in row.tolist() + [False]:
+            if free:
+                run += 1
+            else:
+                out[i] += 2 * (run // 2)
+                run = 0
+    return out
+
+
+class _Network:
+    """Arcs of one capacity network; day-indexed nodes come in blocks of num_days."""
+
+    def __init__(self, first_free: int, num_days: int, open_days: np.ndarray):
+        self.nodes = first_free
+        self.num_days = num_days
+        self.open_days = open_days
+        self.tails: List[np.ndarray] = []
+        self.heads: List[np.ndarray] = []
+        self.caps: List[np.ndarray] = []
+        # (kind, entity) label of each arc group, and the group of every arc
+        self.labels: List[Tuple[str, Any]] = []
+        self.label_of: List[np.ndarray] = []
+
+    @property
+    def arcs(self) -> int:
+        return sum(len(t) for t in self.tails)
+
+    def day_block(self, count: int) -> int:
+        base = self.nodes
+        self.nodes += count * self.num_days
+        return base
+
+    def at(self, block: int, index: int) -> np.ndarray:
+        """Nodes of entity `index` of a day block, on the open days."""
+        return block + index * self.num_days + self.open_days
+
+    def add(self, tail, head, cap, kind: str, entity: Any) -> None:
+        tail, head, cap = np.broadcast_arrays(np.asarray(tail, dtype=np.int64), np.asarray(head, dtype=np.int64),
+                                              np.asarray(cap, dtype=np.int64))
+        keep = cap > 0
+        self.tails.append(tail[keep])
+        self.heads.append(head[keep])
+        self.caps.append(cap[keep])
+        self.label_of.append(np.full(int(keep.sum()), len(self.labels), dtype=np.int64))
+        self.labels.append((kind, entity))
+
+    def solve(self) -> Tuple[int, List[Tuple[Any, int, int]], List[Dict[str, Any]]]:
+        """(max flow, [(pair, required, routed)] for short demand arcs, min-cut entries by entity)."""
+        if not self.tails:
+            return 0, [], []
+        tail_arr, head_arr, cap_arr = np.concatenate(self.tails), np.concatenate(self.heads), np.concatenate(self.caps)
+        arc_label = np.concatenate(self.label_of)
+        network = max_flow.SimpleMaxFlow()
+        network.add_arcs_with_capacity(tail_arr, head_arr, cap_arr)
+        status = network.solve(SOURCE, SINK)
+        if status != network.OPTIMAL:
+            raise RuntimeError(f"max flow failed with status {status}")
+        flow = int(network.optimal_flow())
+        demand_arcs = np.flatnonzero(tail_arr == SOURCE)
+        if flow >= int(cap_arr[demand_arcs].sum()):
+            return flow, [], []
+        arc_flow = network.flows(np.arange(len(tail_arr)))
+        # pairs that did not get their periods
+        short = [(self.labels[arc_label[a]][1], int(cap_arr[a]), int(arc_flow[a])) for a in demand_arcs
+                 if arc_flow[a] < cap_arr[a]]
+        # min cut: arcs from the source side to the sink side, grouped by what they model
+        source_side = np.zeros(self.nodes, dtype=bool)
+        source_side[network.get_source_side_min_cut()] = True
+        # (demand arcs into the sink side belong to pairs that are fully served)
+        cut = source_side[tail_arr] & ~source_side[head_arr] & (tail_arr != SOURCE)
+        grouped: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+        for label, cap in zip(arc_label[cut].tolist(), cap_arr[cut].tolist()):
+            grouped[label][0] += cap
+            grouped[label][1] += 1
+        entries = [{"kind": self.labels[label][0], "entity": self.labels[label][1], "capacity": capacity,
+                    "days": days} for label, (capacity, days) in grouped.items()]
+        return flow, short, entries
+
+
+def check_capacity(
+    normalized: Dict[str, Any],
+    inputs: Dict[str, Any],
+    periods_per_day: int = 8,
+    days_per_week: int = 6,
+    default_weeks: int = 19,
+    lab_room_capacity: int = 2,
+    max_report: int = 20,
+) -> Dict[str, Any]:
+    """
+    Solve the capacity networks. Returns a report with feasible (both max flows meet
+    their demand), demand, max_flow, lab_demand, lab_max_flow, short_pairs (pairs below
+    their requirement, largest shortfall first), cut (saturated source-to-sink-side capacity grouped by kind and entity,
+    largest first), network size and seconds.
+    """
+    t0 = time.perf_counter()
+    calendar = solver.planning_calendar(normalized, days_per_week, default_weeks)
+    available = solver.calendar_availability(calendar, days_per_week, periods_per_day)
+    day_periods = available.sum(axis=2).ravel().astype(np.int64)
+    lab_periods = lab_periods_per_day(available)
+    num_days = len(day_periods)
+    open_days = np.flatnonzero(day_periods > 0)
+
+    pairs = demand_pairs(normalized, inputs)
+    section_classroom_map = normalized.get("section_classroom_map", {})
+    faculties = sorted({fac for _, _, fac, _, _ in pairs}, key=str)
+    sections = list(dict.fromkeys(sid for sid, _, _, _, _ in pairs))
+    rooms = sorted({section_classroom_map[s] for s in sections if section_classroom_map.get(s) is not None}, key=str)
+    fac_index = {f: i for i, f in enumerate(faculties)}
+    sec_index = {s: i for i, s in enumerate(sections)}
+    room_index = {r: i for i, r in enumerate(rooms)}
+
+    main = _Network(2 + len(pairs), num_days, open_days)
+    fac_in, fac_out = main.day_block(len(faculties)), main.day_block(len(faculties))
+    sec_node, room_node = main.day_block(len(sections)), main.day_block(len(rooms))
+    lab_pairs = [i for i, pair in enumerate(pairs) if pair[3] == 2]
+    labs = _Network(2 + len(pairs), num_days, open_days)
+    lab_fac = labs.day_block(len(faculties))
+    lab_rooms = labs.day_block(1)
+
+    demand = lab_demand = 0
+    fac_sections = defaultdict(set)
+    lab_faculties = set()
+    for i, (sid, subj_id, fac, length, required) in enumerate(pairs):
+        node = 2 + i
+        demand += required
+        f = fac_index[fac]
+        main.add(SOURCE, node, required, "demand", (sid, subj_id))
+        # a lab pair only reaches its own faculty, a lab-block day at a time
+        per_day = lab_periods if length == 2 else day_periods
+        main.add(node, main.at(fac_in, f), per_day[open_days], "pair_days", (sid, subj_id))
+        fac_sections[f].add(sec_index[sid])
+        if length == 2:
+            lab_demand += required
+            lab_faculties.add(f)
+            labs.add(SOURCE, node, required, "demand", (sid, subj_id))
+            labs.add(node, labs.at(lab_fac, f), lab_periods[open_days], "pair_days", (sid, subj_id))
+
+    for f, secs in fac_sections.items():
+        main.add(main.at(fac_in, f), main.at(fac_out, f), day_periods[open_days], "faculty", faculties[f])
+        for s in sorted(secs):
+            main.add(main.at(fac_out, f), main.at(sec_node, s), day_periods[open_days],
+                     "faculty_section", (faculties[f], sections[s]))
+    for s, sid in enumerate(sections):
+        room = section_classroom_map.get(sid)
+        head = main.at(room_node, room_index[room]) if room is not None else SINK
+        main.add(main.at(sec_node, s), head, day_periods[open_days], "section", sid)
+    for r, room in enumerate(rooms):
+        main.add(main.at(room_node, r), SINK, day_periods[open_days], "room", room)
+
+    for f in sorted(lab_faculties):
+        labs.add(labs.at(lab_fac, f), labs.at(lab_rooms, 0), lab_periods[open_days], "lab_faculty", faculties[f])
+    if lab_pairs:
+        labs.add(labs.at(lab_rooms, 0), SINK, lab_room_capacity * lab_periods[open_days], "lab_rooms", None)
+
+    flow, short, cut = main.solve()
+    lab_flow, lab_short, lab_cut = labs.solve() if lab_pairs else (0, [], [])
+    report: Dict[str, Any] = {
+        "feasible": flow >= demand and lab_flow >= lab_demand,
+        "demand": demand,
+        "max_flow": flow,
+        "lab_demand": lab_demand,
+        "lab_max_flow": lab_flow,
+        "short_pairs": [],
+        "cut": [],
+        "nodes": main.nodes + labs.nodes,
+        "arcs": main.arcs + labs.arcs,
+    }
+    if not report["feasible"]:
+        # a pair short in both networks is reported once, with its smaller placeable total
+        placeable: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        for pair, req, got in short + lab_short:
+            if pair not in placeable or got < placeable[pair][1]:
+                placeable[pair] = (req, got)
+        ordered = sorted(placeable.items(), key=lambda item: item[1][1] - item[1][0])
+        report["short_pairs"] = [{"section": pair[0], "subject": pair[1], "required": req, "placeable": got}
+                                 for pair, (req, got) in ordered[:max_report]]
+        entries = sorted(cut + lab_cut, key=lambda e: -e["capacity"])
+        report["cut"] = entries[:max_report]
+    report["seconds"] = round(time.perf_counter() - t0, 3)
+
+    if report["feasible"]:
+        logger.info("Capacity check passed: %d periods routable (%d nodes, %d arcs, %.3fs)",
+                    demand, report["nodes"], report["arcs"], report["seconds"])
+    else:
+        logger.error("Capacity check failed: only %d of %d required periods (%d of %d lab periods) fit the "
+                     "calendar (%.3fs)", flow, demand, lab_flow, lab_demand, report["seconds"])
+        for entry in report["cut"][:5]:
+            logger.error("  bottleneck %s %s: %d periods over %d days",
+                         entry["kind"], entry["entity"], entry["capacity"], entry["days"])
+    return report
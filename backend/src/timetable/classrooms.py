@@ -0,0 +1,139 @@
+"""
+classrooms.py - best-fit classroom allocation over a bisect index.
+
+precompute.map_sections_to_classrooms scans the whole room list for every real section
+(first fit) and hands virtual elective sections their semester's rooms in queue order,
+whatever the option's size. allocate_classrooms matches by capacity instead:
+ - RoomIndex keeps the free rooms as (capacity, id) lists sorted per preference tier
+   (department and building match first); take() bisects to the smallest room that
+   seats a section in the best tier that has one,
+ - real sections are placed largest first (best-fit decreasing), each in a room of its own,
+ - each elective group places its options largest first into the rooms of its semester's
+   real sections (blocked while the elective runs) that seat them, then into free rooms,
+ - sections no room can seat stay unmapped (None) and are listed with the reason.
+Only active classroom / conference rooms are used. Every lookup is O(log rooms), so
+campuses with hundreds of rooms allocate in milliseconds.
+"""
+
+import bisect
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.timetable.models import Classroom, Section
+
+logger = logging.getLogger("src.timetable.classrooms")
+logger.setLevel(logging.INFO)
+
+ROOM_TYPES = ("classroom", "conference")
+
+
+class RoomIndex:
+    """Free rooms sorted by capacity within preference tiers (higher tier first)."""
+
+    def __init__(self, rooms: List[Classroom], department: Optional[str] = None, building: Optional[str] = None):
+        self.capacity = {r.id: r.capacity for r in rooms}
+        self.tier_of: Dict[str, int] = {}
+        tiers: Dict[int, List[Tuple[int, str]]] = defaultdict(list)
+        for r in rooms:
+            tier = 2 * _matches(r.department, department) + _matches(r.building, building)
+            self.tier_of[r.id] = tier
+            tiers[tier].append((r.capacity, r.id))
+        self.tiers = [sorted(tiers[t]) for t in sorted(tiers, reverse=True)]
+
+    def __len__(self) -> int:
+        return sum(len(rooms) for rooms in self.tiers)
+
+    def take(self, size: int) -> Optional[str]:
+        """Remove and return the smallest free room seating `size` in the best tier, or None."""
+        for rooms in self.tiers:
+            i = bisect.bisect_left(rooms, (size, ""))
+            if i < len(rooms):
+                return rooms.pop(i)[1]
+        return None
+
+    def largest(self) -> int:
+        return max((rooms[-1][0] for rooms in self.tiers if rooms), default=0)
+
+
+def _matches(value: Optional[str], preferred: Optional[str]) -> int:
+    return int(preferred is not None and value is not None and value.lower() == preferred.lower())
+
+
+def allocate_classrooms(
+    sections: List[Section],
+    virtual_sections: List[Dict[str, Any]],
+    classrooms: List[Classroom],
+    department: Optional[str] = None,
+    building: Optional[str] = None,
+) -> Tuple[Dict[str, Optional[str]], Dict[str, Any]]:
+    """
+    Map real and virtual sections to classrooms (same mapping shape as
+    map_sections_to_classrooms; virtual section dicts get "mapped_classroom").
+
+    Returns (mapping, report) where report has assigned, unassigned
+    ([{section, semester, students, virtual, reason}]), wasted_seats, preferred (sections
+    in a room matching the department / building preference), rooms, rooms_used and seconds.
+    """
+    t0 = time.perf_counter()
+    rooms = [c for c in classrooms
+             if str(c.type).lower() in ROOM_TYPES and str(c.status or "active").lower() == "active"]
+    free = RoomIndex(rooms, department, building)
+    mapping: Dict[str, Optional[str]] = {}
+    unassigned: List[Dict[str, Any]] = []
+
+    def place(sid: str, semester: Any, students: int, room: Optional[str], virtual: bool, pool_max: int) -> None:
+        mapping[sid] = room
+        if room is None:
+            unassigned.append({"section": sid, "semester": semester, "students": students, "virtual": virtual,
+                               "reason": f"no free room seats {students} (largest free: {pool_max})"})
+            logger.warning("Section '%s' (strength=%d, sem=%s) has no classroom", sid, students, semester)
+        else:
+            logger.info("%s section '%s' (strength=%d, sem=%s) -> Classroom '%s' (capacity %d)",
+                        "Virtual" if virtual else "Real", sid, students, semester, room, free.capacity[room])
+
+    # --- real sections: best-fit decreasing, one room each ---
+    for sec in sorted(sections, key=lambda s: -s.totalStudents):
+        largest = free.largest()
+        place(sec.id, sec.semester, sec.totalStudents, free.take(sec.totalStudents), False, largest)
+
+    # --- virtual sections: their semester's rooms first (sized to the option), then free rooms ---
+    semester_rooms: Dict[Any, List[Classroom]] = defaultdict(list)
+    by_id = {r.id: r for r in rooms}
+    for sec in sections:
+        if mapping.get(sec.id):
+            semester_rooms[sec.semester].append(by_id[mapping[sec.id]])
+    groups: Dict[Tuple[Any, Any], List[Dict[str, Any]]] = defaultdict(list)
+    for vs in virtual_sections:
+        groups[(vs["semester"], vs.get("elective_group"))].append(vs)
+    for (semester, group), options in groups.items():
+        reuse = RoomIndex(semester_rooms.get(semester, []), department, building)
+        for vs in sorted(options, key=lambda v: -int(v.get("totalStudents") or 0)):
+            students = int(vs.get("totalStudents") or 0)
+            largest = max(reuse.largest(), free.largest())
+            room = reuse.take(students) or free.take(students)
+            place(vs["id"], semester, students, room, True, largest)
+            vs["mapped_classroom"] = room
+        logger.info("Elective group mapping complete for sem=%s, eg=%s -> %s", semester, group,
+                    [mapping[vs["id"]] for vs in options])
+
+    # real sections first, then virtual ones, in input order
+    mapping = {sid: mapping[sid] for sid in [s.id for s in sections] + [vs["id"] for vs in virtual_sections]}
+    students_of = {s.id: s.totalStudents for s in sections}
+    students_of.update({vs["id"]: int(vs.get("totalStudents") or 0) for vs in virtual_sections})
+    placed = {sid: room for sid, room in mapping.items() if room is not None}
+    full_match = 2 * (department is not None) + (building is not None)
+    report = {
+        "engine": "best_fit",
+        "assigned": len(placed),
+        "unassigned": unassigned,
+        "wasted_seats": sum(free.capacity[room] - students_of[sid] for sid, room in placed.items()),
+        "preferred": sum(free.tier_of[room] == full_match for room in placed.values()) if full_match else None,
+        "rooms": len(rooms),
+        "rooms_used": len(set(placed.values())),
+        "seconds": round(time.perf_counter() - t0, 4),
+    }
+    logger.info("Classroom allocation: %d sections placed (%d wasted seats), %d unassigned, %d of %d rooms used",
+                report["assigned"], report["wasted_seats"], len(unassigned), report["rooms_used"], len(rooms))
+    return mapping, report
@@ -0,0 +1,231 @@
+"""
+conflicts.py - NumPy occupancy engine shared by the model pre-screen and post-solve verification.
+
+Occupancy is a (weeks, days, periods) bool array per section / faculty / room:
+ - busy_grids turns slots booked outside this model (normalized["occupied"], e.g. another
+   department's published timetable_faculty.json / timetable_room.json, see load_occupied)
+   into such arrays over a teaching calendar; build_cp_model removes every candidate start
+   whose block touches a busy slot of its section, faculty or room (free_slots) before
+   creating variables, so those starts never reach the model,
+ - verify_timetable expands solved start-keys into covered periods and counts them per
+   (entity, week, day, period) in one np.unique pass per family: more than one session
+   is a double booking, more than lab_room_capacity lab sessions is a lab overflow, and a
+   covered period outside `available` is an unteachable slot. It only reads the start-keys
+   and assignment_meta, so it checks any timetable the runner writes (solver, decomposed,
+   two-level, rolling, template-expanded or greedy fallback) independently of the model.
+"""
+
+import json
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.timetable.registry import IdRegistry
+
+logger = logging.getLogger("src.timetable.conflicts")
+logger.setLevel(logging.INFO)
+
+FAMILIES = ("section", "faculty", "room")
+
+# outputs file -> family whose entities key it
+_TIMETABLE_FAMILIES = {"timetable_section": "section", "timetable_faculty": "faculty", "timetable_room": "room"}
+
+
+# -------------------------
+# Pre-screen: slots booked outside the model
+# -------------------------
+def load_occupied(paths: Iterable[str]) -> Dict[str, Dict[Any, List[Tuple[Any, int]]]]:
+    """
+    family -> entity -> [(date or day_index, period)] from timetable_section / _faculty /
+    _room JSON files written by outputs (the family is taken from the file name). Free
+    periods are skipped; entries without a date keep their day_index.
+    """
+    occupied: Dict[str, Dict[Any, List[Tuple[Any, int]]]] = {family: defaultdict(list) for family in FAMILIES}
+    for path in paths:
+        family = next((f for stem, f in _TIMETABLE_FAMILIES.items() if stem in str(path)), None)
+        if family is None:
+            raise ValueError(f"Cannot tell the family of {path}; expected a timetable_section/faculty/room file")
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        booked = 0
+        for entity, entries in data.items():
+            for e in entries:
+                if e.get("free"):
+                    continue
+                when = e.get("date") or e.get("day_index")
+                occupied[family][entity].append((when, int(e["period"])))
+                booked += 1
+        logger.info("Loaded %d booked %s periods from %s", booked, family, path)
+    return {family: dict(entities) for family, entities in occupied.items() if entities}
+
+
+def busy_grids(
+    occupied: Dict[str, Dict[Any, List[Tuple[Any, int]]]],
+    teaching_calendar: List[List[Dict[str, Any]]],
+    weeks: int,
+    days_per_week: int,
+    periods_per_day: int,
+) -> Tuple[Dict[str, Dict[Any, np.ndarray]], Dict[str, int]]:
+    """
+    Returns (grids, dropped): grids is family -> entity -> (weeks, days, periods) bool array
+    of booked slots, dropped is family -> number of bookings that fall outside the grid.
+    Dates are placed through the calendar; integer day indexes as w * days_per_week + d.
+    Bookings on dates this calendar does not teach or outside the modelled weeks / periods
+    are dropped, with a warning (a timetable from another calendar drops them all).
+    """
+    day_of = {day.get("date"): w * days_per_week + d
+              for w, week in enumerate(teaching_calendar or []) for d, day in enumerate(week[:days_per_week])
+              if day.get("date")}
+    grids: Dict[str, Dict[Any, np.ndarray]] = {}
+    dropped: Dict[str, int] = {}
+    for family, entities in (occupied or {}).items():
+        dropped[family] = 0
+        for entity, slots in entities.items():
+            grid = np.zeros((weeks, days_per_week, periods_per_day), dtype=bool)
+            days = np.array([day_of.get(when, -1) if isinstance(when, str) else int(when) for when, _ in slots],
+                            dtype=np.int64)
+            periods = np.array([p for _, p in slots], dtype=np.int64)
+            keep = (days >= 0) & (days < weeks * days_per_week) & (periods >= 0) & (periods < periods_per_day)
+            grid.reshape(-1, periods_per_day)[days[keep], periods[keep]] = True
+            dropped[family] += int((~keep).sum())
+            if grid.any():
+                grids.setdefault(family, {})[entity] = grid
+        if dropped[family]:
+            logger.warning("Dropped %d of %d booked %s periods outside this teaching calendar",
+                           dropped[family], sum(len(slots) for slots in entities.values()), family)
+    return grids, dropped
+
+
+def free_slots(available: np.ndarray, busy: Dict[str, Dict[Any, np.ndarray]], section: Any, faculty: Any,
+               room: Any) -> np.ndarray:
+    """`available` without the slots booked for `section`, `faculty` or `room`."""
+    free = available
+    for family, entity in (("section", section), ("faculty", faculty), ("room", room)):
+        grid = busy.get(family, {}).get(entity)
+        if grid is not None:
+            free = free & ~grid
+    return free
+
+
+# -------------------------
+# Post-solve verification
+# -------------------------
+def verify_timetable(
+    keys: List[Tuple],
+    assignment_meta: Dict,
+    section_classroom_map: Dict[str, Any],
+    days_per_week: int,
+    periods_per_day: int = 8,
+    available: Optional[np.ndarray] = None,
+    lab_room_capacity: Optional[int] = 2,
+    max_report: int = 20,
+) -> Dict[str, Any]:
+    """
+    Check solved start-keys (sid, subj, w, d, p) for double-booked sections / faculty /
+    rooms, lab sessions above lab_room_capacity (None skips the check) and, with an
+    `available` (weeks, days, periods) array, periods on unteachable slots.
+
+    Returns ok, sessions, periods, unverified (keys without assignment_meta), clashes
+    (family -> number of double-booked slots), lab_overflow, unavailable, examples
+    (up to max_report offending slots with the sessions on them) and seconds.
+    """
+    t0 = time.perf_counter()
+    registry = IdRegistry()
+    rows: List[Tuple[int, int, int, int, int, int, int, int]] = []
+    sessions: List[Tuple] = []
+    unverified = 0
+    for key in keys:
+        info = assignment_meta.get(tuple(key)) if len(key) == 5 else None
+        if not info:
+            unverified += 1
+            continue
+        sid, _, w, d, p = key
+        fac, length = info[2], int(info[3])
+        rows.append((registry.intern("section", sid), registry.intern("faculty", fac),
+                     registry.intern("room", section_classroom_map.get(sid)), int(w), int(d), int(p), length,
+                     len(sessions)))
+        sessions.append(tuple(key))
+
+    report: Dict[str, Any] = {
+        "ok": True,
+        "sessions": len(sessions),
+        "periods": 0,
+        "unverified": unverified,
+        "clashes": {family: 0 for family in FAMILIES},
+        "lab_overflow": 0,
+        "unavailable": 0,
+        "examples": [],
+    }
+    if rows:
+        cols = np.array(rows, dtype=np.int64).T
+        entity = dict(zip(FAMILIES, cols[:3]))
+        week, day, period, length, session = cols[3:]
+        # one row per covered period: repeat each session `length` times, offsets 0..length-1
+        cover = np.repeat(np.arange(len(length)), length)
+        offset = np.arange(len(cover)) - np.repeat(np.cumsum(length) - length, length)
+        week, day, period, session = week[cover], day[cover], period[cover] + offset, session[cover]
+        is_lab = (length == 2)[cover]
+        # a block running past the last period still gets a slot of its own
+        days_per_week = max(days_per_week, int(day.max()) + 1)
+        periods_per_day = max(periods_per_day, int(period.max()) + 1)
+        slot = (week * days_per_week + day) * periods_per_day + period
+        grid = int(slot.max()) + 1
+        report["periods"] = len(slot)
+
+        def overfull(ids: np.ndarray, limit: int) -> np.ndarray:
+            """Covered-period rows whose id holds more than `limit` sessions."""
+            uniq, inverse, counts = np.unique(ids, return_inverse=True, return_counts=True)
+            return counts[inverse.ravel()] > limit
+
+        offending: List[Tuple[str, Any, np.ndarray]] = []
+        for family in FAMILIES:
+            ent = entity[family][cover]
+            hit = np.zeros(len(slot), dtype=bool)
+            known = ent >= 0
+            hit[known] = overfull(ent[known] * grid + slot[known], 1)
+            report["clashes"][family] = len(np.unique(ent[hit] * grid + slot[hit]))
+            offending.append((family, ent, hit))
+        if lab_room_capacity is not None:
+            hit = np.zeros(len(slot), dtype=bool)
+            hit[is_lab] = overfull(slot[is_lab], lab_room_capacity)
+            report["lab_overflow"] = len(np.unique(slot[hit]))
+            offending.append(("lab", np.full(len(slot), -1), hit))
+        if available is not None:
+            inside = (period < available.shape[2]) & (week < available.shape[0]) & (day < available.shape[1])
+            hit = ~inside
+            hit[inside] = ~available[week[inside], day[inside], period[inside]]
+            report["unavailable"] = len(np.unique(slot[hit]))
+            offending.append(("unavailable", np.full(len(slot), -1), hit))
+
+        for family, ent, hit in offending:
+            if len(report["examples"]) >= max_report:
+                break
+            by_slot: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+            for e, s, i in zip(ent[hit].tolist(), slot[hit].tolist(), session[hit].tolist()):
+                by_slot[(e, s)].append(i)
+            for (e, s), members in list(by_slot.items())[:max_report - len(report["examples"])]:
+                w, rest = divmod(s, days_per_week * periods_per_day)
+                report["examples"].append({
+                    "family": family,
+                    "entity": registry.name(family, e) if family in FAMILIES else None,
+                    "week": w, "day": rest // periods_per_day, "period": rest % periods_per_day,
+                    "sessions": [list(sessions[i]) for i in members],
+                })
+        report["ok"] = not (any(report["clashes"].values()) or report["lab_overflow"] or report["unavailable"])
+    report["seconds"] = round(time.perf_counter() - t0, 4)
+
+    if report["ok"]:
+        logger.info("Verified %d sessions (%d periods): no double booking (%.4fs)",
+                    report["sessions"], report["periods"], report["seconds"])
+    else:
+        logger.error("Timetable verification failed: clashes %s, lab overflow %d, unavailable %d",
+                     report["clashes"], report["lab_overflow"], report["unavailable"])
+        for example in report["examples"][:5]:
+            logger.error("  %s %s w%d d%d p%d: %s", example["family"], example["entity"], example["week"],
+                         example["day"], example["period"], example["sessions"])
+    if unverified:
+        logger.warning("%d assigned keys have no assignment_meta and were not verified", unverified)
+    return report
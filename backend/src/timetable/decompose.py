@@ -0,0 +1,327 @@
+"""
+decompose.py - split the planning problem into independent components and solve them in parallel.
+
+Sits between precompute.prepare and solver.build_cp_model. Sections only interact through:
+ - a shared assigned faculty,
+ - a shared classroom (section_classroom_map),
+ - elective groups: virtual sections of a semester block every real section of that semester,
+ - the global lab-room capacity (every section that has a lab subject).
+Sections are unioned over those shared resources; each connected component is built and
+solved in its own process and the partial timetables are merged back into the usual
+runner / outputs shapes.
+
+The lab-room cap couples every lab-bearing section. With lab_capacity_policy="split" the
+cap is instead apportioned across components by lab demand (at least one room each), which
+is a restriction of the original model, so any merged solution is still feasible for it.
+"""
+
+import logging
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from ortools.sat.python import cp_model
+
+from src.timetable import solver, warmstart
+
+logger = logging.getLogger("src.timetable.decompose")
+logger.setLevel(logging.INFO)
+
+LAB_CAPACITY_POLICIES = ("couple", "split")
+
+# meta entries the runner / outputs need after a solve
+OUTPUT_META_KEYS = (
+    "section_faculty_map",
+    "days",
+    "weekly_template",
+    "teaching_calendar",
+    "working_dates",
+    "subject_periods_map",
+    "backend",
+    "periods_per_day",
+)
+
+
+def _section_has_lab(sec, subjects_lookup: Dict[str, Any]) -> bool:
+    for subj in sec.subjects:
+        if getattr(subj, "is_lab", False):
+            return True
+        sm = subjects_lookup.get(subj.id)
+        if sm is not None and getattr(sm, "is_lab", False):
+            return True
+    return False
+
+
+def shared_resources(normalized: Dict[str, Any], inputs: Dict[str, Any],
+                     couple_labs: bool = True) -> Dict[Tuple[str, Any], List[str]]:
+    """
+    Interaction graph as hyperedges: (kind, resource) -> section ids that use it.
+    kind is one of "faculty", "room", "elective_semester", "lab_capacity".
+    """
+    subjects_lookup = {s.id: s for s in inputs.get("subjects_master", []) or []}
+    section_classroom_map = normalized.get("section_classroom_map", {})
+    resources: Dict[Tuple[str, Any], List[str]] = defaultdict(list)
+
+    sections = normalized.get("normalized_sections", [])
+    elective_semesters = {s.semester for s in sections if getattr(s, "is_virtual", False)}
+
+    for sec in sections:
+        if not sec.subjects:
+            continue
+        for fac in sorted({getattr(subj, "assigned_faculty_id", None) for subj in sec.subjects} - {None}):
+            resources[("faculty", fac)].append(sec.id)
+        room = section_classroom_map.get(sec.id)
+        if room is not None:
+            resources[("room", room)].append(sec.id)
+        if sec.semester in elective_semesters:
+            resources[("elective_semester", sec.semester)].append(sec.id)
+        if couple_labs and _section_has_lab(sec, subjects_lookup):
+            resources[("lab_capacity", None)].append(sec.id)
+
+    return dict(resources)
+
+
+def find_components(normalized: Dict[str, Any], inputs: Dict[str, Any],
+                    couple_labs: bool = True) -> List[List[str]]:
+    """Connected components of sections (union-find over shared resources), largest first."""
+    parent: Dict[str, str] = {}
+
+    def find(x: str) -> str:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for sec in normalized.get("normalized_sections", []):
+        if sec.subjects:
+            parent[sec.id] = sec.id
+
+    for members in shared_resources(normalized, inputs, couple_labs).values():
+        root = find(members[0])
+        for sid in members[1:]:
+            other = find(sid)
+            if other != root:
+                parent[other] = root
+
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for sid in parent:
+        groups[find(sid)].append(sid)
+    components = sorted(groups.values(), key=lambda c: (-len(c), c[0]))
+    logger.info("Decomposition: %d components (sizes=%s)", len(components), [len(c) for c in components])
+    return components
+
+
+def apportion_lab_capacity(components: List[List[str]], normalized: Dict[str, Any], inputs: Dict[str, Any],
+                           lab_room_capacity: int) -> Optional[List[int]]:
+    """
+    Split lab_room_capacity across components by lab demand (periods), one room minimum
+    for each component with labs. Returns None when there are more lab-bearing
+    components than lab rooms.
+    """
+    subjects_lookup = {s.id: s for s in inputs.get("subjects_master", []) or []}
+    periods_map = normalized.get("sec_sub_periods_map", {})
+    sec_by_id = {s.id: s for s in normalized.get("normalized_sections", [])}
+
+    demand = []
+    for comp in components:
+        total = 0
+        for sid in comp:
+            for subj in sec_by_id[sid].subjects:
+                sm = subjects_lookup.get(subj.id)
+                if getattr(subj, "is_lab", False) or (sm is not None and getattr(sm, "is_lab", False)):
+                    total += int(periods_map.get(subj.id, 0))
+        demand.append(total)
+
+    lab_components = [i for i, dem in enumerate(demand) if dem > 0]
+    if len(lab_components) > lab_room_capacity:
+        return None
+
+    shares = [1 if dem > 0 else 0 for dem in demand]
+    spare = lab_room_capacity - len(lab_components)
+    total_demand = sum(demand)
+    if spare > 0 and total_demand > 0:
+        exact = {i: spare * demand[i] / total_demand for i in lab_components}
+        for i in lab_components:
+            shares[i] += int(exact[i])
+        leftover = spare - sum(int(v) for v in exact.values())
+        for i in sorted(lab_components, key=lambda i: exact[i] - int(exact[i]), reverse=True)[:leftover]:
+            shares[i] += 1
+    return shares
+
+
+def split_normalized(normalized: Dict[str, Any], section_ids: List[str]) -> Dict[str, Any]:
+    """Shallow copy of `normalized` restricted to the given sections."""
+    keep = set(section_ids)
+    sub = dict(normalized)
+    sub["normalized_sections"] = [s for s in normalized.get("normalized_sections", []) if s.id in keep]
+    sub["section_classroom_map"] = {
+        sid: room for sid, room in normalized.get("section_classroom_map", {}).items() if sid in keep
+    }
+    return sub
+
+
+def _solve_component(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Process-pool worker: build and solve one component, return picklable results."""
+    t0 = time.perf_counter()
+    model, meta = solver.build_cp_model(task["normalized"], task["inputs"], **task["build_kwargs"])
+    build_seconds = time.perf_counter() - t0
+    if task.get("hint_keys"):
+        warmstart.apply_hints(model, meta, task["hint_keys"])
+
+    cp = cp_model.CpSolver()
+    cp.parameters.max_time_in_seconds = task["time_limit"]
+    cp.parameters.num_search_workers = task["num_workers"]
+    cp.parameters.cp_model_presolve = True
+    status = cp.Solve(model)
+
+    out = {
+        "index": task["index"],
+        "sections": task["sections"],
+        "status": cp.StatusName(status),
+        "objective": None,
+        "assigned": [],
+        "assignment_meta": {},
+        "build_seconds": round(build_seconds, 3),
+        "solve_seconds": round(cp.WallTime(), 3),
+        "has_electives": bool(meta.get("elective_masters")),
+        "warm_start": meta.get("warm_start"),
+        "output_meta": {k: meta.get(k) for k in OUTPUT_META_KEYS},
+        "constraint_flags": solver.constraint_flags(meta),
+    }
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        out["objective"] = cp.ObjectiveValue()
+        assigned = solver.masked_keys(meta, solver.solution_mask(cp.ResponseProto().solution, meta))
+        out["assigned"] = assigned
+        out["assignment_meta"] = {k: meta["assignment_meta"][k] for k in assigned}
+    return out
+
+
+def _hints_for(hint_keys: Optional[List[Tuple]], component: List[str]) -> Optional[List[Tuple]]:
+    if not hint_keys:
+        return None
+    sections = set(component)
+    return [k for k in hint_keys if k[0] in sections]
+
+
+def merge_status(statuses: List[str]) -> str:
+    for bad in ("MODEL_INVALID", "INFEASIBLE", "UNKNOWN"):
+        if bad in statuses:
+            return bad
+    return "OPTIMAL" if all(s == "OPTIMAL" for s in statuses) else "FEASIBLE"
+
+
+def solve_components(
+    normalized: Dict[str, Any],
+    inputs: Dict[str, Any],
+    time_limit: int = 60,
+    num_workers: int = 8,
+    max_processes: Optional[int] = None,
+    lab_capacity_policy: str = "couple",
+    lab_room_capacity: int = 2,
+    hint_keys: Optional[List[Tuple]] = None,
+    **build_kwargs,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Decompose, solve every component in a process pool and merge.
+
+    Returns (result, meta) in the shapes runner.run_solver / runner.write_solution use:
+    result has status / objective / violations / assigned plus per-component stats,
+    meta carries the merged assignment_meta and output-side maps.
+    """
+    if lab_capacity_policy not in LAB_CAPACITY_POLICIES:
+        raise ValueError(f"Unknown lab_capacity_policy '{lab_capacity_policy}', expected one of {LAB_CAPACITY_POLICIES}")
+
+    split_labs = lab_capacity_policy == "split"
+    components = find_components(normalized, inputs, couple_labs=not split_labs)
+    lab_shares = [lab_room_capacity] * len(components)
+    if split_labs:
+        shares = apportion_lab_capacity(components, normalized, inputs, lab_room_capacity)
+        if shares is None:
+            logger.warning("More lab-bearing components than lab rooms (%d); coupling labs instead", lab_room_capacity)
+            components = find_components(normalized, inputs, couple_labs=True)
+            lab_shares = [lab_room_capacity] * len(components)
+        else:
+            lab_shares = shares
+
+    processes = max(1, min(len(components), max_processes or os.cpu_count() or 1))
+    workers_each = max(1, num_workers // processes)
+    tasks = [
+        {
+            "index": i,
+            "sections": comp,
+            "normalized": split_normalized(normalized, comp),
+            "inputs": inputs,
+            "build_kwargs": dict(build_kwargs, lab_room_capacity=max(1, lab_shares[i])),
+            "time_limit": time_limit,
+            "num_workers": workers_each,
+            "hint_keys": _hints_for(hint_keys, comp),
+        }
+        for i, comp in enumerate(components)
+    ]
+    logger.info("Solving %d components on %d processes (%d CP-SAT workers each)",
+                len(tasks), processes, workers_each)
+
+    if processes == 1:
+        parts = [_solve_component(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            parts = list(pool.map(_solve_component, tasks))
+
+    for part in parts:
+        logger.info("Component %d (%d sections): status=%s objective=%s build=%.2fs solve=%.2fs",
+                    part["index"], len(part["sections"]), part["status"], part["objective"],
+                    part["build_seconds"], part["solve_seconds"])
+
+    status_name = merge_status([p["status"] for p in parts]) if parts else "OPTIMAL"
+    feasible = status_name in ("OPTIMAL", "FEASIBLE")
+    objective = sum(p["objective"] or 0 for p in parts) if feasible else None
+
+    assigned: List[Tuple] = []
+    meta: Dict[str, Any] = {
+        "assignment_meta": {},
+        "section_faculty_map": {},
+        "section_classroom_map": normalized.get("section_classroom_map", {}),
+        "subject_periods_map": normalized.get("sec_sub_periods_map", {}),
+        "teaching_calendar": normalized.get("teaching_calendar", []),
+        "elective_masters": any(p["has_electives"] for p in parts),
+        # plain presence flags in place of the components' occupancy index arrays
+        **{name: any(p["constraint_flags"][name] for p in parts) for name in solver.OCCUPANCY_FAMILIES},
+        # the whole timetable shares every lab room, whatever share each component was built with
+        "lab_room_capacity": lab_room_capacity,
+    }
+    for part in parts:
+        assigned.extend(part["assigned"])
+        meta["assignment_meta"].update(part["assignment_meta"])
+        out_meta = part["output_meta"]
+        meta["section_faculty_map"].update(out_meta.get("section_faculty_map") or {})
+        for k in ("days", "weekly_template", "working_dates", "backend", "periods_per_day"):
+            if meta.get(k) is None:
+                meta[k] = out_meta.get(k)
+        if part["warm_start"]:
+            warm = meta.setdefault("warm_start", {"previous": 0, "matched": 0, "unmatched": 0,
+                                                  "hinted_vars": 0, "hinted_keys": set()})
+            for k in ("previous", "matched", "unmatched", "hinted_vars"):
+                warm[k] += part["warm_start"][k]
+            warm["hinted_keys"] |= part["warm_start"]["hinted_keys"]
+
+    result = {
+        "status": status_name,
+        "assigned": assigned if feasible else [],
+        "objective": objective,
+        "violations": int(objective) if objective is not None else 0,
+        "components": [
+            {
+                "index": p["index"],
+                "sections": p["sections"],
+                "status": p["status"],
+                "objective": p["objective"],
+                "lab_room_capacity": tasks[p["index"]]["build_kwargs"]["lab_room_capacity"],
+                "build_seconds": p["build_seconds"],
+                "solve_seconds": p["solve_seconds"],
+            }
+            for p in parts
+        ],
+    }
+    return result, meta
@@ -0,0 +1,141 @@
+"""
+diagnostics.py - name the constraints behind an infeasible timetable.
+
+find_conflicts builds the model once with guard literals (build_cp_model(diagnostics=...)):
+every hard constraint family - or, at "entity" level, every section / faculty / room
+no-double-booking block, subject total, elective option and the global lab capacity -
+is only enforced when its guard holds, and the guards are the solve's assumptions.
+ - one feasibility solve (objective dropped) either succeeds, or proves INFEASIBLE and
+   returns a sufficient set of guards (SufficientAssumptionsForInfeasibility),
+ - that core is shrunk by deletion: a guard is dropped when the rest still conflicts
+   (guards left out of the assumptions are free, i.e. their constraints are relaxed), so
+   with enough time the result is a minimal conflicting subset,
+ - the core is reported per guard and as culprit sections / faculty / rooms / subjects /
+   elective groups for runner.write_diagnostics.
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Tuple
+
+from ortools.sat.python import cp_model
+
+from src.timetable import solver
+
+logger = logging.getLogger("src.timetable.diagnostics")
+logger.setLevel(logging.INFO)
+
+
+def _solve(model: cp_model.CpModel, assumptions: List[int], time_limit: float, num_workers: int
+           ) -> Tuple[str, List[int]]:
+    """Solve under `assumptions`; returns (status name, sufficient assumptions when INFEASIBLE)."""
+    proto = model.Proto()
+    proto.assumptions.clear()
+    proto.assumptions.extend(assumptions)
+    cp = cp_model.CpSolver()
+    cp.parameters.max_time_in_seconds = max(0.1, time_limit)
+    cp.parameters.num_search_workers = num_workers
+    # capacity conflicts are counting arguments: the full LP relaxation proves them far
+    # faster than clause learning (pigeonhole)
+    cp.parameters.linearization_level = 2
+    status = cp.Solve(model)
+    core = list(cp.SufficientAssumptionsForInfeasibility()) if status == cp_model.INFEASIBLE else []
+    return cp.StatusName(status), core
+
+
+def culprits(core: List[Tuple[str, Any]]) -> Dict[str, List[str]]:
+    """Sections / faculty / rooms / subjects / elective groups named by (family, entity) guards."""
+    named = {"sections": set(), "faculty": set(), "rooms": set(), "subjects": set(), "elective_groups": set()}
+    for family, entity in core:
+        if entity is None:
+            continue
+        if family == "section_no_double":
+            named["sections"].add(entity)
+        elif family == "faculty_no_double":
+            named["faculty"].add(entity)
+        elif family == "room_no_double":
+            named["rooms"].add(entity)
+        elif family == "subject_totals":
+            named["sections"].add(entity[0])
+            named["subjects"].add(entity[1])
+        elif family in ("elective_totals", "elective_blocking"):
+            named["elective_groups"].add(f"{entity[0]}/{entity[1]}")
+            named["subjects"].add(entity[2])
+        elif family == "elective_exclusion":
+            named["elective_groups"].add(f"{entity[0]}/{entity[1]}")
+    return {k: sorted(map(str, v)) for k, v in named.items()}
+
+
+def find_conflicts(
+    normalized: Dict[str, Any],
+    inputs: Dict[str, Any],
+    level: str = "entity",
+    time_limit: float = 60,
+    num_workers: int = 8,
+    minimize: bool = True,
+    **build_kwargs,
+) -> Dict[str, Any]:
+    """
+    Build the guarded model and look for a conflicting set of constraint guards.
+
+    Returns a report with status (of the all-guards solve), `core` ([{family, entity}]),
+    `culprits` (see culprits()), `minimal` (True once every guard left was shown to be
+    needed), `guards` (total guard count), `solves` and `seconds`. time_limit covers
+    the whole search, core minimization included.
+    """
+    t0 = time.perf_counter()
+    deadline = t0 + time_limit
+    build_kwargs = dict(build_kwargs, backend="boolean", diagnostics=level, var_names=False)
+    build_kwargs.pop("symmetry_breaking", None)
+    model, meta = solver.build_cp_model(normalized, inputs, **build_kwargs)
+    # feasibility is all that matters here
+    model.Proto().clear_objective()
+    guards = meta["diagnostic_guards"]
+    key_of = {lit: key for key, lit in guards.items()}
+
+    status, core = _solve(model, list(guards.values()), deadline - time.perf_counter(), num_workers)
+    solves = 1
+    minimal = False
+    logger.info("Diagnostics solve with %d guards (%s level): %s, sufficient core of %d",
+                len(guards), level, status, len(core))
+
+    if status == "INFEASIBLE" and minimize:
+        # deletion pass: keep a guard only if the others no longer conflict without it
+        needed: List[int] = []
+        candidates = list(core)
+        minimal = True
+        while candidates:
+            if time.perf_counter() >= deadline:
+                minimal = False
+                needed.extend(candidates)
+                break
+            lit = candidates.pop()
+            trial_status, trial_core = _solve(model, needed + candidates, deadline - time.perf_counter(), num_workers)
+            solves += 1
+            if trial_status == "INFEASIBLE":
+                # the rest still conflicts; the new core may drop more than `lit`
+                kept = set(trial_core)
+                needed = [g for g in needed if g in kept]
+                candidates = [g for g in candidates if g in kept]
+            elif trial_status in ("OPTIMAL", "FEASIBLE"):
+                needed.append(lit)
+            else:
+                minimal = False
+                needed.append(lit)
+        core = needed
+
+    core_keys = sorted((key_of[lit] for lit in core), key=str)
+    report = {
+        "status": status,
+        "level": level,
+        "guards": len(guards),
+        "core": [{"family": family, "entity": entity} for family, entity in core_keys],
+        "culprits": culprits(core_keys),
+        "minimal": minimal,
+        "solves": solves,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+    if core_keys:
+        logger.info("Conflicting constraints (%d%s): %s", len(core_keys), ", minimal" if minimal else "",
+                    "; ".join(f"{family} {entity}" if entity is not None else family for family, entity in core_keys))
+    return report
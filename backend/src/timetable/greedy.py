@@ -0,0 +1,192 @@
+"""
+greedy.py - fast constructive timetable used to seed CP-SAT.
+
+Works on the candidates of an already built model (build_cp_model meta):
+ - labs are placed first, then elective options, then theory subjects,
+ - every block respects section, faculty, room and global lab-room capacity,
+ - an elective option places all of its virtual copies at one start and keeps the real
+   sections of that semester (and the other options of the group) off the covered slots,
+ - blocks are spread one per day across weeks before any day gets a second start.
+The result is a complete or partial list of start-keys: runner feeds it to the model as
+hints (warmstart.apply_hints) and can write it as a fallback timetable when the solver
+stops with UNKNOWN.
+"""
+
+import logging
+import math
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger("src.timetable.greedy")
+logger.setLevel(logging.INFO)
+
+
+def _build_tasks(normalized: Dict[str, Any], meta: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One task per real (section, subject) and per elective option, with its candidate starts."""
+    assignment_meta = meta["assignment_meta"]
+    quotas = meta.get("subject_quotas", {})
+    pair_quotas = meta.get("pair_quotas", {})
+    semester_of = {s.id: s.semester for s in normalized.get("normalized_sections", [])}
+
+    virtual_sids = set()
+    for subj_map in meta.get("elective_index", {}).values():
+        for sids in subj_map.values():
+            virtual_sids.update(sids)
+
+    tasks = []
+    for (sid, subj_id), starts in meta.get("sec_subj_vars", {}).items():
+        if sid in virtual_sids or not starts:
+            continue
+        _, _, fac, length = assignment_meta[(sid, subj_id) + tuple(starts[0])]
+        hi = pair_quotas.get((sid, subj_id), quotas.get(subj_id, (0, 0)))[1]
+        if hi <= 0:
+            continue
+        tasks.append({
+            "name": f"{sid}/{subj_id}",
+            "subject": subj_id,
+            "semester": semester_of.get(sid),
+            "group": None,
+            "members": [(sid, fac)],
+            "length": length,
+            "blocks": hi // length,
+            "starts": list(starts),
+        })
+
+    for (semester, group), subj_map in meta.get("elective_index", {}).items():
+        for subj_id, sids in subj_map.items():
+            members, common, length = [], None, 1
+            for sid in sids:
+                starts = meta.get("sec_subj_vars", {}).get((sid, subj_id), [])
+                if not starts:
+                    continue
+                _, _, fac, length = assignment_meta[(sid, subj_id) + tuple(starts[0])]
+                members.append((sid, fac))
+                common = set(starts) if common is None else common & set(starts)
+            if not members:
+                continue
+            hi = pair_quotas.get((members[0][0], subj_id), quotas.get(subj_id, (0, 0)))[1]
+            if hi <= 0:
+                continue
+            tasks.append({
+                "name": f"{semester}/{group}/{subj_id}",
+                "subject": subj_id,
+                "semester": semester,
+                "group": group,
+                "members": members,
+                "length": length,
+                "blocks": hi // length,
+                "starts": sorted(common or []),
+            })
+
+    # labs first, then electives, then theory; larger demand first inside each class
+    tasks.sort(key=lambda t: (t["length"] == 1, t["group"] is None, -t["blocks"], t["name"]))
+    return tasks
+
+
+def greedy_assign(normalized: Dict[str, Any], meta: Dict[str, Any]) -> Tuple[List[Tuple], Dict[str, Any]]:
+    """
+    Place every task's blocks into free candidate starts.
+
+    Returns (assigned start-keys, report) where report has required / placed block counts,
+    complete, seconds and an `unplaced` list of tasks that could not get all their blocks.
+    """
+    t0 = time.perf_counter()
+    section_classroom_map = meta.get("section_classroom_map", {})
+    lab_cap = int(meta.get("lab_room_capacity", 2))
+    num_days = max(1, len(meta.get("days", [])))
+    num_periods = max(1, int(meta.get("periods_per_day", 8)))
+    elective_semesters = {sem for (sem, _) in meta.get("elective_index", {})}
+
+    busy_section = set()
+    busy_faculty = set()
+    busy_room = set()
+    lab_used: Dict[Tuple[int, int, int], int] = defaultdict(int)
+    # (semester, w, d, p) -> "real" / elective group holding the slot
+    semester_slot: Dict[Tuple[str, int, int, int], Any] = {}
+
+    def fits(task, w, d, p):
+        span = range(p, p + task["length"])
+        for sid, fac in task["members"]:
+            room = section_classroom_map.get(sid)
+            for pp in span:
+                if (sid, w, d, pp) in busy_section or (fac, w, d, pp) in busy_faculty:
+                    return False
+                if room is not None and (room, w, d, pp) in busy_room:
+                    return False
+        if task["length"] > 1 and any(lab_used[(w, d, pp)] + len(task["members"]) > lab_cap for pp in span):
+            return False
+        if task["semester"] in elective_semesters:
+            # real sections may share a slot with each other, an elective option may not share it at all
+            owner = task["group"] or "real"
+            for pp in span:
+                held = semester_slot.get((task["semester"], w, d, pp))
+                if held is not None and not (held == owner == "real"):
+                    return False
+        return True
+
+    def place(task, w, d, p):
+        keys = []
+        span = range(p, p + task["length"])
+        for sid, fac in task["members"]:
+            room = section_classroom_map.get(sid)
+            for pp in span:
+                busy_section.add((sid, w, d, pp))
+                busy_faculty.add((fac, w, d, pp))
+                if room is not None:
+                    busy_room.add((room, w, d, pp))
+            keys.append((sid, task["subject"], w, d, p))
+        for pp in span:
+            if task["length"] > 1:
+                lab_used[(w, d, pp)] += len(task["members"])
+            if task["semester"] in elective_semesters:
+                semester_slot[(task["semester"], w, d, pp)] = task["group"] or "real"
+        return keys
+
+    assigned: List[Tuple] = []
+    unplaced = []
+    required = placed = 0
+    for i, task in enumerate(_build_tasks(normalized, meta)):
+        required += task["blocks"]
+        by_week: Dict[int, List[Tuple[int, int, int]]] = defaultdict(list)
+        for start in task["starts"]:
+            by_week[start[0]].append(tuple(start))
+        # spread over the weeks that have candidate starts (calendar weeks may have none)
+        per_week = math.ceil(task["blocks"] / max(1, len(by_week)))
+
+        done = 0
+        week_count: Dict[int, int] = defaultdict(int)
+        day_count: Dict[Tuple[int, int], int] = defaultdict(int)
+        # pass 0: at most per_week blocks per week and one start per day; pass 1: fill anything free
+        for spread in (True, False):
+            for w in sorted(by_week):
+                # rotate days / periods per task so sections do not all pile onto day 0, period 0
+                starts = sorted(by_week[w], key=lambda s: ((s[1] + i) % num_days, (s[2] + i) % num_periods))
+                for (_, d, p) in starts:
+                    if done >= task["blocks"]:
+                        break
+                    if spread and (week_count[w] >= per_week or day_count[(w, d)] > 0):
+                        continue
+                    if not fits(task, w, d, p):
+                        continue
+                    assigned.extend(place(task, w, d, p))
+                    week_count[w] += 1
+                    day_count[(w, d)] += 1
+                    done += 1
+            if done >= task["blocks"]:
+                break
+        placed += done
+        if done < task["blocks"]:
+            unplaced.append({"task": task["name"], "required_blocks": task["blocks"], "placed_blocks": done})
+
+    report = {
+        "required_blocks": required,
+        "placed_blocks": placed,
+        "complete": not unplaced,
+        "assigned_count": len(assigned),
+        "seconds": round(time.perf_counter() - t0, 3),
+        "unplaced": unplaced,
+    }
+    logger.info("Greedy placed %d/%d blocks (%d start-keys) in %.3fs, %d tasks short",
+                placed, required, len(assigned), report["seconds"], len(unplaced))
+    return assigned, report
@@ -0,0 +1,167 @@
+"""
+model_cache.py - content-addressed on-disk cache for built CP-SAT models.
+
+build_cp_model_cached(normalized, inputs, cache_dir, **build_kwargs) hashes everything the
+builder reads (normalized, inputs["subjects_master"], the builder parameters, the solver /
+candidate-store / registry / conflicts / symmetry source and the OR-Tools version). On a
+hit the model and meta are restored from disk and build_cp_model is skipped; on a miss
+the model is built and stored.
+
+Each entry is a directory <cache_dir>/<sha256>/ holding:
+ - model.txt.gz: the CpModelProto in text format (the Python wrapper can only re-read text),
+ - meta.pkl.gz: meta minus its store-backed views (the CandidateStore and the proto-index
+   arrays pickle directly; the views are rebuilt against the loaded model).
+Entries are evicted least-recently-used first (directory mtime, refreshed on every hit)
+once there are more than `max_entries` of them.
+
+meta.pkl.gz is unpickled on a hit, which can execute code: cache_dir must only hold
+entries written by this process or others you trust (not a shared or downloaded cache).
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import ortools
+from ortools.sat.python import cp_model
+
+from src.timetable import candidates, conflicts, registry, solver, symmetry
+
+logger = logging.getLogger("src.timetable.model_cache")
+logger.setLevel(logging.INFO)
+
+CACHE_FORMAT = 2
+DEFAULT_MAX_ENTRIES = 4
+
+MODEL_FILE = "model.txt.gz"
+META_FILE = "meta.pkl.gz"
+
+def _canonical(obj: Any) -> Any:
+    """JSON-able, order-independent form of the builder inputs."""
+    if hasattr(obj, "model_dump"):
+        return _canonical(obj.model_dump())
+    if isinstance(obj, registry.IdRegistry):
+        return _canonical(obj.to_dict())
+    if isinstance(obj, dict):
+        return {repr(k) if not isinstance(k, str) else k: _canonical(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    if isinstance(obj, (set, frozenset)):
+        return sorted((_canonical(v) for v in obj), key=repr)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    return obj
+
+
+def cache_key(normalized: Dict[str, Any], inputs: Dict[str, Any], **build_kwargs) -> str:
+    """sha256 over the builder inputs, parameters and the code that turns them into a model."""
+    h = hashlib.sha256()
+    h.update(f"format={CACHE_FORMAT};ortools={ortools.__version__};".encode())
+    for module in (solver, candidates, registry, conflicts, symmetry):
+        h.update(Path(module.__file__).read_bytes())
+    payload = {
+        "normalized": _canonical(normalized),
+        "subjects_master": _canonical(inputs.get("subjects_master", []) or []),
+        "build_kwargs": _canonical(build_kwargs),
+    }
+    h.update(json.dumps(payload, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def _pack_meta(meta: Dict[str, Any]) -> Dict[str, Any]:
+    # the candidate store and the index arrays pickle as they are; views are rebuilt on load
+    return {k: v for k, v in meta.items() if k not in candidates.VIEW_KEYS + ("builder",)}
+
+
+def _unpack_meta(packed: Dict[str, Any], model: cp_model.CpModel) -> Dict[str, Any]:
+    meta = dict(packed)
+    meta.update(candidates.meta_views(meta["candidates"], model))
+    # the ModelBuilder wrapper is build-time only
+    meta["builder"] = None
+    return meta
+
+
+def save(cache_dir, key: str, model: cp_model.CpModel, meta: Dict[str, Any]) -> Path:
+    """Write one entry atomically (temp directory + rename)."""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    final = cache_dir / key
+    tmp = Path(tempfile.mkdtemp(prefix=f".{key[:12]}-", dir=cache_dir))
+    try:
+        text_path = tmp / "model.txt"
+        if not model.ExportToFile(str(text_path)):
+            raise RuntimeError("CpModel.ExportToFile failed")
+        with open(text_path, "rb") as src, gzip.open(tmp / MODEL_FILE, "wb", compresslevel=1) as dst:
+            shutil.copyfileobj(src, dst)
+        text_path.unlink()
+        with gzip.open(tmp / META_FILE, "wb", compresslevel=1) as f:
+            pickle.dump(_pack_meta(meta), f, protocol=pickle.HIGHEST_PROTOCOL)
+        if final.exists():
+            shutil.rmtree(final)
+        os.replace(tmp, final)
+    finally:
+        if tmp.exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+    return final
+
+
+def load(cache_dir, key: str) -> Optional[Tuple[cp_model.CpModel, Dict[str, Any]]]:
+    """Restore (model, meta) for `key`, or None when there is no usable entry."""
+    entry = Path(cache_dir) / key
+    if not (entry / MODEL_FILE).exists() or not (entry / META_FILE).exists():
+        return None
+    try:
+        model = cp_model.CpModel()
+        with gzip.open(entry / MODEL_FILE, "rt") as f:
+            model.Proto().parse_text_format(f.read())
+        with gzip.open(entry / META_FILE, "rb") as f:
+            meta = _unpack_meta(pickle.load(f), model)
+    except Exception as e:
+        logger.warning("Discarding unreadable model cache entry %s: %s", entry, e)
+        shutil.rmtree(entry, ignore_errors=True)
+        return None
+    os.utime(entry)
+    return model, meta
+
+
+def evict(cache_dir, max_entries: int = DEFAULT_MAX_ENTRIES) -> int:
+    """Remove least-recently-used entries beyond `max_entries`; returns how many were removed."""
+    cache_dir = Path(cache_dir)
+    if not cache_dir.is_dir():
+        return 0
+    entries = sorted((p for p in cache_dir.iterdir() if p.is_dir() and not p.name.startswith(".")),
+                     key=lambda p: p.stat().st_mtime, reverse=True)
+    stale = entries[max(0, max_entries):]
+    for p in stale:
+        shutil.rmtree(p, ignore_errors=True)
+    if stale:
+        logger.info("Model cache: evicted %d entries from %s", len(stale), cache_dir)
+    return len(stale)
+
+
+def build_cp_model_cached(normalized: Dict[str, Any], inputs: Dict[str, Any], cache_dir,
+                          max_entries: int = DEFAULT_MAX_ENTRIES, **build_kwargs):
+    """Drop-in for solver.build_cp_model that reuses an identical earlier build from `cache_dir`."""
+    t0 = time.perf_counter()
+    key = cache_key(normalized, inputs, **build_kwargs)
+    hit = load(cache_dir, key)
+    if hit is not None:
+        logger.info("Model cache hit %s (%.2fs)", key[:12], time.perf_counter() - t0)
+        hit[1]["model_cache"] = {"key": key, "hit": True}
+        return hit
+
+    logger.info("Model cache miss %s; building", key[:12])
+    model, meta = solver.build_cp_model(normalized, inputs, **build_kwargs)
+    save(cache_dir, key, model, meta)
+    evict(cache_dir, max_entries)
+    meta["model_cache"] = {"key": key, "hit": False}
+    return model, meta
@@ -2,17 +2,23 @@
 outputs.py - expand solver assignments and write JSON outputs (section, faculty, room)
 Expects:
  - solver_assignments: dict (key->1) OR list of keys [(sid,subj,w,d,p), ...]
+   OR the model's full key order (meta["assign_keys"]) together with assigned_mask
  - assignment_meta: dict keyed by (sid,subj,w,d,p) -> (sid, subj, fac, length)
  - section_faculty_map: mapping (sid,subj) -> faculty
  - section_classroom_map: mapping sid -> room
  - working_dates: list of ISO date strings (global day index)
+Expansion and grouping work on IdRegistry ints; names are resolved only for the JSON.
 """
 
 import json
 import logging
 from collections import defaultdict
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+
+from src.timetable.candidates import CandidateStore
+from src.timetable.registry import IdRegistry
 
 logger = logging.getLogger("src.timetable.outputs")
 logger.setLevel(logging.INFO)
@@ -41,7 +47,17 @@ def _parse_assigned_keys(
     section_faculty_map: Dict,
     section_classroom_map: Dict,
     days_per_week: int,
+    mask: Optional[np.ndarray] = None,
+    registry: Optional[IdRegistry] = None,
 ) -> List[Tuple]:
+    """
+    Expand start-keys into per-period tuples (section, subject, faculty, room, day_idx,
+    period, is_lab) with entities as `registry` ids (-1 = none).
+    With `mask` (bool, aligned with `keys`) only keys[mask] are expanded.
+    """
+    if mask is not None:
+        keys = [keys[i] for i in np.flatnonzero(mask)]
+    intern = (registry if registry is not None else IdRegistry()).intern
     parsed: List[Tuple] = []
     for key in keys:
         if not isinstance(key, tuple) or len(key) != 5:
@@ -54,67 +70,67 @@ def _parse_assigned_keys(
             continue
         _, subj, fac_from_meta, length = meta
         fac = fac_from_meta or section_faculty_map.get((sid, subj_id))
-        room = section_classroom_map.get(sid)
+        ids = (intern("section", sid), intern("subject", subj), intern("faculty", fac),
+               intern("room", section_classroom_map.get(sid)))
         is_lab = (length == 2)
         day_idx = week * days_per_week + day
         for p in range(start_p, start_p + length):
-            parsed.append((sid, subj, fac, room, day_idx, p, is_lab))
+            parsed.append(ids + (day_idx, p, is_lab))
     return parsed
 
 
-def _group_by_section(parsed: List[Tuple], working_dates: List[str]) -> Dict[str, List[Dict[str, Any]]]:
-    out = defaultdict(list)
-    for sid, subj, fac, room, day_idx, period, is_lab in parsed:
-        date_iso = working_dates[day_idx] if 0 <= day_idx < len(working_dates) else None
-        out[str(sid)].append({
-            "date": date_iso,
-            "day_index": day_idx,
-            "period": period,
-            "subject": subj,
-            "faculty": fac,
-            "room": room,
-            "is_lab": is_lab,
-            "free": False,
-        })
-    return out
-
-
-def _group_by_faculty(parsed: List[Tuple], working_dates: List[str]) -> Dict[str, List[Dict[str, Any]]]:
-    out = defaultdict(list)
-    for sid, subj, fac, room, day_idx, period, is_lab in parsed:
-        if not fac:
+def _parse_rows(store: CandidateStore, mask: np.ndarray, days_per_week: int) -> List[Tuple]:
+    """_parse_assigned_keys for masked candidate-store rows, straight from its id columns."""
+    rows = np.flatnonzero(mask)
+    length = store.length[rows]
+    rep = np.repeat(rows, length)
+    # 0 .. length-1 within each block
+    offset = np.arange(len(rep)) - np.repeat(np.cumsum(length) - length, length)
+    day_idx = store.week[rep] * days_per_week + store.day[rep]
+    return list(zip(store.section[rep].tolist(), store.subject[rep].tolist(), store.faculty[rep].tolist(),
+                    store.room[rep].tolist(), day_idx.tolist(), (store.period[rep] + offset).tolist(),
+                    (store.length[rep] == 2).tolist()))
+
+
+def _group(parsed: List[Tuple], working_dates: List[str], registry: IdRegistry, by: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Group parsed periods by section / faculty / room id; names are looked up once per entry."""
+    names = {kind: registry.tables[kind] for kind in ("section", "subject", "faculty", "room")}
+
+    def name(kind: str, i: int):
+        return names[kind][i] if i >= 0 else None
+
+    owner_pos = {"section": 0, "faculty": 2, "room": 3}[by]
+    out: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for row in parsed:
+        sec, subj, fac, room, day_idx, period, is_lab = row
+        owner = row[owner_pos]
+        if by != "section" and not name(by, owner):
             continue
-        date_iso = working_dates[day_idx] if 0 <= day_idx < len(working_dates) else None
-        out[str(fac)].append({
-            "date": date_iso,
+        entry = {
+            "date": working_dates[day_idx] if 0 <= day_idx < len(working_dates) else None,
             "day_index": day_idx,
             "period": period,
-            "subject": subj,
-            "section": sid,
-            "room": room,
-            "is_lab": is_lab,
-            "free": False,
-        })
-    return out
-
-
-def _group_by_room(parsed: List[Tuple], working_dates: List[str]) -> Dict[str, List[Dict[str, Any]]]:
-    out = defaultdict(list)
-    for sid, subj, fac, room, day_idx, period, is_lab in parsed:
-        if not room:
-            continue
-        date_iso = working_dates[day_idx] if 0 <= day_idx < len(working_dates) else None
-        out[str(room)].append({
-            "date": date_iso,
-            "day_index": day_idx,
-            "period": period,
-            "subject": subj,
-            "section": sid,
-            "faculty": fac,
-            "is_lab": is_lab,
-            "free": False,
-        })
-    return out
+            "subject": name("subject", subj),
+        }
+        for kind, i in (("section", sec), ("faculty", fac), ("room", room)):
+            if kind != by:
+                entry[kind] = name(kind, i)
+        entry["is_lab"] = is_lab
+        entry["free"] = False
+        out[owner].append(entry)
+    return {str(names[by][i]): entries for i, entries in out.items()}
+
+
+def _group_by_section(parsed: List[Tuple], working_dates: List[str], registry: IdRegistry) -> Dict[str, List[Dict[str, Any]]]:
+    return _group(parsed, working_dates, registry, "section")
+
+
+def _group_by_faculty(parsed: List[Tuple], working_dates: List[str], registry: IdRegistry) -> Dict[str, List[Dict[str, Any]]]:
+    return _group(parsed, working_dates, registry, "faculty")
+
+
+def _group_by_room(parsed: List[Tuple], working_dates: List[str], registry: IdRegistry) -> Dict[str, List[Dict[str, Any]]]:
+    return _group(parsed, working_dates, registry, "room")
 
 
 def _enrich_virtual_sections(section_json: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
@@ -161,16 +177,38 @@ def expand_and_write_outputs(
     working_dates: List[str],
     days_per_week: int,
     out_prefix: str,
+    assigned_mask: Optional[np.ndarray] = None,
+    candidates: Optional[CandidateStore] = None,
+    registry: Optional[IdRegistry] = None,
 ):
-    keys = _collect_assigned_keys(solver_assignments)
-    logger.info("expand_and_write_outputs: collected %d assigned keys", len(keys))
-
-    parsed = _parse_assigned_keys(keys, assignment_meta, section_faculty_map, section_classroom_map, days_per_week)
+    """
+    With `candidates` (the model's CandidateStore) and `assigned_mask` the selected rows are
+    expanded straight from the store's id columns; otherwise start-keys are parsed and
+    interned into `registry` (a fresh one when None). Names are resolved only when the
+    JSON entries are built.
+    """
+    if assigned_mask is not None and candidates is not None:
+        registry = candidates.registry
+        parsed = _parse_rows(candidates, assigned_mask, days_per_week)
+        logger.info("expand_and_write_outputs: %d assigned rows (mask over %d)",
+                    int(np.count_nonzero(assigned_mask)), len(candidates))
+    else:
+        if assigned_mask is not None:
+            # any indexable key sequence (e.g. meta["assign_keys"]); only masked keys are read
+            keys = solver_assignments
+            logger.info("expand_and_write_outputs: collected %d assigned keys (mask over %d)",
+                        int(np.count_nonzero(assigned_mask)), len(keys))
+        else:
+            keys = _collect_assigned_keys(solver_assignments)
+            logger.info("expand_and_write_outputs: collected %d assigned keys", len(keys))
+        registry = registry if registry is not None else IdRegistry()
+        parsed = _parse_assigned_keys(keys, assignment_meta, section_faculty_map, section_classroom_map,
+                                      days_per_week, mask=assigned_mask, registry=registry)
     logger.info("expand_and_write_outputs: expanded to %d concrete slots", len(parsed))
 
-    section_json = _group_by_section(parsed, working_dates)
-    faculty_json = _group_by_faculty(parsed, working_dates)
-    room_json = _group_by_room(parsed, working_dates)
+    section_json = _group_by_section(parsed, working_dates, registry)
+    faculty_json = _group_by_faculty(parsed, working_dates, registry)
+    room_json = _group_by_room(parsed, working_dates, registry)
 
     # write main outputs
     with open(f"{out_prefix}_section.json", "w") as f:
@@ -0,0 +1,204 @@
+"""
+portfolio.py - solve one model with a portfolio of CP-SAT configurations in parallel.
+
+Instead of a single CpSolver with one parameter set, solve_portfolio launches several
+runs of the same (already hinted) model in separate processes:
+ - every run gets its own random seed, CP-SAT worker count and parameter profile
+   (PROFILES), sized so that the runs together use the machine's cores,
+ - the first run that proves optimality (or infeasibility) stops all others, otherwise
+   every run stops at the shared time limit,
+ - the best run wins: a proof first, then the lowest objective, then the earliest finish.
+The model travels to the workers as a text-format CpModelProto file (the Python wrapper
+can only re-read text). Each run's outcome is logged and returned in the report, and can
+be appended to a JSONL history so profiles can be compared across deployments.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+logger = logging.getLogger("src.timetable.portfolio")
+logger.setLevel(logging.INFO)
+
+# profile name -> CpSolver parameter overrides (on top of presolve on + the run's seed / workers)
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {},
+    "no_lp": {"linearization_level": 0},
+    "full_lp": {"linearization_level": 2},
+    "quick_restart": {"search_branching": cp_model.PORTFOLIO_WITH_QUICK_RESTART_SEARCH},
+    "core": {"optimize_with_core": True},
+    "no_presolve": {"cp_model_presolve": False},
+}
+
+# statuses that settle the model; MODEL_INVALID only says one run's parameters were bad
+PROVEN = ("OPTIMAL", "INFEASIBLE")
+
+# set in every pool process by _init_worker
+_stop_event = None
+
+
+def portfolio_configs(cores: Optional[int] = None, runs: Optional[int] = None,
+                      profiles: Optional[List[str]] = None, min_workers: int = 4) -> List[Dict[str, Any]]:
+    """
+    One config per run: name, profile, seed and num_workers. Without `runs`, as many runs
+    as the cores allow at `min_workers` CP-SAT workers each (at most one per profile);
+    profiles are cycled when there are more runs than profiles.
+    """
+    cores = max(1, cores or os.cpu_count() or 1)
+    profiles = list(profiles or PROFILES)
+    unknown = [p for p in profiles if p not in PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown portfolio profiles {unknown}, expected some of {list(PROFILES)}")
+    if not runs:
+        runs = min(len(profiles), max(1, cores // max(1, min_workers)))
+    workers_each = max(1, cores // runs)
+    configs = []
+    for i in range(runs):
+        profile = profiles[i % len(profiles)]
+        configs.append({"name": f"{profile}/seed{i}/w{workers_each}", "profile": profile,
+                        "seed": i, "num_workers": workers_each})
+    return configs
+
+
+def _init_worker(stop_event) -> None:
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _solve_run(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Process-pool worker: load the model text, solve with one config, return picklable results."""
+    t0 = time.perf_counter()
+    model = cp_model.CpModel()
+    with open(task["model_path"]) as f:
+        model.Proto().parse_text_format(f.read())
+    load_seconds = time.perf_counter() - t0
+
+    config = task["config"]
+    cp = cp_model.CpSolver()
+    cp.parameters.max_time_in_seconds = max(0.0, task["deadline"] - time.time())
+    cp.parameters.num_search_workers = config["num_workers"]
+    cp.parameters.random_seed = config["seed"]
+    cp.parameters.cp_model_presolve = True
+    for name, value in PROFILES[config["profile"]].items():
+        setattr(cp.parameters, name, value)
+
+    # another run's proof stops this search early
+    done = threading.Event()
+
+    def watch():
+        while _stop_event is not None and not done.is_set():
+            if _stop_event.wait(0.2):
+                cp.StopSearch()
+                return
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    status = cp.Solve(model)
+    done.set()
+    watcher.join()
+
+    out = {
+        "config": config,
+        "status": cp.StatusName(status),
+        "objective": None,
+        "bound": None,
+        "solution": None,
+        "load_seconds": round(load_seconds, 3),
+        "solve_seconds": round(cp.WallTime(), 3),
+        "stopped": bool(_stop_event is not None and _stop_event.is_set()),
+    }
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        out["objective"] = cp.ObjectiveValue()
+        out["bound"] = cp.BestObjectiveBound()
+        out["solution"] = np.array(cp.ResponseProto().solution, dtype=np.int64)
+    return out
+
+
+def _rank(run: Dict[str, Any]) -> Tuple:
+    """Sort key: proofs first, then feasible runs by objective, then UNKNOWN, then invalid runs."""
+    if run["status"] in PROVEN:
+        return (0, 0.0, run["solve_seconds"])
+    if run["status"] == "FEASIBLE":
+        return (1, run["objective"], run["solve_seconds"])
+    if run["status"] == "MODEL_INVALID":
+        return (3, 0.0, run["solve_seconds"])
+    return (2, 0.0, run["solve_seconds"])
+
+
+def solve_portfolio(
+    model: cp_model.CpModel,
+    time_limit: int = 60,
+    cores: Optional[int] = None,
+    runs: Optional[int] = None,
+    profiles: Optional[List[str]] = None,
+    history_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Solve `model` with portfolio_configs(cores, runs, profiles) in a process pool.
+
+    Returns a dict with the winning run's status / objective / bound / solution (the
+    response solution vector, None without a solution), `winner` (its config name) and
+    `runs` (per-run status, objective, bound, timings; no solutions). With `history_path`
+    every run is appended there as one JSON line.
+    """
+    configs = portfolio_configs(cores, runs, profiles)
+    ctx = multiprocessing.get_context()
+    stop_event = ctx.Event()
+    logger.info("Starting portfolio of %d CP-SAT runs (limit=%ds): %s",
+                len(configs), time_limit, ", ".join(c["name"] for c in configs))
+
+    t0 = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="portfolio-") as tmp:
+        model_path = os.path.join(tmp, "model.txt")
+        if not model.ExportToFile(model_path):
+            raise RuntimeError("CpModel.ExportToFile failed")
+        deadline = time.time() + time_limit
+        tasks = [{"model_path": model_path, "config": c, "deadline": deadline} for c in configs]
+
+        finished: List[Dict[str, Any]] = []
+        with ProcessPoolExecutor(max_workers=len(tasks), mp_context=ctx,
+                                 initializer=_init_worker, initargs=(stop_event,)) as pool:
+            futures = [pool.submit(_solve_run, t) for t in tasks]
+            for future in as_completed(futures):
+                run = future.result()
+                finished.append(run)
+                logger.info("Portfolio run %s: status=%s objective=%s bound=%s solve=%.2fs%s",
+                            run["config"]["name"], run["status"], run["objective"], run["bound"],
+                            run["solve_seconds"], " (stopped)" if run["stopped"] else "")
+                if run["status"] in PROVEN and not stop_event.is_set():
+                    logger.info("Run %s proved %s; stopping the others", run["config"]["name"], run["status"])
+                    stop_event.set()
+
+    best = min(finished, key=_rank)
+    report_runs = [{k: v for k, v in run.items() if k != "solution"} for run in finished]
+    logger.info("Portfolio finished in %.2fs: winner %s with status=%s objective=%s",
+                time.perf_counter() - t0, best["config"]["name"], best["status"], best["objective"])
+
+    if history_path:
+        path = Path(history_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with open(path, "a") as f:
+            for run in report_runs:
+                f.write(json.dumps(dict(run, time=stamp, time_limit=time_limit,
+                                        winner=run["config"]["name"] == best["config"]["name"])) + "\n")
+
+    return {
+        "status": best["status"],
+        "objective": best["objective"],
+        "bound": best["bound"],
+        "solution": best["solution"],
+        "winner": best["config"]["name"],
+        "runs": report_runs,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
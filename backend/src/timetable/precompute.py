@@ -2,7 +2,8 @@
 Pre-computation module for timetable planning.
 
 Responsibilities:
-1. Map each section -> classroom based on capacity.
+1. Map each section -> classroom based on capacity (first fit, or the best-fit bisect
+   allocation of classrooms.py).
 2. Generate virtual sections for electives grouped per semester/department.
 3. Produce a normalized "planning view":
    - section details
@@ -14,6 +15,9 @@ Responsibilities:
    - Compare subject hours vs. available semester working days.
    - Verify faculty workloads (when faculty max load info exists).
 6. Compute periods required per subject (hours -> periods).
+7. Build the week-by-week teaching calendar (holidays / exam days marked).
+8. Assign faculty to (section, subject) pairs: sequential "tank" filling (default) or the
+   load-balanced assignment of assignment.py ("balanced").
 """
 
 import logging
@@ -23,7 +27,7 @@ import json
 from collections import defaultdict
 from copy import deepcopy
 from datetime import timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from tabulate import tabulate
 from dateutil.parser import parse as parse_date
 from src.timetable.models import (
@@ -39,6 +43,9 @@ from src.timetable.models import (
     SubjectMaster,
     ExamDate
 )
+from src.timetable.assignment import balance_faculty_assignment
+from src.timetable.classrooms import allocate_classrooms
+from src.timetable.registry import KINDS, build_registry
 from src.timetable.utils import write_json_to_file
 
 
@@ -287,6 +294,53 @@ def compute_semester_available_periods(semester: SemesterDate,
     }
 
 
+def build_teaching_calendar(semester: SemesterDate,
+                            holidays: List[Holiday],
+                            examDates: List[ExamDate],
+                            days_per_week: int = 6,
+                            periods_per_day: int = 8) -> List[List[Dict[str, Any]]]:
+    """
+    Lay the semester out as calendar weeks (Monday-aligned, `days_per_week` days each).
+
+    Each week is a list of day dicts:
+      {"date": ISO date, "teachable": bool, "reason": None | "holiday" | "exam" | "outside_semester",
+       "periods": teachable period indices (all `periods_per_day` periods, none when blocked)}
+    Day index d of week w is the solver's (w, d); the solver only creates candidate
+    starts on the listed periods, and outputs date (w, d) from this calendar.
+    """
+    exam_days = set()
+    for ed in examDates or []:
+        cur = ed.startDate
+        while cur <= ed.endDate:
+            exam_days.add(cur)
+            cur += timedelta(days=1)
+
+    holiday_days = {h.holiday_date for h in holidays or []}
+
+    weeks: List[List[Dict[str, Any]]] = []
+    monday = semester.startDate - timedelta(days=semester.startDate.weekday())
+    while monday <= semester.endDate:
+        week = []
+        for d in range(days_per_week):
+            cur = monday + timedelta(days=d)
+            if cur < semester.startDate or cur > semester.endDate:
+                reason = "outside_semester"
+            elif cur in holiday_days:
+                reason = "holiday"
+            elif cur in exam_days:
+                reason = "exam"
+            else:
+                reason = None
+            week.append({"date": cur.isoformat(), "teachable": reason is None, "reason": reason,
+                         "periods": list(range(periods_per_day)) if reason is None else []})
+        weeks.append(week)
+        monday += timedelta(days=7)
+
+    logger.info("Teaching calendar for %s: %d calendar weeks, %d teachable days",
+                semester.id, len(weeks), sum(day["teachable"] for week in weeks for day in week))
+    return weeks
+
+
 
 # ---------- Validation ----------
 
@@ -630,9 +684,29 @@ def assign_faculty_to_section_subjects(
 
 # ---------- Orchestration ----------
 
+FACULTY_ASSIGNMENT_ENGINES = ("tank", "balanced")
+CLASSROOM_ALLOCATION_ENGINES = ("first_fit", "best_fit")
+
+
+def _without_timing(report: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Engine report minus its wall-clock time, so the returned dict (and the model cache key) is reproducible."""
+    if report is None:
+        return None
+    return {k: v for k, v in report.items() if k != "seconds"}
+
+
 def prepare(inputs: Dict[str, Any],
             outputs_dir: str = "output",
-            period_length_hours: float = 0.75) -> Dict[str, Any]:
+            period_length_hours: float = 0.75,
+            faculty_assignment: str = "tank",
+            classroom_allocation: str = "first_fit",
+            preferred_building: Optional[str] = None) -> Dict[str, Any]:
+    if faculty_assignment not in FACULTY_ASSIGNMENT_ENGINES:
+        raise ValueError(f"Unknown faculty assignment '{faculty_assignment}', "
+                         f"expected one of {FACULTY_ASSIGNMENT_ENGINES}")
+    if classroom_allocation not in CLASSROOM_ALLOCATION_ENGINES:
+        raise ValueError(f"Unknown classroom allocation '{classroom_allocation}', "
+                         f"expected one of {CLASSROOM_ALLOCATION_ENGINES}")
     logger.info("Starting pre-computation...")
 
     sections: List[Section] = inputs.get("sections", [])
@@ -650,7 +724,17 @@ def prepare(inputs: Dict[str, Any],
     # Write virtual elective sections to output file
     write_json_to_file(virtual_elective_section_subjects, "1-virtual-section-subjects.json", outputs_dir)
     #sections = sections + [Section(**vs) for vs in virtual_elective_sections]   
-    section_classroom_map = map_sections_to_classrooms(sections, virtual_elective_section_subjects, classrooms)
+    classroom_report = None
+    if classroom_allocation == "best_fit":
+        # prefer rooms of the department most of the faculty belong to, then preferred_building
+        departments = [f.department for f in faculty if f.department]
+        department = max(set(departments), key=departments.count) if departments else None
+        section_classroom_map, classroom_report = allocate_classrooms(
+            sections, virtual_elective_section_subjects, classrooms, department=department,
+            building=preferred_building)
+        write_json_to_file(classroom_report, "4-classroom-allocation.json", outputs_dir)
+    else:
+        section_classroom_map = map_sections_to_classrooms(sections, virtual_elective_section_subjects, classrooms)
 
     
 
@@ -705,6 +789,7 @@ def prepare(inputs: Dict[str, Any],
     logger.info("Semester dates entries: %d", len(sem_dates))
     logger.info("Semester dates sample: %s", sem_dates[0] if sem_dates else "N/A")
     validation = {}
+    teaching_calendar: List[List[Dict[str, Any]]] = []
     if sem_dates:
         semester = sections[0].semester
         logger.info("Using semester '%s' for available periods computation", semester)
@@ -718,17 +803,30 @@ def prepare(inputs: Dict[str, Any],
         # Compute available periods
         # Note: assuming all sections are in the same semester for simplicity   
             working_weeks_days_period_map = compute_semester_available_periods(semesterDates, holidays, inputs.get("examdates", []))
+            teaching_calendar = build_teaching_calendar(semesterDates, holidays, inputs.get("examdates", []))
             validation["subjects_vs_working_days"] = validate_section_periods_vs_subjects(normalized_sections, working_weeks_days_period_map)
             faculty_work_load_before_assignment:List[FacultyWorkloadMetrics] = calculate_faculty_workloads(faculty, sec_sub_periods_map, fac_sems_sub_map, working_weeks_days_period_map, normalized_sections)
             #validation["faculty_workloads"] = validate_faculty_workloads(faculty, sec_sub_periods_map, fac_sems_sub_map,working_weeks_days_period_map,normalized_sections)
 
     # Faculty–section–subject assignment
-    faculty_loads = assign_faculty_to_section_subjects(
-        normalized_sections,
-        fac_sems_sub_map,
-        sec_sub_periods_map,
-        faculty_work_load_before_assignment
-    )
+    assignment_report = None
+    if faculty_assignment == "balanced":
+        # all pairs at once, minimizing the largest (then the squared) faculty load
+        faculty_loads, assignment_report = balance_faculty_assignment(
+            normalized_sections,
+            fac_sems_sub_map,
+            sec_sub_periods_map,
+            faculty_work_load_before_assignment
+        )
+        display_faculty_workloads(faculty_loads, "After balanced assignment")
+        write_json_to_file(assignment_report, "3-faculty-workload.json", outputs_dir)
+    else:
+        faculty_loads = assign_faculty_to_section_subjects(
+            normalized_sections,
+            fac_sems_sub_map,
+            sec_sub_periods_map,
+            faculty_work_load_before_assignment
+        )
     # Serialize for file writing (convert models to dict)
     write_json_to_file([ns.dict() for ns in normalized_sections],
                     "2-normalized_sections_subjects.json",
@@ -737,6 +835,10 @@ def prepare(inputs: Dict[str, Any],
 
     
 
+    # dense integer ids shared by the solver's candidate store and the output expansion
+    registry = build_registry(normalized_sections, section_classroom_map, all_semester_subjs)
+    logger.info("Id registry: %s", {kind: registry.size(kind) for kind in KINDS})
+
     logger.info("Pre-computation complete. Sections normalized: %d", len(normalized_sections))
     logger.info("Sample normalized section: %s", normalized_sections[0] if normalized_sections else "N/A")
     logger.info("Virtual elective sections generated: %d", len(virtual_elective_section_subjects))
@@ -751,5 +853,13 @@ def prepare(inputs: Dict[str, Any],
         "working_days": working_weeks_days_period_map.get("total_days", 0),
         "working_periods": working_weeks_days_period_map.get("total_periods", 0),
         "working_weeks": working_weeks_days_period_map.get("total_weeks", 0),
-        "periods_per_day": working_weeks_days_period_map.get("periods_per_day", 8)
+        "periods_per_day": working_weeks_days_period_map.get("periods_per_day", 8),
+        "teaching_calendar": teaching_calendar,
+        "registry": registry,
+        # engine report with the per-faculty workload table (balanced assignment only);
+        # the timing is only in 3-faculty-workload.json
+        "faculty_assignment": _without_timing(assignment_report),
+        # best-fit allocation report with the unassigned sections (best_fit only);
+        # the timing is only in 4-classroom-allocation.json
+        "classroom_allocation": _without_timing(classroom_report),
     }
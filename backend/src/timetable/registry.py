@@ -0,0 +1,70 @@
+"""
+registry.py - dense integer ids for section / subject / faculty / room names.
+
+precompute.prepare builds one IdRegistry (normalized["registry"]); the solver's candidate
+store and the output expansion key everything by these ints and only turn them back into
+names when JSON is written.
+
+Ids are append-only: intern() gives an unseen name the next id and never renumbers, so a
+registry shared by several builds (e.g. decompose components) stays consistent.
+"""
+
+from typing import Any, Dict, Iterable, List
+
+KINDS = ("section", "subject", "faculty", "room")
+
+
+class IdRegistry:
+    def __init__(self):
+        self.tables: Dict[str, List[Any]] = {kind: [] for kind in KINDS}
+        self.codes: Dict[str, Dict[Any, int]] = {kind: {} for kind in KINDS}
+
+    def intern(self, kind: str, name: Any) -> int:
+        """Id of `name`, registering it on first use; None is -1."""
+        if name is None:
+            return -1
+        codes = self.codes[kind]
+        i = codes.get(name)
+        if i is None:
+            i = codes[name] = len(self.tables[kind])
+            self.tables[kind].append(name)
+        return i
+
+    def id(self, kind: str, name: Any) -> int:
+        """Id of an already registered `name`, or -1."""
+        return self.codes[kind].get(name, -1)
+
+    def name(self, kind: str, i: int) -> Any:
+        return self.tables[kind][i] if i >= 0 else None
+
+    def size(self, kind: str) -> int:
+        return len(self.tables[kind])
+
+    def to_dict(self) -> Dict[str, List[Any]]:
+        return {kind: list(table) for kind, table in self.tables.items()}
+
+
+def build_registry(normalized_sections: Iterable[Any], section_classroom_map: Dict[str, Any],
+                   subjects: Iterable[Any] = ()) -> IdRegistry:
+    """
+    Sections in normalized order, subjects in `subjects` then section order, faculty
+    (assigned_faculty_id values) and rooms (classroom map values) sorted by name.
+    """
+    registry = IdRegistry()
+    normalized_sections = list(normalized_sections)
+    for sec in normalized_sections:
+        registry.intern("section", sec.id)
+    for subj in subjects:
+        registry.intern("subject", subj.id)
+    faculty = set()
+    for sec in normalized_sections:
+        for subj in sec.subjects:
+            registry.intern("subject", subj.id)
+            fac = getattr(subj, "assigned_faculty_id", None)
+            if fac is not None:
+                faculty.add(fac)
+    for fac in sorted(faculty, key=str):
+        registry.intern("faculty", fac)
+    for room in sorted({r for r in section_classroom_map.values() if r is not None}, key=str):
+        registry.intern("room", room)
+    return registry
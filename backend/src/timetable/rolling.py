@@ -0,0 +1,238 @@
+"""
+rolling.py - rolling-horizon solving over windows of calendar weeks.
+
+Instead of one build_cp_model over the whole semester, solve_rolling builds a model of
+`window_weeks` calendar weeks, keeps (freezes) the first `freeze_weeks` of its solution,
+slides forward by that many weeks and repeats until the calendar is covered:
+ - every window gets the remaining semester periods of each (section, subject) as a
+   normalized["pair_quotas"] range: at least what the weeks after the window can no
+   longer hold, at most the window's pro-rata share of what is left (shortfall below
+   the share is penalised, so the pace is kept without forcing it);
+ - the last window must deliver everything that is left;
+ - a window is hinted from the previous window's pattern: its unfrozen weeks move to the
+   front and the weeks that enter the window repeat the pattern `freeze_weeks` earlier
+   (the first window is seeded by the greedy heuristic); with `hint_keys` from a previous
+   timetable, every window is hinted from that timetable's keys in its weeks instead.
+Model size and per-window solve time depend on window_weeks only, not on the semester
+length. Progress is logged and reported per window (and to an optional callback).
+A window can be INFEASIBLE only because of its pace cap or the weeks frozen before it,
+so that stops the run as UNKNOWN (result["infeasible_window"] names the window); only a
+window spanning the whole calendar proves the inputs INFEASIBLE.
+"""
+
+import logging
+import math
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ortools.sat.python import cp_model
+
+from src.timetable import greedy, solver, warmstart
+
+logger = logging.getLogger("src.timetable.rolling")
+logger.setLevel(logging.INFO)
+
+
+def _pair_lengths(normalized: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[Tuple[str, str], int]:
+    """(sid, subj) -> block length for every pair build_cp_model creates starts for."""
+    subjects_lookup = {s.id: s for s in inputs.get("subjects_master", []) or []}
+    lengths = {}
+    for sec in normalized.get("normalized_sections", []):
+        for subj in sec.subjects:
+            if not getattr(subj, "assigned_faculty_id", None):
+                continue
+            is_lab = bool(getattr(subj, "is_lab", False))
+            if not is_lab and subj.id in subjects_lookup:
+                is_lab = bool(getattr(subjects_lookup[subj.id], "is_lab", False))
+            lengths.setdefault((sec.id, subj.id), 2 if is_lab else 1)
+    return lengths
+
+
+def window_quotas(
+    remaining: Dict[Tuple[str, str], int],
+    lengths: Dict[Tuple[str, str], int],
+    window_capacity: Dict[int, int],
+    later_capacity: Dict[int, int],
+) -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """
+    (lo, hi) periods per pair for one window. *_capacity map a block length to the
+    periods a single pair could be given (every valid start used) inside the window
+    and in all weeks after it.
+    """
+    quotas = {}
+    for pair, left in remaining.items():
+        length = lengths[pair]
+        later = later_capacity.get(length, 0)
+        lo = max(0, left - later)
+        lo = min(left, int(math.ceil(lo / length)) * length)
+        total = window_capacity.get(length, 0) + later
+        share = left * window_capacity.get(length, 0) / total if total else left
+        hi = min(left, int(math.ceil(share / length)) * length)
+        quotas[pair] = (lo, max(lo, hi))
+    return quotas
+
+
+def solve_rolling(
+    normalized: Dict[str, Any],
+    inputs: Dict[str, Any],
+    window_weeks: int = 4,
+    freeze_weeks: int = 2,
+    time_limit: int = 60,
+    num_workers: int = 8,
+    periods_per_day: int = 8,
+    days_per_week: int = 6,
+    default_weeks: int = 19,
+    on_window: Optional[Callable[[Dict[str, Any]], None]] = None,
+    hint_keys: Optional[List[Tuple]] = None,
+    **build_kwargs,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Solve the calendar window by window. time_limit applies to each window.
+
+    Returns (result, meta) in the shapes runner.write_solution uses; result["windows"]
+    holds one progress entry per window (also passed to `on_window` as it completes) and
+    result["objective"] is the sum of the window objectives (overlapping weeks included).
+    """
+    if build_kwargs.get("weekly_template"):
+        raise ValueError("rolling-horizon solving walks the full calendar; it cannot be combined with weekly_template")
+    window_weeks = max(1, int(window_weeks))
+    freeze_weeks = max(1, min(int(freeze_weeks), window_weeks))
+    build_kwargs = dict(build_kwargs, periods_per_day=periods_per_day, days_per_week=days_per_week)
+
+    calendar = solver.planning_calendar(normalized, days_per_week, default_weeks)
+    available = solver.calendar_availability(calendar, days_per_week, periods_per_day)
+    # periods one pair could receive per week, by block length
+    pair_week_capacity = {length: (solver.start_availability(available, length).sum(axis=(1, 2)) * length).tolist()
+                          for length in (1, 2)}
+    lengths = _pair_lengths(normalized, inputs)
+    periods_map = normalized.get("sec_sub_periods_map", {})
+    remaining = {pair: int(periods_map.get(pair[1], 0)) for pair in lengths}
+    remaining = {pair: left for pair, left in remaining.items() if left > 0}
+    required = sum(remaining.values()) or 1
+
+    meta: Dict[str, Any] = {
+        "assignment_meta": {},
+        "section_faculty_map": {},
+        "section_classroom_map": normalized.get("section_classroom_map", {}),
+        "subject_periods_map": periods_map,
+        "teaching_calendar": normalized.get("teaching_calendar", []),
+        "working_dates": [day["date"] for week in calendar for day in week[:days_per_week]]
+        if normalized.get("teaching_calendar") else [],
+        "days": list(range(days_per_week)),
+        "weekly_template": None,
+        "backend": build_kwargs.get("backend", "boolean"),
+        "elective_masters": any(getattr(s, "is_virtual", False) for s in normalized.get("normalized_sections", [])),
+    }
+    assigned: List[Tuple] = []
+    windows: List[Dict[str, Any]] = []
+    objective = 0.0
+    status_name = "OPTIMAL"
+    infeasible_window: Optional[int] = None
+    previous: List[Tuple] = []  # last window's solution in its own week numbering
+    prev_keep = prev_span = 0
+    # previous timetable (warm start) by calendar week
+    hints_of_week = defaultdict(list)
+    for sid, subj, w, d, p in hint_keys or ():
+        hints_of_week[int(w)].append((sid, subj, d, p))
+
+    start = 0
+    while start < len(calendar):
+        end = min(start + window_weeks, len(calendar))
+        last = end == len(calendar)
+        keep = end - start if last else min(freeze_weeks, end - start)
+        quotas = window_quotas(
+            remaining, lengths,
+            {length: sum(caps[start:end]) for length, caps in pair_week_capacity.items()},
+            {length: sum(caps[end:]) for length, caps in pair_week_capacity.items()},
+        )
+        window = dict(normalized, teaching_calendar=calendar[start:end], working_weeks=end - start,
+                      pair_quotas=quotas)
+
+        t0 = time.perf_counter()
+        model, wmeta = solver.build_cp_model(window, inputs, **build_kwargs)
+        build_seconds = time.perf_counter() - t0
+        for name, present in solver.constraint_flags(wmeta).items():
+            meta[name] = meta.get(name, False) or present
+        if hint_keys:
+            hint = [(sid, subj, j, d, p) for j in range(end - start) for sid, subj, d, p in hints_of_week[start + j]]
+            warmstart.apply_hints(model, wmeta, hint)
+        elif previous:
+            # unfrozen weeks move to the front; entering weeks repeat the pattern prev_keep weeks earlier
+            by_week = defaultdict(list)
+            for sid, subj, w, d, p in previous:
+                by_week[w].append((sid, subj, d, p))
+            hint = []
+            for j in range(end - start):
+                src = j + prev_keep
+                while src >= prev_span:
+                    src -= prev_keep
+                hint.extend((sid, subj, j, d, p) for sid, subj, d, p in by_week.get(src, ()))
+            warmstart.apply_hints(model, wmeta, hint, source="previous_window")
+        else:
+            seed, _ = greedy.greedy_assign(window, wmeta)
+            if seed:
+                warmstart.apply_hints(model, wmeta, seed, source="greedy")
+
+        cp = cp_model.CpSolver()
+        cp.parameters.max_time_in_seconds = time_limit
+        cp.parameters.num_search_workers = num_workers
+        status = cp.Solve(model)
+        window_status = cp.StatusName(status)
+
+        entry = {
+            "window": len(windows),
+            "weeks": [start, end],
+            "frozen_weeks": [start, start + keep],
+            "status": window_status,
+            "objective": None,
+            "variables": len(model.Proto().variables),
+            "build_seconds": round(build_seconds, 3),
+            "solve_seconds": round(cp.WallTime(), 3),
+        }
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            entry["objective"] = cp.ObjectiveValue()
+            objective += cp.ObjectiveValue()
+            previous = solver.masked_keys(wmeta, solver.solution_mask(cp.ResponseProto().solution, wmeta))
+            prev_keep, prev_span = keep, end - start
+            meta["section_faculty_map"].update(wmeta.get("section_faculty_map", {}))
+            for key in previous:
+                sid, subj, w, d, p = key
+                if w >= keep:
+                    continue
+                global_key = (sid, subj, start + w, d, p)
+                assigned.append(global_key)
+                meta["assignment_meta"][global_key] = wmeta["assignment_meta"][key]
+                if (sid, subj) in remaining:
+                    remaining[(sid, subj)] -= wmeta["assignment_meta"][key][3]
+
+        entry["delivered_fraction"] = round(1 - sum(max(0, v) for v in remaining.values()) / required, 4)
+        windows.append(entry)
+        logger.info("Window %d weeks %d-%d: status=%s vars=%d build=%.2fs solve=%.2fs, froze %d weeks, "
+                    "%.1f%% of periods placed", entry["window"], start, end - 1, window_status, entry["variables"],
+                    build_seconds, cp.WallTime(), keep, 100 * entry["delivered_fraction"])
+        if on_window:
+            on_window(entry)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            status_name = window_status
+            if status == cp_model.INFEASIBLE and not (start == 0 and last):
+                # the frozen weeks or the window's pace cap may be at fault, not the calendar
+                logger.warning("Window %d is infeasible given the frozen weeks / its quotas; reporting UNKNOWN",
+                               entry["window"])
+                status_name = "UNKNOWN"
+                infeasible_window = entry["window"]
+            break
+        if status != cp_model.OPTIMAL:
+            status_name = "FEASIBLE"
+        start += keep
+
+    feasible = status_name in ("OPTIMAL", "FEASIBLE")
+    result = {
+        "status": status_name,
+        "assigned": assigned if feasible else [],
+        "objective": objective if feasible else None,
+        "violations": int(objective) if feasible else 0,
+        "windows": windows,
+        "infeasible_window": infeasible_window,
+    }
+    return result, meta
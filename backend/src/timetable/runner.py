@@ -5,101 +5,489 @@ Runs CP-SAT solver with logging, diagnostics, and soft constraint violation trac
 
 import json
 import logging
+import os
 from pathlib import Path
 from ortools.sat.python import cp_model
-from . import outputs
+from . import conflicts, decompose, outputs, rolling, template, twolevel, warmstart
+from .diagnostics import find_conflicts
+from .portfolio import solve_portfolio
+from .solver import calendar_availability, masked_keys, solution_mask
+from .telemetry import SolverTelemetry, TelemetryCallback
 
 logger = logging.getLogger("src.timetable.runner")
 logger.setLevel(logging.INFO)
 
 
+class SolutionStreamer(cp_model.CpSolverSolutionCallback):
+    """
+    Persist every improving solution while the search runs:
+     - appends a snapshot (solution, objective, bound, wall_time, assigned start-keys) to
+       <output_dir>/solutions.jsonl,
+     - refreshes the <output_dir>/assignments.json checkpoint (warm-start format),
+     - with write_outputs=True also writes summary.json and the timetables for the snapshot,
+     - forwards each solution to an optional telemetry.SolverTelemetry.
+    """
+
+    def __init__(self, meta: dict, output_dir: str = "output", write_outputs: bool = False,
+                 telemetry: SolverTelemetry = None):
+        super().__init__()
+        self._meta = meta
+        self._output_dir = output_dir
+        self._write_outputs = write_outputs
+        self._telemetry = telemetry
+        self.path = Path(output_dir) / "solutions.jsonl"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text("")
+        self.count = 0
+
+    def OnSolutionCallback(self):
+        assigned = masked_keys(self._meta, solution_mask(self.Response().solution, self._meta))
+        snapshot = {
+            "solution": self.count,
+            "objective": self.ObjectiveValue(),
+            "bound": self.BestObjectiveBound(),
+            "wall_time": round(self.WallTime(), 3),
+        }
+        if self._telemetry is not None:
+            self._telemetry.on_solution(snapshot["objective"], snapshot["bound"], self.WallTime())
+        with open(self.path, "a") as f:
+            f.write(json.dumps(dict(snapshot, assigned=[list(k) for k in assigned])) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        logger.info("Solution %d: objective=%s bound=%s at %.2fs",
+                    self.count, snapshot["objective"], snapshot["bound"], snapshot["wall_time"])
+
+        if self._write_outputs:
+            write_solution(
+                {"status": "INTERMEDIATE", "assigned": assigned, "objective": snapshot["objective"],
+                 "violations": int(snapshot["objective"])},
+                self._meta, self._output_dir, extra_summary={"solution": snapshot},
+            )
+        else:
+            warmstart.write_assignments(Path(self._output_dir) / "assignments.json", assigned,
+                                        status="INTERMEDIATE", weekly_template=self._meta.get("weekly_template"),
+                                        **snapshot)
+        self.count += 1
+
+
 def run_solver(model: cp_model.CpModel,
                meta: dict,
                output_dir: str = "output",
                time_limit: int = 60,
-               num_workers: int = 8) -> dict:
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = time_limit
-    solver.parameters.num_search_workers = num_workers
-    solver.parameters.log_search_progress = True
-    solver.parameters.cp_model_presolve = True
-    solver.parameters.log_to_stdout = True
-
-    logger.info("Starting CP-SAT solver (limit=%ds, workers=%d)...", time_limit, num_workers)
-    status = solver.Solve(model)
-    status_name = solver.StatusName(status)
+               num_workers: int = 8,
+               fallback: tuple = None,
+               stream_solutions: bool = False,
+               stream_outputs: bool = False,
+               portfolio: bool = False,
+               portfolio_runs: int = None) -> dict:
+    """
+    Solve `model` and write the timetable or diagnostics. `fallback` is an optional
+    (start-keys, report) pair from greedy.greedy_assign, written as the timetable when
+    the solver stops with UNKNOWN. `stream_solutions` checkpoints every improving solution
+    through a SolutionStreamer; `stream_outputs` also writes its timetables.
+
+    Search progress is recorded as structured events in <output_dir>/telemetry.jsonl
+    (telemetry.SolverTelemetry) instead of the stdout search log, and summarized under
+    "telemetry" in summary.json / diagnostics.json.
+
+    With `portfolio`, `portfolio_runs` differently configured CP-SAT runs (sized to the
+    machine's cores when None) race in separate processes (portfolio.solve_portfolio)
+    and the best one is written; the runs are reported in summary.json and appended to
+    <output_dir>/portfolio_history.jsonl.
+    """
+    portfolio_report = None
+    telemetry = None
+    if portfolio:
+        if stream_solutions or stream_outputs:
+            logger.warning("Solution streaming is not available in portfolio mode; only the best run is written")
+        portfolio_report = solve_portfolio(model, time_limit=time_limit, runs=portfolio_runs,
+                                           history_path=str(Path(output_dir) / "portfolio_history.jsonl"))
+        status_name = portfolio_report["status"]
+        status = getattr(cp_model, status_name)
+        objective = portfolio_report["objective"]
+        solution = portfolio_report["solution"]
+        streamer = None
+    else:
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = time_limit
+        solver.parameters.num_search_workers = num_workers
+        solver.parameters.cp_model_presolve = True
+        telemetry = SolverTelemetry(Path(output_dir) / "telemetry.jsonl")
+        telemetry.attach(solver)
+
+        logger.info("Starting CP-SAT solver (limit=%ds, workers=%d)...", time_limit, num_workers)
+        streamer = SolutionStreamer(meta, output_dir, write_outputs=stream_outputs, telemetry=telemetry) \
+            if stream_solutions or stream_outputs else None
+        status = solver.Solve(model, streamer or TelemetryCallback(telemetry))
+        status_name = solver.StatusName(status)
+        telemetry_summary = telemetry.finish(solver, status)
+        logger.info("Search telemetry: %d solutions, first at %ss, final gap %s (%s)",
+                    telemetry_summary["solutions"],
+                    (telemetry_summary["first_solution"] or {}).get("t"),
+                    telemetry_summary["final"]["gap"], telemetry.path)
+        # Objective value = number of soft violations (since we Minimize(sum(penalties)))
+        objective = solver.ObjectiveValue() if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None
+        solution = solver.ResponseProto().solution
     logger.info("Solver finished with status: %s", status_name)
 
-    result = {"status": status_name, "assigned": [], "objective": None, "violations": 0}
+    result = {"status": status_name, "assigned": [], "objective": objective, "violations": 0}
+    if streamer is not None:
+        result["streamed_solutions"] = streamer.count
+    if objective is not None:
+        logger.info("Objective value (soft violations minimized) = %s", objective)
 
-    # Objective value = number of soft violations (since we Minimize(sum(penalties)))
-    try:
-        result["objective"] = solver.ObjectiveValue()
-        logger.info("Objective value (soft violations minimized) = %s", result["objective"])
-    except Exception:
-        result["objective"] = None
+    extra_summary = {}
+    if portfolio_report is not None:
+        result["portfolio"] = {k: v for k, v in portfolio_report.items() if k != "solution"}
+        extra_summary["portfolio"] = result["portfolio"]
+    if telemetry is not None:
+        result["telemetry"] = telemetry.summary()
+        extra_summary["telemetry"] = result["telemetry"]
 
     if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        # Collect assigned timetable keys
-        assigned_keys = [k for k, v in meta.get("assign_vars", {}).items() if solver.Value(v)]
+        # Collect assigned timetable keys: one bulk read of the solution vector
+        mask = solution_mask(solution, meta)
+        assigned_keys = masked_keys(meta, mask)
         result["assigned"] = assigned_keys
+        result["assigned_mask"] = mask
         logger.info("Number of assigned timetable start-keys: %d", len(assigned_keys))
 
         # Count violated soft constraints (objective value should equal this)
-        violations = int(result["objective"]) if result["objective"] is not None else 0
+        violations = int(objective) if objective is not None else 0
         result["violations"] = violations
         logger.info("Number of violated soft constraints: %d", violations)
 
-        # Debug: log first few assignments
-        assignment_meta = meta.get("assignment_meta", {})
-        for k in assigned_keys[:10]:
-            logger.info("Assigned key=%s meta=%s", k, assignment_meta.get(k))
-
-        # Save a quick summary JSON
-        summary = {
-            "status": status_name,
-            "objective": result["objective"],
-            "violations": result["violations"],
-            "assigned_count": len(assigned_keys),
+        write_solution(result, meta, output_dir, extra_summary=extra_summary)
+
+    elif status in (cp_model.INFEASIBLE, cp_model.UNKNOWN):
+        write_diagnostics(status_name, meta, output_dir, extra=extra_summary or None)
+        if status == cp_model.UNKNOWN and fallback and fallback[0]:
+            fallback_keys, fallback_report = fallback
+            logger.warning("No solver solution within the limit; writing the greedy timetable (%d/%d blocks)",
+                           fallback_report["placed_blocks"], fallback_report["required_blocks"])
+            fallback_result = {"status": "GREEDY_FALLBACK", "assigned": list(fallback_keys),
+                               "objective": None, "violations": None}
+            write_solution(fallback_result, meta, output_dir,
+                           extra_summary=dict(extra_summary, solver_status=status_name, greedy=fallback_report))
+            # carries assigned plus, for template runs, the calendar-expanded keys and dates
+            result.update({k: v for k, v in fallback_result.items() if k not in ("status", "objective", "violations")})
+            result["fallback"] = "greedy"
+
+    return result
+
+
+def run_decomposed(normalized: dict,
+                   inputs: dict,
+                   output_dir: str = "output",
+                   time_limit: int = 60,
+                   num_workers: int = 8,
+                   max_processes: int = None,
+                   lab_capacity_policy: str = "couple",
+                   hint_keys=None,
+                   **build_kwargs):
+    """
+    Solve independent components (decompose.solve_components) in a process pool and
+    write the merged timetable like run_solver does. Returns (result, meta).
+    """
+    logger.info("Starting decomposed solve (limit=%ds per component, workers=%d)...", time_limit, num_workers)
+    result, meta = decompose.solve_components(
+        normalized, inputs,
+        time_limit=time_limit,
+        num_workers=num_workers,
+        max_processes=max_processes,
+        lab_capacity_policy=lab_capacity_policy,
+        hint_keys=hint_keys,
+        **build_kwargs,
+    )
+    logger.info("Decomposed solve finished with status: %s", result["status"])
+
+    if result["status"] in ("OPTIMAL", "FEASIBLE"):
+        logger.info("Number of assigned timetable start-keys: %d", len(result["assigned"]))
+        write_solution(result, meta, output_dir, extra_summary={"components": result["components"]})
+    else:
+        write_diagnostics(result["status"], meta, output_dir, extra={"components": result["components"]})
+    return result, meta
+
+
+def run_two_level(normalized: dict,
+                  inputs: dict,
+                  output_dir: str = "output",
+                  time_limit: int = 60,
+                  num_workers: int = 8,
+                  max_processes: int = None,
+                  **build_kwargs):
+    """
+    Plan weekly quotas and solve every week as its own model (twolevel.solve_weeks), then
+    write the stitched timetable like run_solver does. Returns (result, meta).
+    """
+    logger.info("Starting two-level solve (limit=%ds per week, workers=%d)...", time_limit, num_workers)
+    result, meta = twolevel.solve_weeks(
+        normalized, inputs,
+        time_limit=time_limit,
+        num_workers=num_workers,
+        max_processes=max_processes,
+        **build_kwargs,
+    )
+    logger.info("Two-level solve finished with status: %s", result["status"])
+
+    extra = {"two_level": {"master": result["master"], "weeks": result["weeks"],
+                           "infeasible_weeks": result["infeasible_weeks"]}}
+    if result["status"] in ("OPTIMAL", "FEASIBLE"):
+        logger.info("Number of assigned timetable start-keys: %d", len(result["assigned"]))
+        write_solution(result, meta, output_dir, extra_summary=extra)
+    else:
+        if result["infeasible_weeks"]:
+            extra["note"] = ("Weeks %s cannot hold the quotas the master assigned them; the master only checks "
+                             "necessary capacity conditions, so this is not an infeasibility proof."
+                             % result["infeasible_weeks"])
+        write_diagnostics(result["status"], meta, output_dir, extra=extra)
+    return result, meta
+
+
+def run_rolling(normalized: dict,
+                inputs: dict,
+                output_dir: str = "output",
+                time_limit: int = 60,
+                num_workers: int = 8,
+                window_weeks: int = 4,
+                freeze_weeks: int = 2,
+                **build_kwargs):
+    """
+    Solve the calendar in sliding windows (rolling.solve_rolling) and write the result
+    like run_solver does. Returns (result, meta).
+    """
+    logger.info("Starting rolling-horizon solve (%d-week windows, freezing %d, limit=%ds per window)...",
+                window_weeks, freeze_weeks, time_limit)
+    result, meta = rolling.solve_rolling(
+        normalized, inputs,
+        window_weeks=window_weeks,
+        freeze_weeks=freeze_weeks,
+        time_limit=time_limit,
+        num_workers=num_workers,
+        **build_kwargs,
+    )
+    logger.info("Rolling-horizon solve finished with status: %s", result["status"])
+
+    extra = {"rolling": {"window_weeks": window_weeks, "freeze_weeks": freeze_weeks, "windows": result["windows"],
+                         "infeasible_window": result["infeasible_window"]}}
+    if result["status"] in ("OPTIMAL", "FEASIBLE"):
+        logger.info("Number of assigned timetable start-keys: %d", len(result["assigned"]))
+        write_solution(result, meta, output_dir, extra_summary=extra)
+    else:
+        if result["infeasible_window"] is not None:
+            extra["note"] = ("Window %d cannot hold its quotas given the weeks frozen before it; this is not an "
+                             "infeasibility proof (try wider windows or fewer frozen weeks)."
+                             % result["infeasible_window"])
+        write_diagnostics(result["status"], meta, output_dir, extra=extra)
+    return result, meta
+
+
+def write_solution(result: dict, meta: dict, output_dir: str = "output", extra_summary: dict = None) -> dict:
+    """
+    Write summary.json and the section/faculty/room timetables for a feasible result.
+
+    `result` needs status / objective / violations / assigned (start-keys); `meta` is the
+    build_cp_model meta or any dict carrying the same output-side maps. Weekly-template
+    results are expanded over the teaching calendar first and `result` is updated in place.
+
+    The start-keys about to be written are checked for double bookings, lab-room overflow
+    and unteachable slots (conflicts.verify_timetable) and the report goes to
+    result["verification"] and summary.json.
+    """
+    status_name = result["status"]
+    assigned_keys = result["assigned"]
+
+    # Debug: log first few assignments
+    assignment_meta = meta.get("assignment_meta", {})
+    for k in assigned_keys[:10]:
+        logger.info("Assigned key=%s meta=%s", k, assignment_meta.get(k))
+
+    # Save a quick summary JSON
+    summary = {
+        "status": status_name,
+        "objective": result["objective"],
+        "violations": result["violations"],
+        "assigned_count": len(assigned_keys),
+    }
+    if meta.get("model_cache"):
+        summary["model_cache"] = meta["model_cache"]
+    if meta.get("symmetry"):
+        summary["symmetry"] = meta["symmetry"]
+    summary.update(extra_summary or {})
+
+    # Compact start-keys (pre-expansion) so the next run can warm-start from them
+    warmstart.write_assignments(
+        Path(output_dir) / "assignments.json",
+        assigned_keys,
+        status=status_name,
+        objective=result["objective"],
+        weekly_template=meta.get("weekly_template"),
+    )
+    warm = meta.get("warm_start")
+    if warm:
+        summary["warm_start"] = {
+            "source": warm.get("source", "previous"),
+            "previous": warm["previous"],
+            "matched": warm["matched"],
+            "unmatched": warm["unmatched"],
+            "kept": len(warm["hinted_keys"].intersection(assigned_keys)),
         }
-        out = Path(output_dir) / "summary.json"
-        out.parent.mkdir(parents=True, exist_ok=True)
-        with open(out, "w") as f:
-            json.dump(summary, f, indent=2)
-        logger.info("Summary written to %s", out)
-
-        # Now expand & write detailed outputs
-        working_dates = meta.get("working_dates", [])
-        days_per_week = meta.get("days", [])
-        if isinstance(days_per_week, list):
-            days_per_week = len(days_per_week)
-        section_faculty_map = meta.get("section_faculty_map", {})
-        section_classroom_map = meta.get("section_classroom_map", {})
-        outputs.expand_and_write_outputs(
+        logger.info("Warm start: %d of %d hinted starts kept in the new solution",
+                    summary["warm_start"]["kept"], warm["matched"])
+
+    working_dates = meta.get("working_dates", [])
+    template_cfg = meta.get("weekly_template")
+    if template_cfg:
+        # Lay the solved template over the teaching calendar before writing outputs
+        expansion = template.expand_weekly_template(
             assigned_keys,
             assignment_meta,
-            section_faculty_map,
-            section_classroom_map,
-            working_dates,
-            days_per_week,
-            str(Path(output_dir) / "timetable"),
+            meta.get("teaching_calendar", []),
+            template_cfg["cycle_weeks"],
+            meta.get("subject_periods_map", {}),
         )
-
-    elif status in (cp_model.INFEASIBLE, cp_model.UNKNOWN):
-        diagnostics = {
-            "status": status_name,
-            "summary": {
-                "faculty_constraints": "present" if meta.get("occupancy_faculty") else "not_present",
-                "section_constraints": "present" if meta.get("occupancy_section") else "not_present",
-                "classroom_constraints": "present" if meta.get("occupancy_room") else "not_present",
-                "elective_constraints": "present" if meta.get("elective_masters") else "not_present",
-            },
-            "note": "Check subject coverage, lab constraints, or relax soft constraints.",
+        result["template_assigned"] = assigned_keys
+        assigned_keys = expansion["assigned"]
+        assignment_meta = expansion["assignment_meta"]
+        working_dates = expansion["working_dates"]
+        result["assigned"] = assigned_keys
+        result["assignment_meta"] = assignment_meta
+        result["working_dates"] = working_dates
+        result["template_exceptions"] = expansion["exceptions"]
+        summary["weekly_template"] = {
+            "cycle_weeks": template_cfg["cycle_weeks"],
+            "calendar_weeks": len(meta.get("teaching_calendar", [])),
+            "template_sessions": len(result["template_assigned"]),
+            "expanded_sessions": len(assigned_keys),
+            "exception_days": len(expansion["exceptions"]),
+            "shortfalls": len(expansion["shortfalls"]),
         }
-        out = Path(output_dir) / "diagnostics.json"
-        out.parent.mkdir(parents=True, exist_ok=True)
-        with open(out, "w") as f:
-            json.dump(diagnostics, f, indent=2)
-        logger.error("Solver infeasible/unknown. Diagnostics written to %s", out)
+        exc_out = Path(output_dir) / "template_exceptions.json"
+        exc_out.parent.mkdir(parents=True, exist_ok=True)
+        with open(exc_out, "w") as f:
+            json.dump({"exceptions": expansion["exceptions"], "shortfalls": expansion["shortfalls"]}, f, indent=2)
+        logger.info("Template exceptions written to %s", exc_out)
+
+    days_per_week = meta.get("days", [])
+    if isinstance(days_per_week, list):
+        days_per_week = len(days_per_week)
+    section_faculty_map = meta.get("section_faculty_map", {})
+    section_classroom_map = meta.get("section_classroom_map", {})
+
+    # independent safety net: re-check exactly the sessions that are written
+    periods_per_day = meta.get("periods_per_day", 8)
+    calendar = meta.get("teaching_calendar") or []
+    verification = conflicts.verify_timetable(
+        assigned_keys, assignment_meta, section_classroom_map, days_per_week, periods_per_day,
+        available=calendar_availability(calendar, days_per_week, periods_per_day) if calendar else None,
+        lab_room_capacity=meta.get("lab_room_capacity", 2),
+    )
+    result["verification"] = verification
+    summary["verification"] = {k: v for k, v in verification.items() if k != "examples"}
+    if not verification["ok"]:
+        summary["verification"]["examples"] = verification["examples"]
+
+    out = Path(output_dir) / "summary.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(summary, f, indent=2)
+    logger.info("Summary written to %s", out)
+
+    # Now expand & write detailed outputs
+    # a solver mask still lines up with the model's key order unless the template was expanded
+    mask = result.get("assigned_mask") if not template_cfg and "assign_keys" in meta else None
+    outputs.expand_and_write_outputs(
+        meta["assign_keys"] if mask is not None else assigned_keys,
+        assignment_meta,
+        section_faculty_map,
+        section_classroom_map,
+        working_dates,
+        days_per_week,
+        str(Path(output_dir) / "timetable"),
+        assigned_mask=mask,
+        candidates=meta.get("candidates") if mask is not None else None,
+        registry=meta.get("registry"),
+    )
 
     return result
+
+
+# fields write_diagnostics fills itself; everything else in diagnostics.json is a caller's extra
+DIAGNOSTICS_FIELDS = ("status", "backend", "summary", "note", "conflicts")
+
+
+def diagnose_infeasibility(normalized: dict,
+                           inputs: dict,
+                           output_dir: str = "output",
+                           time_limit: int = 60,
+                           num_workers: int = 8,
+                           level: str = "entity",
+                           meta: dict = None,
+                           **build_kwargs) -> dict:
+    """
+    Extract a conflicting set of constraints (diagnostics.find_conflicts) and add it to
+    diagnostics.json. The extras of the diagnostics the infeasible run already wrote
+    (telemetry, portfolio, ...) are kept; `meta` is that run's model meta. Returns the
+    conflict report.
+    """
+    logger.info("Extracting infeasibility core (%s level, limit=%ds)...", level, time_limit)
+    report = find_conflicts(normalized, inputs, level=level, time_limit=time_limit, num_workers=num_workers,
+                            **build_kwargs)
+    previous = {}
+    path = Path(output_dir) / "diagnostics.json"
+    if path.exists():
+        with open(path) as f:
+            previous = json.load(f)
+    extra = {k: v for k, v in previous.items() if k not in DIAGNOSTICS_FIELDS}
+    if meta is None and "backend" in previous:
+        meta = {"backend": previous["backend"]}
+    write_diagnostics(report["status"], meta or {}, output_dir, extra=extra or None, conflicts=report)
+    return report
+
+
+def write_diagnostics(status_name: str, meta: dict, output_dir: str = "output", extra: dict = None,
+                      conflicts: dict = None) -> None:
+    """
+    Write diagnostics.json. With a diagnostics.find_conflicts report the summary names the
+    conflicting faculty / sections / rooms / elective groups per constraint family;
+    otherwise it only says which families the model contains.
+    """
+    # the interval backend encodes these families without occupancy booleans
+    # (index arrays have no truth value; decompose merges these into plain flags)
+    def present(name: str) -> bool:
+        value = meta.get(name)
+        return len(value) > 0 if hasattr(value, "__len__") else bool(value)
+
+    intervals = present("assign_intervals")
+    diagnostics = {
+        "status": status_name,
+        "backend": meta.get("backend", "boolean"),
+        "summary": {
+            "faculty_constraints": "present" if present("occupancy_faculty") or intervals else "not_present",
+            "section_constraints": "present" if present("occupancy_section") or intervals else "not_present",
+            "classroom_constraints": "present" if present("occupancy_room") or intervals else "not_present",
+            "elective_constraints": "present" if present("elective_masters") else "not_present",
+        },
+        "note": "Check subject coverage, lab constraints, or relax soft constraints.",
+    }
+    if conflicts is not None:
+        named = conflicts["culprits"]
+        diagnostics["summary"] = {
+            "faculty_constraints": named["faculty"],
+            "section_constraints": named["sections"],
+            "classroom_constraints": named["rooms"],
+            "elective_constraints": named["elective_groups"],
+            "subjects": named["subjects"],
+            "families": sorted({c["family"] for c in conflicts["core"]}),
+        }
+        diagnostics["conflicts"] = conflicts
+        if conflicts["core"]:
+            diagnostics["note"] = ("These constraints cannot all hold together"
+                                   + (" (minimal set)" if conflicts["minimal"] else "")
+                                   + "; relax any one of them.")
+    diagnostics.update(extra or {})
+    out = Path(output_dir) / "diagnostics.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(diagnostics, f, indent=2)
+    logger.error("Solver infeasible/unknown. Diagnostics written to %s", out)
@@ -3,24 +3,54 @@
 solver.py - Full timetable solver with diagnostics and corrected elective handling.
 
 Key features:
-- assign_vars keyed by tuple: (section_id, subj_id, week, day, start_period)
-- assign_var_covers keyed by same tuple -> list of covered (sid, week, day, period) slots
-- assignment_meta keyed by tuple -> (sid, subj_id, faculty_id, length)
-- sec_subj_vars[(sid, subj_id)] -> list of (w, d, p) start candidates
-- Elective groups: virtual copies driven by a single master var per subject option per slot;
-  aggregated subject totals applied once per elective subject option.
+- candidate starts live in a columnar CandidateStore (candidates.py): one row per start
+  (section, subject, week, day, start period) with integer faculty/room/length/var columns
+- assign_vars / assign_var_covers / assignment_meta / sec_subj_vars / slot_index are
+  read-only views over that store, keyed as before:
+  - assign_vars keyed by tuple: (section_id, subj_id, week, day, start_period)
+  - assign_var_covers keyed by same tuple -> list of covered (sid, week, day, period) slots
+  - assignment_meta keyed by tuple -> (sid, subj_id, faculty_id, length)
+  - sec_subj_vars[(sid, subj_id)] -> list of (w, d, p) start candidates
+  - slot_index: covered slot -> start-keys, grouped by section / faculty / room (+ global lab slots)
+- assign_keys / assign_indices: stable key order and the matching proto variable indices,
+  so solution_mask can read every start value in one bulk gather
+- calendar-aware: with precompute's teaching calendar, weeks are calendar weeks and
+  candidate starts / occupancy booleans / masters exist only on teachable slots
+- every constraint family reads covering starts from the store's per-slot CSR index
+- occupancy booleans / elective masters / intervals are kept as NumPy arrays of proto indices
+- variables and constraints are emitted in bulk as CpModelProto text-format batches from
+  those index arrays (ModelBuilder bulk methods), not via cp_model expression objects
+- Elective groups: one master var per subject option per candidate start; the virtual
+  copies' start rows alias the master (same proto index), so there are no per-copy vars or
+  equality links; aggregated subject totals applied once per elective subject option.
+- Slots booked outside the model (normalized["occupied"]) are pre-screened away with
+  conflicts.py occupancy arrays before any start variable is created.
 - Diagnostics run before hard constraints to detect obvious infeasibilities.
+- Optional diagnostics mode: hard constraint families (or single entities) enforced under
+  guard literals that are solved as assumptions, for infeasibility cores.
 - Soft constraints collected into penalties and minimized.
+- Two model backends for the no-double-booking / lab-capacity families:
+  "boolean" (per-slot sums linked to occupancy booleans) and "interval"
+  (optional interval per start + AddNoOverlap / AddCumulative, no occupancy booleans).
+- Optional weekly-template mode: solve a short repeating cycle of weeks against
+  per-cycle subject quotas; template.expand_weekly_template lays it over the calendar.
+- Optional symmetry breaking (symmetry.py): lex constraints between interchangeable
+  sections and between weeks with identical teachable slots.
 - Faculty daily min/max constraints are included but commented out (per request).
 """
 
 import logging
 import math
 from collections import defaultdict
-from typing import Dict, List, Any, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 from ortools.sat.python import cp_model
 
+from src.timetable import conflicts, symmetry
+from src.timetable.candidates import CandidateStore, meta_views
+from src.timetable.registry import build_registry
+
 # -------------------------
 # Logging setup
 # -------------------------
@@ -35,11 +65,38 @@ if not logger.handlers:
 # -------------------------
 # Small ModelBuilder wrapper
 # -------------------------
+def _field(name: str, values) -> str:
+    """Repeated scalar field in CpModelProto text format."""
+    sep = f" {name}: "
+    text = sep.join(map(str, values))
+    return f"{name}: {text} " if text else ""
+
+
+def _quote(text: str) -> str:
+    return '"' + str(text).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
 class ModelBuilder:
-    def __init__(self):
+    """
+    Wrapper over CpModel with two ways in:
+    - NewBoolVar / NewIntVar / add: the cp_model expression API, one Python object each;
+    - bulk methods (new_bool_vars, add_linear, add_at_most_one, add_exactly_one, ...):
+      take proto variable indices and write CpModelProto text-format fragments that are
+      merged into the proto in batches, with no Python expression objects in between.
+      Literal negation follows the proto convention (not x == -x - 1).
+    Bulk constraints are buffered; flush() must run before the model is solved, exported
+    or indexed by constraint (build_cp_model flushes before returning).
+    names=False leaves bulk-created variables unnamed.
+    """
+
+    FLUSH_EVERY = 50000
+
+    def __init__(self, names: bool = True):
         self.model = cp_model.CpModel()
+        self.names = names
         self.var_count = 0
         self.constraint_count = 0
+        self._pending: List[str] = []
 
     def NewBoolVar(self, name: str):
         v = self.model.NewBoolVar(name)
@@ -53,11 +110,243 @@ class ModelBuilder:
         logger.debug("NewIntVar: %s [%d,%d]", name, lo, hi)
         return v
 
+    def NewOptionalFixedSizeIntervalVar(self, start: int, size: int, is_present, name: str):
+        iv = self.model.NewOptionalFixedSizeIntervalVar(start, size, is_present, name)
+        self.var_count += 1
+        logger.debug("NewOptionalFixedSizeIntervalVar: %s [%d,+%d]", name, start, size)
+        return iv
+
     def add(self, expr):
         """Add a hard constraint (no OnlyEnforceIf chaining via this helper)."""
         self.model.Add(expr)
         self.constraint_count += 1
 
+    # ---- bulk proto emission ----
+    def new_bool_vars(self, count: int, names: Callable[[], Iterable[str]] = None) -> np.ndarray:
+        """
+        Append `count` Boolean variables; returns their proto indices. `names` is only
+        called (and must yield `count` names) when the builder keeps names.
+        """
+        proto = self.model.Proto()
+        base = len(proto.variables)
+        if self.names and names is not None:
+            text = "".join(f"variables {{ name: {_quote(n)} domain: 0 domain: 1 }}\n" for n in names())
+        else:
+            text = "variables { domain: 0 domain: 1 }\n" * count
+        proto.merge_text_format(text)
+        if len(proto.variables) != base + count:
+            raise ValueError(f"new_bool_vars: expected {count} variables, got {len(proto.variables) - base}")
+        self.var_count += count
+        logger.debug("new_bool_vars: %d vars from index %d", count, base)
+        return np.arange(base, base + count, dtype=np.int32)
+
+    def new_int_var(self, lo: int, hi: int, name: str = None) -> int:
+        proto = self.model.Proto()
+        index = len(proto.variables)
+        label = f"name: {_quote(name)} " if self.names and name else ""
+        proto.merge_text_format(f"variables {{ {label}domain: {lo} domain: {hi} }}")
+        self.var_count += 1
+        return index
+
+    def _emit(self, text: str) -> None:
+        self._pending.append(text)
+        self.constraint_count += 1
+        if len(self._pending) >= self.FLUSH_EVERY:
+            self.flush()
+
+    def add_linear(self, variables, coeffs, lo: int = cp_model.INT_MIN, hi: int = cp_model.INT_MAX,
+                   enforce=()) -> None:
+        """lo <= sum(coeffs[i] * variables[i]) <= hi, only enforced when every `enforce` literal holds."""
+        self._emit(f"constraints {{ {_field('enforcement_literal', enforce)}linear {{ {_field('vars', variables)}"
+                   f"{_field('coeffs', coeffs)}domain: {lo} domain: {hi} }} }}\n")
+
+    def add_at_most_one(self, literals, enforce=()) -> None:
+        self._emit(f"constraints {{ {_field('enforcement_literal', enforce)}at_most_one {{ "
+                   f"{_field('literals', literals)}}} }}\n")
+
+    def add_exactly_one(self, literals) -> None:
+        self._emit(f"constraints {{ exactly_one {{ {_field('literals', literals)}}} }}\n")
+
+    def add_optional_fixed_intervals(self, starts, sizes, presence) -> np.ndarray:
+        """Optional fixed-size intervals [start, start + size) present iff `presence`; returns their indices."""
+        self.flush()
+        proto = self.model.Proto()
+        base = len(proto.constraints)
+        proto.merge_text_format("".join(
+            f"constraints {{ enforcement_literal: {lit} interval {{ start {{ offset: {st} }} "
+            f"end {{ offset: {st + sz} }} size {{ offset: {sz} }} }} }}\n"
+            for st, sz, lit in zip(starts, sizes, presence)))
+        count = len(proto.constraints) - base
+        self.var_count += count
+        return np.arange(base, base + count, dtype=np.int32)
+
+    def add_no_overlap(self, intervals) -> None:
+        self._emit(f"constraints {{ no_overlap {{ {_field('intervals', intervals)}}} }}\n")
+
+    def add_cumulative(self, intervals, demands, capacity: int) -> None:
+        demand_text = "".join(f"demands {{ offset: {d} }} " for d in demands)
+        self._emit(f"constraints {{ cumulative {{ capacity {{ offset: {capacity} }} "
+                   f"{_field('intervals', intervals)}{demand_text}}} }}\n")
+
+    def minimize(self, variables, coeffs=None) -> None:
+        """Objective: minimize sum(coeffs[i] * variables[i]) (all coefficients 1 by default)."""
+        variables = list(variables)
+        coeffs = [1] * len(variables) if coeffs is None else list(coeffs)
+        proto = self.model.Proto()
+        proto.clear_objective()
+        proto.merge_text_format(f"objective {{ {_field('vars', variables)}{_field('coeffs', coeffs)}"
+                                f"scaling_factor: 1 }}")
+
+    def flush(self) -> None:
+        """Merge buffered bulk constraints into the proto."""
+        if self._pending:
+            self.model.Proto().merge_text_format("".join(self._pending))
+            logger.debug("flush: merged %d constraints", len(self._pending))
+            self._pending = []
+
+
+# -------------------------
+# Interval backend
+# -------------------------
+MODEL_BACKENDS = ("boolean", "interval")
+
+# build_cp_model(diagnostics=...): one guard literal per constraint family, or per family and entity
+DIAGNOSTIC_LEVELS = ("family", "entity")
+
+
+def add_interval_resource_constraints(
+    builder: ModelBuilder,
+    store: CandidateStore,
+    lab_room_capacity: int,
+) -> np.ndarray:
+    """
+    Compact formulation of the section / faculty / room no-double-booking and global
+    lab-capacity families: each start gets an optional fixed-size interval on a single
+    timeline (t = (w * days_per_week + d) * periods_per_day + p) that is present iff
+    the start is selected. Blocks never cross a day boundary, so one timeline is exact.
+
+    Returns the interval constraint index per store row.
+    """
+    starts = (store.week * store.days_per_week + store.day) * store.periods_per_day + store.period
+    intervals = builder.add_optional_fixed_intervals(starts.tolist(), store.length.tolist(), store.var.tolist())
+
+    groups = {}
+    for family in ("section", "faculty", "room"):
+        entity = getattr(store, family)
+        rows = np.flatnonzero(entity >= 0)
+        # rows of one entity are contiguous after a stable sort by entity id
+        order = rows[np.argsort(entity[rows], kind="stable")]
+        bounds = np.flatnonzero(np.diff(entity[order])) + 1
+        groups[family] = [g for g in np.split(intervals[order], bounds) if len(g)]
+        for ivs in groups[family]:
+            if len(ivs) > 1:
+                builder.add_no_overlap(ivs.tolist())
+    labs = intervals[store.length == 2]
+    if len(labs):
+        builder.add_cumulative(labs.tolist(), [1] * len(labs), lab_room_capacity)
+
+    logger.info("Interval backend: %d intervals, no-overlap groups sections=%d faculty=%d rooms=%d, lab intervals=%d",
+                len(intervals), len(groups["section"]), len(groups["faculty"]), len(groups["room"]), len(labs))
+    return intervals
+
+
+# -------------------------
+# Weekly-template quotas
+# -------------------------
+def template_quota(total_periods: int, working_weeks: float, cycle_weeks: int, length: int) -> Tuple[int, int]:
+    """
+    Per-cycle (lo, hi) period quota for a subject when one cycle of `cycle_weeks`
+    weeks is repeated over `working_weeks` weeks.
+
+    hi rounds the exact share up to a whole number of blocks (so the repeated
+    template can cover the semester total); lo rounds it down but keeps at least
+    one block for any subject that is taught at all.
+    """
+    if total_periods <= 0:
+        return 0, 0
+    exact = total_periods * cycle_weeks / max(working_weeks, float(cycle_weeks))
+    hi = int(math.ceil(exact / length)) * length
+    lo = max(length, int(math.floor(exact / length)) * length)
+    return min(lo, hi), hi
+
+
+# -------------------------
+# Teaching calendar
+# -------------------------
+def calendar_availability(teaching_calendar: List[List[Dict[str, Any]]], days_per_week: int,
+                          periods_per_day: int) -> np.ndarray:
+    """
+    (calendar week, day, period) bool array of teachable slots from precompute's teaching
+    calendar. Days missing from a calendar week are unavailable; a day without a
+    "periods" list is fully available when teachable.
+    """
+    available = np.zeros((len(teaching_calendar), days_per_week, periods_per_day), dtype=bool)
+    for w, week in enumerate(teaching_calendar):
+        for d, day in enumerate(week[:days_per_week]):
+            if not day.get("teachable"):
+                continue
+            periods = day.get("periods")
+            if periods is None:
+                available[w, d] = True
+            else:
+                available[w, d, [p for p in periods if 0 <= p < periods_per_day]] = True
+    return available
+
+
+def planning_calendar(normalized: Dict[str, Any], days_per_week: int = 6,
+                      default_weeks: int = 19) -> List[List[Dict[str, Any]]]:
+    """The teaching calendar, or int(working_weeks) fully teachable undated weeks without one."""
+    calendar = normalized.get("teaching_calendar") or []
+    if calendar:
+        return calendar
+    weeks = int(normalized.get("working_weeks", default_weeks))
+    return [[{"date": None, "teachable": True, "reason": None} for _ in range(days_per_week)] for _ in range(weeks)]
+
+
+def start_availability(available: np.ndarray, length: int) -> np.ndarray:
+    """Slots where a block of `length` periods can start: every covered period is available."""
+    periods_per_day = available.shape[2]
+    starts = np.zeros_like(available)
+    if length <= periods_per_day:
+        starts[:, :, :periods_per_day - length + 1] = np.logical_and.reduce(
+            [available[:, :, i:periods_per_day - length + 1 + i] for i in range(length)])
+    return starts
+
+
+# -------------------------
+# Bulk solution extraction
+# -------------------------
+def solution_mask(solution, meta: Dict[str, Any]) -> np.ndarray:
+    """
+    Boolean mask aligned with meta["assign_keys"] from a response solution vector
+    (CpSolver.ResponseProto().solution or a callback's Response().solution), read in
+    one conversion instead of one Value() call per start variable.
+    """
+    values = np.array(list(solution), dtype=np.int64)
+    return values[meta["assign_indices"]] > 0
+
+
+def masked_keys(meta: Dict[str, Any], mask: np.ndarray) -> List[Tuple]:
+    keys = meta["assign_keys"]
+    return [keys[i] for i in np.flatnonzero(mask)]
+
+
+OCCUPANCY_FAMILIES = ("occupancy_section", "occupancy_faculty", "occupancy_room")
+
+
+def constraint_flags(meta: Dict[str, Any]) -> Dict[str, bool]:
+    """
+    Plain flags telling which occupancy families a build_cp_model meta constrains (the
+    interval backend covers all of them without occupancy booleans), for merged metas
+    that carry no index arrays.
+    """
+    def present(name: str) -> bool:
+        value = meta.get(name)
+        return value is not None and len(value) > 0
+
+    intervals = present("assign_intervals")
+    return {name: intervals or present(name) for name in OCCUPANCY_FAMILIES}
+
 
 # -------------------------
 # Main builder function
@@ -69,21 +358,78 @@ def build_cp_model(
     days_per_week: int = 6,
     default_weeks: int = 19,
     lab_room_capacity: int = 2,
+    weekly_template: bool = False,
+    cycle_weeks: int = 1,
+    backend: str = "boolean",
+    var_names: bool = True,
+    symmetry_breaking: bool = False,
+    diagnostics: str = None,
 ) -> Tuple[cp_model.CpModel, Dict[str, Any]]:
     """
     Build the CP-SAT model from normalized inputs.
 
+    Variables and constraints are written in bulk from proto index arrays (see
+    ModelBuilder); var_names=False skips variable names, which only debugging and
+    exported models read.
+
+    backend selects the no-double-booking formulation: "boolean" (default) or
+    "interval" (see add_interval_resource_constraints).
+
+    With a teaching calendar in `normalized` (precompute.build_teaching_calendar) the
+    model spans its calendar weeks and candidate starts exist only on teachable
+    periods, so holidays, exam days and days outside the semester get no variables.
+    Without one, int(working_weeks) fully available weeks are modelled.
+
+    With weekly_template=True only `cycle_weeks` weeks are modelled and each subject
+    total becomes a per-cycle quota range (see template_quota); under-filling the
+    upper quota is penalised in the objective.
+
+    symmetry_breaking=True adds lex-leader constraints between interchangeable sections
+    and identical weeks (symmetry.add_symmetry_breaking); the optimum is unchanged.
+
+    diagnostics="family" / "entity" (boolean backend only) enforces every hard constraint
+    only under a guard literal - one per constraint family, or per family and section /
+    faculty / room / subject pair / elective option - and makes the guards the model's
+    assumptions, so an INFEASIBLE solve names its conflicting guards through
+    SufficientAssumptionsForInfeasibility (see diagnostics.find_conflicts).
+
     Returns:
         model, meta
     where meta contains:
+      - candidates: the CandidateStore behind the read-only views below
       - assign_vars: mapping (sid,subj,w,d,p) -> BoolVar
       - assign_var_covers: mapping key -> list of covered slots (sid,w,d,period)
       - assignment_meta: mapping key -> (sid,subj,faculty,length)
       - sec_subj_vars: mapping (sid,subj) -> list of (w,d,p)
+      - slot_index: family -> covered slot -> start-keys
+      - registry: the IdRegistry whose ids the store and occupancy arrays use
+      - occupancy_section / _faculty / _room: (registry id, w, d, p) arrays of proto indices
+        (-1 for entities not modelled and non-teachable slots; empty for the interval backend)
+      - elective_masters: (semester, group, subj) -> (w, d, p) array of proto indices (-1 where
+        the option has no candidate start); the option's virtual copies use these as start vars
+      - working_dates: ISO date of day index w * days_per_week + d (calendar runs only)
+      - subject_quotas: subj -> (lo, hi) periods over the modelled weeks
+      - pair_quotas: (sid, subj) -> (lo, hi) actually enforced (normalized["pair_quotas"],
+        (sid, subj) -> periods or (lo, hi), overrides single pairs, e.g. one week of a
+        two-level solve; a range penalises shortfall below hi like the template quotas)
+      - weekly_template: template settings (None when solving the full semester)
+      - symmetry: symmetry-breaking report (None when symmetry_breaking is off)
+      - prescreen: busy entities per family, candidate starts dropped for normalized["occupied"]
+        and bookings per family that fell outside the calendar (dropped_bookings)
+        (None without bookings or in weekly-template mode)
+      - diagnostic_guards: (family, entity) -> guard literal (empty unless diagnostics is set)
       - ... other helper maps
     """
 
-    builder = ModelBuilder()
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend '{backend}', expected one of {MODEL_BACKENDS}")
+    if diagnostics is not None and diagnostics not in DIAGNOSTIC_LEVELS:
+        raise ValueError(f"Unknown diagnostics level '{diagnostics}', expected one of {DIAGNOSTIC_LEVELS}")
+    if diagnostics and backend != "boolean":
+        # NoOverlap / Cumulative take no enforcement literal
+        raise ValueError("diagnostics guards need the boolean backend")
+
+    builder = ModelBuilder(names=var_names)
 
     # -------------------------
     # Read normalized / inputs
@@ -96,9 +442,33 @@ def build_cp_model(
     # quick subject master lookup
     subjects_lookup = {s.id: s for s in subjects_master}
 
-    weeks = int(normalized.get("working_weeks", default_weeks))
+    working_weeks = normalized.get("working_weeks", default_weeks)
+    teaching_calendar = normalized.get("teaching_calendar") or []
+    working_dates: List[str] = []
+    if weekly_template:
+        weeks = max(1, int(cycle_weeks))
+        logger.info("Weekly-template mode: solving a %d-week cycle instead of %d weeks", weeks, int(working_weeks))
+        available = np.ones((weeks, days_per_week, periods_per_day), dtype=bool)
+    elif teaching_calendar:
+        # model the calendar weeks as they are: candidates only on teachable (w, d, p) slots,
+        # and (w, d) dates straight from the calendar
+        available = calendar_availability(teaching_calendar, days_per_week, periods_per_day)
+        weeks = len(teaching_calendar)
+        working_dates = [day["date"] for week in teaching_calendar for day in week[:days_per_week]]
+        if any(len(week) != days_per_week for week in teaching_calendar):
+            working_dates = [week[d]["date"] if d < len(week) else None
+                             for week in teaching_calendar for d in range(days_per_week)]
+        logger.info("Teaching calendar: %d weeks, %d teachable days, %d of %d slots available",
+                    weeks, int(available.any(axis=2).sum()), int(available.sum()), available.size)
+    else:
+        weeks = int(working_weeks)
+        available = np.ones((weeks, days_per_week, periods_per_day), dtype=bool)
     days = list(range(days_per_week))
     periods = list(range(periods_per_day))
+    # flat (w, d, p) offsets of available slots, and of valid block starts per block length
+    available_offsets = np.flatnonzero(available.ravel())
+    start_slots = {length: [tuple(int(x) for x in s) for s in np.argwhere(start_availability(available, length))]
+                   for length in (1, 2)}
 
     logger.info("Starting model build: weeks=%d days/week=%d periods/day=%d", weeks, days_per_week, periods_per_day)
     logger.info("Sections=%d | Subject masters=%d", len(normalized_sections), len(subjects_master))
@@ -106,15 +476,15 @@ def build_cp_model(
     # -------------------------
     # Core data structures
     # -------------------------
-    assign_vars: Dict[Tuple[str, str, int, int, int], cp_model.IntVar] = {}
-    assign_var_covers: Dict[Tuple[str, str, int, int, int], List[Tuple[str, int, int, int]]] = {}
-    sec_subj_vars: Dict[Tuple[str, str], List[Tuple[int, int, int]]] = defaultdict(list)
-    assignment_meta: Dict[Tuple[str, str, int, int, int], Tuple[str, str, Any, int]] = {}
-
-    # occupancy booleans
-    occupancy_section = {}
-    occupancy_faculty = {}
-    occupancy_room = {}
+    # one row per candidate start; constraints below are emitted from proto indices
+    # (meta exposes lazily created BoolVar wrappers through the assign_vars view)
+    # subj -> (lo, hi) periods required over the modelled weeks
+    subject_quotas: Dict[str, Tuple[int, int]] = {}
+    # (sid, subj) -> (lo, hi): subject_quotas unless normalized["pair_quotas"] fixes the pair's periods
+    pair_quotas: Dict[Tuple[str, str], Tuple[int, int]] = {}
+    quota_overrides: Dict[Tuple[str, str], int] = normalized.get("pair_quotas") or {}
+    # subj -> block length (first section seen)
+    subject_length: Dict[str, int] = {}
 
     # section->(subject->faculty) map (from normalized / assigned_faculty_id)
     section_faculty_map = {
@@ -123,38 +493,88 @@ def build_cp_model(
         for subj in sec.subjects
     }
     all_faculty_ids = {fac for fac in section_faculty_map.values() if fac is not None}
+    virtual_sids = {sec.id for sec in normalized_sections if getattr(sec, "is_virtual", False)}
+
+    # integer ids from precompute's registry (a local one for hand-built inputs); the
+    # entities modelled here are a subset when decompose builds one component
+    registry = normalized.get("registry") or build_registry(normalized_sections, section_classroom_map)
+    store = CandidateStore(weeks, days_per_week, periods_per_day, registry=registry)
+    local_entities = {
+        "section": list(dict.fromkeys(registry.intern("section", sec.id) for sec in normalized_sections)),
+        "faculty": sorted(registry.intern("faculty", fac) for fac in all_faculty_ids),
+        "room": sorted({registry.intern("room", r) for r in section_classroom_map.values() if r is not None}),
+    }
 
     # -------------------------
-    # Create occupancy variables
+    # Create occupancy variables (boolean backend only; nothing reads them otherwise)
     # -------------------------
-    logger.info("Creating occupancy variables for sections/faculty/rooms...")
-    for sec in normalized_sections:
-        sid = sec.id
-        for w in range(weeks):
-            for d in days:
-                for p in periods:
-                    occupancy_section[(sid, w, d, p)] = builder.NewBoolVar(f"occ_sec_{sid}_w{w}_d{d}_p{p}")
+    # family -> (registry id, w, d, p) array of proto indices (-1: entity not modelled here)
+    occupancy: Dict[str, np.ndarray] = {}
+    grid_size = weeks * days_per_week * periods_per_day
+    for family, prefix in (("section", "occ_sec"), ("faculty", "occ_fac"), ("room", "occ_room")):
+        entities = local_entities[family] if backend == "boolean" else []
+        grid = np.full((registry.size(family) if entities else 0, weeks, days_per_week, periods_per_day), -1,
+                       dtype=np.int32)
+        for e in entities:
+            ent = registry.name(family, e)
+            # only teachable slots get an occupancy boolean
+            grid[e].reshape(-1)[available_offsets] = builder.new_bool_vars(len(available_offsets), names=lambda: (
+                f"{prefix}_{ent}_w{w}_d{d}_p{p}" for w, d, p in np.argwhere(available)))
+        occupancy[family] = grid
+    if backend == "boolean":
+        logger.info("Occupancy vars created: sections=%d faculty=%d rooms=%d",
+                    *(len(local_entities[f]) * len(available_offsets) for f in ("section", "faculty", "room")))
 
-    for fac in all_faculty_ids:
-        for w in range(weeks):
-            for d in days:
-                for p in periods:
-                    occupancy_faculty[(fac, w, d, p)] = builder.NewBoolVar(f"occ_fac_{fac}_w{w}_d{d}_p{p}")
+    # -------------------------
+    # ELECTIVE: index the virtual copies of every option
+    # -------------------------
+    # Build mapping (semester, group) -> subj_id -> [virtual_sids]
+    elective_index: Dict[Tuple, Dict[str, List[str]]] = {}
+    option_of: Dict[str, Tuple] = {}
+    for sec in normalized_sections:
+        if getattr(sec, "is_virtual", False) and getattr(sec, "elective_group", None):
+            key = (sec.semester, sec.elective_group)
+            subj_map = elective_index.setdefault(key, {})
+            for subj in sec.subjects:
+                subj_map.setdefault(subj.id, []).append(sec.id)
+            option_of[sec.id] = key
 
-    for room in set(section_classroom_map.values()):
-        for w in range(weeks):
-            for d in days:
-                for p in periods:
-                    occupancy_room[(room, w, d, p)] = builder.NewBoolVar(f"occ_room_{room}_w{w}_d{d}_p{p}")
+    # (semester, group, subj) -> (w, d, p) array of master proto indices, created with the
+    # option's first virtual copy; -1 where the option has no candidate start
+    elective_masters: Dict[Tuple, np.ndarray] = {}
 
-    logger.info("Occupancy vars created: sections=%d faculty=%d rooms=%d",
-                len(occupancy_section), len(occupancy_faculty), len(occupancy_room))
+    # -------------------------
+    # Pre-screen: slots booked outside this model (normalized["occupied"])
+    # -------------------------
+    # family -> entity -> (w, d, p) busy array; starts whose block touches a busy slot of
+    # their section / faculty / room are never created
+    busy: Dict[str, Dict[Any, np.ndarray]] = {}
+    dropped_bookings: Optional[Dict[str, int]] = None
+    if normalized.get("occupied"):
+        if weekly_template:
+            logger.warning("Ignoring normalized['occupied'] in weekly-template mode (bookings are dated)")
+        else:
+            busy, dropped_bookings = conflicts.busy_grids(normalized["occupied"], teaching_calendar, weeks,
+                                                          days_per_week, periods_per_day)
+    screened: Dict[Tuple, List[Tuple[int, int, int]]] = {}
+    pruned_starts = 0
+
+    def screened_starts(owners: Tuple, length: int) -> List[Tuple[int, int, int]]:
+        """Valid starts of a `length` block free for every (section, faculty, room) in `owners`."""
+        if (owners, length) not in screened:
+            free = available
+            for sid_, fac_, room_ in owners:
+                free = conflicts.free_slots(free, busy, sid_, fac_, room_)
+            screened[(owners, length)] = start_slots[length] if free is available else \
+                [tuple(int(x) for x in s) for s in np.argwhere(start_availability(free, length))]
+        return screened[(owners, length)]
 
     # -------------------------
     # Assignment start variables (start-of-block)
     # -------------------------
     logger.info("Creating assignment start variables (start-of-block).")
     created_vars = 0
+    aliased = 0
     labs = 0
     theory = 0
 
@@ -167,6 +587,9 @@ def build_cp_model(
             if not fac:
                 logger.warning("Section %s subject %s has no assigned_faculty_id; skipping", sid, subj_id)
                 continue
+            if store.pair_of(sid, subj_id) >= 0:
+                logger.warning("Section %s lists subject %s twice; skipping the duplicate", sid, subj_id)
+                continue
 
             # determine is_lab: prefer normalized subject flag, fallback to master
             is_lab = bool(getattr(subj, "is_lab", False))
@@ -177,27 +600,74 @@ def build_cp_model(
 
             length = 2 if is_lab else 1
             tag = "lab" if is_lab else "theory"
-
-            # only create starts where a full block fits
-            for w in range(weeks):
-                for d in days:
-                    for p in range(0, periods_per_day - (length - 1)):
-                        key = (sid, subj_id, w, d, p)
-                        v = builder.NewBoolVar(f"assign_{tag}_{sid}_{subj_id}_w{w}_d{d}_p{p}")
-                        assign_vars[key] = v
-                        covers = [(sid, w, d, pp) for pp in range(p, p + length)]
-                        assign_var_covers[key] = covers
-                        sec_subj_vars[(sid, subj_id)].append((w, d, p))
-                        assignment_meta[key] = (sid, subj_id, fac, length)
-                        created_vars += 1
-                        if length == 2:
-                            labs += 1
-                        else:
-                            theory += 1
-
-    logger.info("Created %d start-vars (lab starts=%d theory starts=%d)", created_vars, labs, theory)
+            subject_length.setdefault(subj_id, length)
+
+            total = int(subject_periods_map.get(subj_id, 0))
+            if weekly_template:
+                subject_quotas[subj_id] = template_quota(total, working_weeks, weeks, length)
+            else:
+                subject_quotas[subj_id] = (total, total)
+            pair_quotas[(sid, subj_id)] = subject_quotas[subj_id]
+            if (sid, subj_id) in quota_overrides:
+                override = quota_overrides[(sid, subj_id)]
+                lo, hi = override if isinstance(override, (tuple, list)) else (override, override)
+                pair_quotas[(sid, subj_id)] = (int(lo), int(hi))
+
+            # only create starts where a full block fits on teachable periods
+            starts = start_slots[length]
+            if busy:
+                # an elective option starts together in all of its copies: every copy must be free
+                copies = elective_index[option_of[sid]][subj_id] if sid in option_of else [sid]
+                screened_list = screened_starts(tuple((c, section_faculty_map.get((c, subj_id)),
+                                                       section_classroom_map.get(c)) for c in copies), length)
+                pruned_starts += len(starts) - len(screened_list)
+                starts = screened_list
+            if not starts:
+                continue
+            if sid in option_of:
+                # virtual copies of an elective option all start where the option's master says:
+                # their starts are the master variables themselves
+                semester, group = option_of[sid]
+                masters = elective_masters.get((semester, group, subj_id))
+                if masters is None:
+                    masters = np.full((weeks, days_per_week, periods_per_day), -1, dtype=np.int32)
+                    masters[tuple(np.array(starts).T)] = builder.new_bool_vars(len(starts), names=lambda: (
+                        f"elective_master_{semester}_{group}_{subj_id}_w{w}_d{d}_p{p}" for (w, d, p) in starts))
+                    elective_masters[(semester, group, subj_id)] = masters
+                    created_vars += len(starts)
+                new_vars = masters[tuple(np.array(starts).T)]
+                if (new_vars < 0).any():
+                    logger.warning("Elective %s/%s/%s copies disagree on block length; skipping %s",
+                                   semester, group, subj_id, sid)
+                    continue
+                aliased += len(starts)
+            else:
+                new_vars = builder.new_bool_vars(len(starts), names=lambda: (
+                    f"assign_{tag}_{sid}_{subj_id}_w{w}_d{d}_p{p}" for (w, d, p) in starts))
+                created_vars += len(starts)
+            store.add_pair(sid, subj_id, fac, section_classroom_map.get(sid), length, starts, new_vars.tolist())
+            if length == 2:
+                labs += len(starts)
+            else:
+                theory += len(starts)
+
+    store.freeze()
+    tables = store.tables
+    lengths = store.length.tolist()
+    # proto index of each row's start var
+    start_vars = store.var.tolist()
+    logger.info("Created %d start-vars (lab starts=%d theory starts=%d, %d elective starts aliased to masters)",
+                created_vars, labs, theory, aliased)
+    if busy:
+        logger.info("Pre-screen: %d candidate starts dropped on slots booked for %d entities", pruned_starts,
+                    sum(len(entities) for entities in busy.values()))
     logger.debug("Vars counted by builder: %d", builder.var_count)
 
+    def pairs():
+        """(sid, subj_id, rows) per candidate pair, in creation order."""
+        for (sc, jc), (lo, hi) in zip(store.pairs, store.pair_rows):
+            yield tables["section"][sc], tables["subject"][jc], range(lo, hi)
+
     # -------------------------
     # Diagnostics before adding constraints (spot obvious infeasibilities)
     # -------------------------
@@ -206,15 +676,11 @@ def build_cp_model(
 
         # 1) Subject capacity: required periods vs candidate capacity (sum of lengths)
         subject_issues = []
-        for (sid, subj_id), starts in sec_subj_vars.items():
-            required = int(subject_periods_map.get(subj_id, 0))
-            cap = 0
-            for (w, d, p) in starts:
-                key = (sid, subj_id, w, d, p)
-                length = assignment_meta.get(key, (None, None, None, 1))[3]
-                cap += length
+        for sid, subj_id, rows in pairs():
+            required = pair_quotas.get((sid, subj_id), (0, 0))[0]
+            cap = len(rows) * lengths[rows.start]
             if required > cap:
-                subject_issues.append((sid, subj_id, required, cap, len(starts)))
+                subject_issues.append((sid, subj_id, required, cap, len(rows)))
         if subject_issues:
             logger.error("Subject capacity problems detected: %d entries", len(subject_issues))
             for sid, subj_id, req, cap, cand in subject_issues[:20]:
@@ -224,16 +690,12 @@ def build_cp_model(
 
         # 2) Lab capacity: sessions required vs candidate start positions
         lab_issues = []
-        for (sid, subj_id), starts in sec_subj_vars.items():
-            if not starts:
-                continue
-            sample = starts[0]
-            length = assignment_meta.get((sid, subj_id, sample[0], sample[1], sample[2]), (None, None, None, 1))[3]
-            if length != 2:
+        for sid, subj_id, rows in pairs():
+            if lengths[rows.start] != 2:
                 continue
-            sem_total = int(subject_periods_map.get(subj_id, 0))
+            sem_total = pair_quotas.get((sid, subj_id), (0, 0))[0]
             sessions_req = math.ceil(sem_total / 2.0) if sem_total > 0 else 0
-            candidates = len(starts)
+            candidates = len(rows)
             if sessions_req > candidates:
                 lab_issues.append((sid, subj_id, sem_total, sessions_req, candidates))
         if lab_issues:
@@ -246,22 +708,15 @@ def build_cp_model(
 
         # 3) Faculty total demand vs available capacity (simple sum)
         req_per_fac = defaultdict(int)
-        for (sid, subj_id), starts in sec_subj_vars.items():
-            if not starts:
-                continue
-            key0 = (sid, subj_id, starts[0][0], starts[0][1], starts[0][2])
-            fac = assignment_meta.get(key0, (None, None, None, 1))[2]
-            req_per_fac[fac] += int(subject_periods_map.get(subj_id, 0))
-        cap_per_fac = defaultdict(int)
-        for k, meta_k in assignment_meta.items():
-            _, _, fac, length = meta_k
-            cap_per_fac[fac] += length
+        for sid, subj_id, rows in pairs():
+            req_per_fac[int(store.faculty[rows.start])] += pair_quotas.get((sid, subj_id), (0, 0))[0]
+        cap_per_fac = np.bincount(store.faculty[store.faculty >= 0], weights=store.length[store.faculty >= 0],
+                                  minlength=len(tables["faculty"]))
         faculty_issues = []
-        for fac in req_per_fac:
-            req = req_per_fac.get(fac, 0)
-            cap = cap_per_fac.get(fac, 0)
+        for f, req in req_per_fac.items():
+            cap = int(cap_per_fac[f]) if f >= 0 else 0
             if req > cap:
-                faculty_issues.append((fac, req, cap))
+                faculty_issues.append((tables["faculty"][f] if f >= 0 else None, req, cap))
         if faculty_issues:
             logger.error("Faculty overload issues detected: %d entries", len(faculty_issues))
             for fac, req, cap in faculty_issues[:20]:
@@ -278,224 +733,196 @@ def build_cp_model(
         logger.info("Diagnostics: no immediate infeasibility detected from quick checks.")
 
     # -------------------------
-    # ELECTIVE: Build aggregated masters and skip per-virtual totals
+    # Diagnostics: guard literals enabling the hard constraint families
     # -------------------------
-    # Build mapping (semester, group) -> subj_id -> [virtual_sids]
-    elective_index: Dict[Tuple, Dict[str, List[str]]] = {}
-    for sec in normalized_sections:
-        if getattr(sec, "is_virtual", False) and getattr(sec, "elective_group", None):
-            key = (sec.semester, sec.elective_group)
-            subj_map = elective_index.setdefault(key, {})
-            for subj in sec.subjects:
-                subj_map.setdefault(subj.id, []).append(sec.id)
+    guard_literals: Dict[Tuple[str, Any], int] = {}
+
+    def guard(family: str, entity: Any = None) -> List[int]:
+        """Enforcement literals for one hard constraint (none unless diagnostics is set)."""
+        if not diagnostics:
+            return []
+        key = (family, entity if diagnostics == "entity" else None)
+        if key not in guard_literals:
+            label = f"guard_{family}" if key[1] is None else f"guard_{family}_{key[1]}"
+            guard_literals[key] = int(builder.new_bool_vars(1, names=lambda: [label])[0])
+        return [guard_literals[key]]
 
-    # create masters: (semester,group,subj) -> { (w,d,p) -> master_var }
-    elective_masters: Dict[Tuple, Dict[Tuple[int, int, int], cp_model.IntVar]] = {}
+    # -------------------------
+    # ELECTIVE: masters block their semester and exclude the group's other options
+    # -------------------------
+    # start slot offset ((w * days + d) * periods + p) of every row: indexes the master grids
+    offsets = store._slot_offset(store.week, store.day, store.period)
+
+    # real-section rows per semester: what an active master blocks at the same start slot
+    real_rows: Dict[Any, np.ndarray] = {}
+    if elective_index:
+        semester_of = {sec.id: sec.semester for sec in normalized_sections if sec.id not in virtual_sids}
+        by_semester: Dict[Any, List[int]] = defaultdict(list)
+        for sid, _, rows in pairs():
+            if sid in semester_of:
+                by_semester[semester_of[sid]].extend(rows)
+        real_rows = {semester: np.array(rows, dtype=np.int64) for semester, rows in by_semester.items()}
 
     for (semester, group), subj_map in elective_index.items():
         logger.info("Elective group: semester=%s group=%s options=%d", semester, group, len(subj_map))
-        for subj_id, virtual_sids in subj_map.items():
-            masters_for_subj: Dict[Tuple[int, int, int], cp_model.IntVar] = {}
-            for w in range(weeks):
-                for d in days:
-                    for p in periods:
-                        mvar = builder.NewBoolVar(f"elective_master_{semester}_{group}_{subj_id}_w{w}_d{d}_p{p}")
-                        masters_for_subj[(w, d, p)] = mvar
-
-                        # Link each virtual copy's assign_var to this master (if the candidate exists)
-                        for sid in virtual_sids:
-                            k = (sid, subj_id, w, d, p)
-                            if k in assign_vars:
-                                # assign_vars[k] == mvar
-                                # Use builder.model.Add to avoid chaining issues
-                                builder.model.Add(assign_vars[k] == mvar)
-                                builder.constraint_count += 1
-
-                        # When master is active, block non-virtual sections in same semester at this slot
-                        for sec_other in normalized_sections:
-                            if sec_other.semester == semester and not getattr(sec_other, "is_virtual", False):
-                                for subj_other in sec_other.subjects:
-                                    key_other = (sec_other.id, subj_other.id, w, d, p)
-                                    if key_other in assign_vars:
-                                        builder.model.Add(assign_vars[key_other] + mvar <= 1)
-                                        builder.constraint_count += 1
-
-            elective_masters[(semester, group, subj_id)] = masters_for_subj
+        rows = real_rows.get(semester, np.zeros(0, dtype=np.int64))
+        for subj_id in subj_map:
+            masters = elective_masters.get((semester, group, subj_id))
+            if masters is None:
+                continue
+            # When master is active, block non-virtual sections in same semester at this slot
+            blocking = masters.ravel()[offsets[rows]]
+            here = blocking >= 0
+            enforce = guard("elective_blocking", (semester, group, subj_id))
+            for start_var, master in zip(store.var[rows[here]].tolist(), blocking[here].tolist()):
+                builder.add_at_most_one([start_var, master], enforce)
 
     # Optional: at most one elective option running at the same slot for a group
     for (semester, group), subj_map in elective_index.items():
-        for w in range(weeks):
-            for d in days:
-                for p in periods:
-                    masters_here = []
-                    for subj_id in subj_map.keys():
-                        m = elective_masters.get((semester, group, subj_id), {}).get((w, d, p))
-                        if m is not None:
-                            masters_here.append(m)
-                    if masters_here:
-                        builder.model.Add(sum(masters_here) <= 1)
-                        builder.constraint_count += 1
+        grids = [elective_masters[(semester, group, subj_id)].ravel() for subj_id in subj_map
+                 if (semester, group, subj_id) in elective_masters]
+        if len(grids) < 2:
+            continue
+        stacked = np.stack(grids, axis=1)
+        enforce = guard("elective_exclusion", (semester, group))
+        for masters_here in stacked[(stacked >= 0).sum(axis=1) >= 2].tolist():
+            builder.add_at_most_one([m for m in masters_here if m >= 0], enforce)
 
     # -------------------------
     # Hard Constraints
     # -------------------------
 
-    # 1) Section occupancy (no double booking for a section in a slot)
-    logger.info("Adding section occupancy constraints...")
-    for sec in normalized_sections:
-        sid = sec.id
-        for w in range(weeks):
-            for d in days:
-                for p in periods:
-                    # find all start-keys that cover (sid,w,d,p)
-                    vars_here = [assign_vars[k] for k, covers in assign_var_covers.items() if (sid, w, d, p) in covers]
+    # Covered slot -> covering rows (CSR per family), built once; every family below reads from it
+    logger.info("Building slot index over %d candidate starts...", len(store))
+    for family in ("section", "faculty", "room", "lab"):
+        store.slot_csr(family)
+    logger.info("Slot index: section=%d faculty=%d room=%d lab=%d covered slots",
+                *(int(np.count_nonzero(np.diff(store.slot_csr(f)[0]))) for f in ("section", "faculty", "room", "lab")))
+
+    def covering_vars(family: str, slot: int) -> List[int]:
+        return [start_vars[r] for r in store.slot_rows_by_id(family, slot)]
+
+    assign_intervals = np.zeros(0, dtype=np.int32)
+    if backend == "interval":
+        # 1-3) + 5) section / faculty / room no-overlap and global lab cumulative
+        logger.info("Adding interval (NoOverlap/Cumulative) resource constraints...")
+        assign_intervals = add_interval_resource_constraints(builder, store, lab_room_capacity)
+    else:
+        # 1) Section occupancy (no double booking for a section in a slot)
+        # 2) Faculty no double booking
+        # 3) Room no double booking (rooms assigned to sections)
+        for family in ("section", "faculty", "room"):
+            logger.info("Adding %s occupancy constraints...", family)
+            for e in local_entities[family]:
+                occ_grid = occupancy[family][e].ravel()
+                enforce = guard(f"{family}_no_double", registry.name(family, e))
+                for k, occ in zip(available_offsets.tolist(), occ_grid[available_offsets].tolist()):
+                    vars_here = covering_vars(family, e * grid_size + k)
                     if vars_here:
-                        builder.add(sum(vars_here) <= 1)
-                        # link occupancy booleans
-                        builder.add(sum(vars_here) >= occupancy_section[(sid, w, d, p)])
-                        builder.add(sum(vars_here) <= len(vars_here) * occupancy_section[(sid, w, d, p)])
+                        builder.add_at_most_one(vars_here, enforce)
+                        # link occupancy booleans: occ <= sum(vars_here) <= len(vars_here) * occ
+                        ones = [1] * len(vars_here)
+                        builder.add_linear(vars_here + [occ], ones + [-1], lo=0, enforce=enforce)
+                        builder.add_linear(vars_here + [occ], ones + [-len(vars_here)], hi=0, enforce=enforce)
                     else:
-                        builder.add(occupancy_section[(sid, w, d, p)] == 0)
-
-    # 2) Faculty no double booking
-    logger.info("Adding faculty no-double-booking constraints...")
-    for (fac, w, d, p), occ in occupancy_faculty.items():
-        vars_here = [
-            assign_vars[k]
-            for k, covers in assign_var_covers.items()
-            if assignment_meta[k][2] == fac and (assignment_meta[k][0], w, d, p) in covers
-        ]
-        if vars_here:
-            builder.add(sum(vars_here) <= 1)
-            builder.add(sum(vars_here) >= occ)
-            builder.add(sum(vars_here) <= len(vars_here) * occ)
-        else:
-            builder.add(occ == 0)
-
-    # 3) Room no double booking (rooms assigned to sections)
-    logger.info("Adding room occupancy constraints...")
-    for (room, w, d, p), occ in occupancy_room.items():
-        vars_here = [
-            assign_vars[k]
-            for k, covers in assign_var_covers.items()
-            if section_classroom_map.get(k[0]) == room and (k[0], w, d, p) in covers
-        ]
-        if vars_here:
-            builder.add(sum(vars_here) <= 1)
-            builder.add(sum(vars_here) >= occ)
-            builder.add(sum(vars_here) <= len(vars_here) * occ)
-        else:
-            builder.add(occ == 0)
+                        builder.add_linear([occ], [1], 0, 0, enforce=enforce)
 
     # 4) Subject totals:
     #    - For non-virtual (regular) sections: enforce per-section totals as before
     #    - For virtual elective options: enforce aggregated totals using elective_masters
     logger.info("Adding subject-total constraints (regular + elective-aggregated)...")
+    quota_shortfalls = []
+
+    def add_subject_total(variables, length, quota, name, enforce=()):
+        lo, hi = quota
+        coeffs = [length] * len(variables)
+        if lo == hi:
+            builder.add_linear(variables, coeffs, hi, hi, enforce=enforce)
+            return
+        # template quota range: lo <= total <= hi, shortfall below hi is a soft violation
+        shortfall = builder.new_int_var(0, hi - lo, f"quota_shortfall_{name}")
+        builder.add_linear(variables + [shortfall], coeffs + [1], hi, hi, enforce=enforce)
+        quota_shortfalls.append(shortfall)
+
     # regular (non-virtual) sections
-    for (sid, subj_id), starts in sec_subj_vars.items():
+    for sid, subj_id, rows in pairs():
         # skip if this sid is virtual (we will handle via elective masters)
-        sec_meta = next((s for s in normalized_sections if s.id == sid), None)
-        is_virtual_sid = bool(getattr(sec_meta, "is_virtual", False)) if sec_meta else False
-        if is_virtual_sid:
+        if sid in virtual_sids:
             continue
-        total_required = int(subject_periods_map.get(subj_id, 0))
-        if total_required <= 0:
+        quota = pair_quotas.get((sid, subj_id), (0, 0))
+        # a pair without periods is left free, unless its total was fixed explicitly (e.g. to 0)
+        if quota[1] <= 0 and (sid, subj_id) not in quota_overrides:
             continue
-        terms = []
-        for (w, d, p) in starts:
-            key = (sid, subj_id, w, d, p)
-            length = assignment_meta[key][3]
-            terms.append(length * assign_vars[key])
-        logger.debug("Subject total for %s/%s required=%d candidates=%d", sid, subj_id, total_required, len(starts))
-        builder.add(sum(terms) == total_required)
+        logger.debug("Subject total for %s/%s quota=%s candidates=%d", sid, subj_id, quota, len(rows))
+        add_subject_total(start_vars[rows.start:rows.stop], lengths[rows.start], quota, f"{sid}_{subj_id}",
+                          guard("subject_totals", (sid, subj_id)))
 
     # aggregated elective totals (one per elective subject option)
     logger.info("Adding aggregated elective subject totals...")
-    for (semester, group, subj_id), masters_map in list(elective_masters.items()):
-        required = int(subject_periods_map.get(subj_id, 0))
-        if required <= 0:
+    for (semester, group, subj_id), masters in elective_masters.items():
+        # the option's virtual copies share one quota (they are all driven by the masters)
+        option_pairs = [(sid, subj_id) for sid in elective_index[(semester, group)][subj_id]
+                        if (sid, subj_id) in pair_quotas]
+        quota = pair_quotas[option_pairs[0]] if option_pairs else (0, 0)
+        if quota[1] <= 0 and not any(pair in quota_overrides for pair in option_pairs):
             continue
-        # determine length for this subj_id (pick any matching assign_vars to get length)
-        sample_length = None
-        for k in assignment_meta.keys():
-            if k[1] == subj_id:
-                sample_length = assignment_meta[k][3]
-                break
-        if sample_length is None:
-            sample_length = 1
-        terms = []
-        for key_slot, master_var in masters_map.items():
-            # each selected master contributes sample_length periods
-            terms.append(sample_length * master_var)
-        logger.debug("Elective aggregated total subj=%s required=%d candidate_slots=%d", subj_id, required, len(terms))
-        builder.model.Add(sum(terms) == required)
-        builder.constraint_count += 1
+        # each selected master contributes one block of the subject's length
+        sample_length = subject_length.get(subj_id, 1)
+        masters = masters[masters >= 0].tolist()
+        logger.debug("Elective aggregated total subj=%s quota=%s candidate_slots=%d", subj_id, quota, len(masters))
+        add_subject_total(masters, sample_length, quota, f"{semester}_{group}_{subj_id}",
+                          guard("elective_totals", (semester, group, subj_id)))
 
     # 5) Global lab room capacity: at any covered slot number of lab starts covering that slot <= lab_room_capacity
-    logger.info("Adding global lab-room capacity constraints (<= %d)", lab_room_capacity)
-    for w in range(weeks):
-        for d in days:
-            for p in periods:
-                lab_start_vars = [
-                    assign_vars[k] for k, covers in assign_var_covers.items()
-                    if assignment_meta[k][3] == 2 and (k[0], w, d, p) in covers
-                ]
-                if lab_start_vars:
-                    builder.add(sum(lab_start_vars) <= lab_room_capacity)
+    #    (the interval backend already covers this with AddCumulative)
+    if backend == "boolean":
+        logger.info("Adding global lab-room capacity constraints (<= %d)", lab_room_capacity)
+        enforce = guard("lab_capacity")
+        for slot in range(store.slot_count("lab")):
+            lab_start_vars = covering_vars("lab", slot)
+            if lab_start_vars:
+                builder.add_linear(lab_start_vars, [1] * len(lab_start_vars), hi=lab_room_capacity, enforce=enforce)
 
     # -------------------------
     # Soft constraints (penalties)
     # -------------------------
     logger.info("Adding soft constraints as penalties (theory spread, consecutive-theory...)")
-    penalties = []
+    penalties = list(quota_shortfalls)
+
+    def add_soft_caps(groups, cap):
+        """One violation literal per (name, vars): sum(vars) <= cap unless violated, > cap if violated."""
+        viols = builder.new_bool_vars(len(groups), names=lambda: (name for name, _ in groups)).tolist()
+        for viol, (_, group_vars) in zip(viols, groups):
+            ones = [1] * len(group_vars)
+            builder.add_linear(group_vars, ones, hi=cap, enforce=[-viol - 1])
+            builder.add_linear(group_vars, ones, lo=cap + 1, enforce=[viol])
+        penalties.extend(viols)
 
     # Soft A: Theory spread - prefer at most 1 start per subject per day (theory only)
-    for (sid, subj_id), starts in sec_subj_vars.items():
-        if not starts:
-            continue
-        sample = starts[0]
-        length = assignment_meta[(sid, subj_id, sample[0], sample[1], sample[2])][3]
-        if length == 2:  # skip labs
+    spread_groups = []
+    for sid, subj_id, rows in pairs():
+        if lengths[rows.start] == 2:  # skip labs
             continue
-        for w in range(weeks):
-            for d in days:
-                day_vars = [assign_vars[(sid, subj_id, ww, dd, pp)] for (ww, dd, pp) in starts if ww == w and dd == d]
-                if not day_vars:
-                    continue
-                # violation indicator
-                viol = builder.NewBoolVar(f"viol_theoryspread_{sid}_{subj_id}_w{w}_d{d}")
-                # if no violation -> sum(day_vars) <= 1
-                builder.model.Add(sum(day_vars) <= 1).OnlyEnforceIf(viol.Not())
-                # if violation -> sum(day_vars) >= 2 (this branch is enabled when violation var = 1)
-                builder.model.Add(sum(day_vars) >= 2).OnlyEnforceIf(viol)
-                builder.constraint_count += 2
-                penalties.append(viol)
+        for (w, d), day_rows in store.day_groups(rows):
+            spread_groups.append((f"viol_theoryspread_{sid}_{subj_id}_w{w}_d{d}", [start_vars[r] for r in day_rows]))
+    add_soft_caps(spread_groups, 1)
 
     # Soft B: No >2 consecutive theory classes per faculty in a day
-    for fac in all_faculty_ids:
+    consec_groups = []
+    for f in local_entities["faculty"]:
+        fac = registry.name("faculty", f)
         for w in range(weeks):
             for d in days:
+                # theory (length 1) start vars per period of this faculty-day
+                base = store.slot_id("faculty", f, w, d, 0)
+                theory_at = [[start_vars[r] for r in store.slot_rows_by_id("faculty", base + pp) if lengths[r] == 1]
+                             for pp in periods]
                 for p in range(0, periods_per_day - 2):
-                    theory_vars = []
-                    # gather theory start vars for faculty covering periods p,p+1,p+2 (exclude labs length==2)
-                    for k, covers in assign_var_covers.items():
-                        _, _, wk, dd, sp = k
-                        if wk != w or dd != d:
-                            continue
-                        _, _, fac_k, length = assignment_meta[k]
-                        if fac_k != fac or length != 1:
-                            continue
-                        # theory covers single slot (start period)
-                        # include it if its start period in {p, p+1, p+2}
-                        if covers and any(pp in [p, p+1, p+2] for (_, _, _, pp) in covers):
-                            theory_vars.append(assign_vars[k])
-                    if not theory_vars:
-                        continue
-                    viol = builder.NewBoolVar(f"viol_consec_theory_{fac}_w{w}_d{d}_p{p}")
-                    builder.model.Add(sum(theory_vars) <= 2).OnlyEnforceIf(viol.Not())
-                    builder.model.Add(sum(theory_vars) >= 3).OnlyEnforceIf(viol)
-                    builder.constraint_count += 2
-                    penalties.append(viol)
+                    # theory start vars for faculty covering periods p,p+1,p+2 (labs excluded)
+                    theory_vars = theory_at[p] + theory_at[p + 1] + theory_at[p + 2]
+                    if theory_vars:
+                        consec_groups.append((f"viol_consec_theory_{fac}_w{w}_d{d}_p{p}", theory_vars))
+    add_soft_caps(consec_groups, 2)
 
     # Soft C: Faculty daily workload 0-4 if scheduled (OPTIONAL / commented)
     # If you want to enable this, uncomment the block below. For now we leave it commented per your request.
@@ -534,15 +961,28 @@ def build_cp_model(
 
 
 
+    # -------------------------
+    # Optional: symmetry breaking between interchangeable sections / weeks
+    # -------------------------
+    symmetry_report = None
+    if symmetry_breaking:
+        symmetry_report = symmetry.add_symmetry_breaking(
+            builder, store, normalized_sections, section_faculty_map, section_classroom_map,
+            pair_quotas, virtual_sids, available)
+
     # -------------------------
     # Objective: minimize total penalties (soft constraint violations)
     # -------------------------
     if penalties:
         logger.info("Adding objective to minimize %d soft-violations", len(penalties))
-        # objective must be an IntVar expression; sum(booleans) is OK
-        builder.model.Minimize(sum(penalties))
+        builder.minimize(penalties)
     else:
         logger.info("No soft penalties defined; model will be pure feasibility/hard-constraints")
+    builder.flush()
+    if guard_literals:
+        # solve with every guard assumed true; an infeasible solve reports a sufficient subset
+        builder.model.Proto().assumptions.extend(guard_literals.values())
+        logger.info("Diagnostics: %d guard literals (%s level) added as assumptions", len(guard_literals), diagnostics)
 
     logger.info("Model build complete: vars=%d constraints=%d soft_penalties=%d",
                 builder.var_count, builder.constraint_count, len(penalties))
@@ -552,13 +992,24 @@ def build_cp_model(
     # -------------------------
     meta = {
         "builder": builder,
-        "assign_vars": assign_vars,
-        "assign_var_covers": assign_var_covers,
-        "assignment_meta": assignment_meta,
-        "sec_subj_vars": sec_subj_vars,
-        "occupancy_section": occupancy_section,
-        "occupancy_faculty": occupancy_faculty,
-        "occupancy_room": occupancy_room,
+        "candidates": store,
+        "registry": registry,
+        # assign_vars, assign_keys, assign_indices, assign_var_covers, assignment_meta,
+        # sec_subj_vars, slot_index: views over the candidate store
+        **meta_views(store, builder.model),
+        "subject_quotas": subject_quotas,
+        "pair_quotas": pair_quotas,
+        "weekly_template": {
+            "cycle_weeks": weeks,
+            "working_weeks": working_weeks,
+        } if weekly_template else None,
+        "teaching_calendar": normalized.get("teaching_calendar", []),
+        "working_dates": working_dates,
+        "backend": backend,
+        "assign_intervals": assign_intervals,
+        "occupancy_section": occupancy["section"],
+        "occupancy_faculty": occupancy["faculty"],
+        "occupancy_room": occupancy["room"],
         "subject_periods_map": subject_periods_map,
         "section_faculty_map": section_faculty_map,
         "section_classroom_map": section_classroom_map,
@@ -568,6 +1019,13 @@ def build_cp_model(
         "lab_room_capacity": lab_room_capacity,
         "elective_index": elective_index,
         "elective_masters": elective_masters,
+        "symmetry": symmetry_report,
+        "prescreen": {
+            "busy_entities": {family: len(entities) for family, entities in busy.items()},
+            "pruned_starts": pruned_starts,
+            "dropped_bookings": dropped_bookings,
+        } if dropped_bookings is not None else None,
+        "diagnostic_guards": guard_literals,
     }
 
     return builder.model, meta
@@ -0,0 +1,202 @@
+"""
+symmetry.py - detect interchangeable sections / weeks and add lex-leader symmetry breaking.
+
+Two real sections are interchangeable when swapping them (together with the faculty and
+room that only they use) maps the model onto itself:
+ - same semester, same subjects with the same block lengths and quotas,
+ - per subject either the same shared faculty, or a faculty private to the section
+   teaching the same subset of its subjects,
+ - the same shared room, or a room private to each of them.
+Two weeks are interchangeable when their teachable slots are identical: every constraint
+family lives inside one slot or one day, and the subject totals only count starts.
+Both kinds of class are then split by the candidate starts actually in the store: the
+occupancy pre-screen (normalized["occupied"]) removes starts of single sections, faculty,
+rooms and weeks, so only members with the same screened rows stay together.
+
+Breaking uses one fixed variable order (real-section start rows in candidate-store order,
+then everything else) and, for every swap of neighbours inside a class, adds
+x >=lex swap(x) on a prefix of that order: the start vectors of the first section (week)
+must be lexicographically >= those of the second. Every constraint is implied by the
+lex-leader of the whole group, so each orbit of solutions keeps a representative and
+the optimum is unchanged. Virtual elective copies alias masters and are left out.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("src.timetable.symmetry")
+logger.setLevel(logging.INFO)
+
+
+def section_classes(
+    normalized_sections: Sequence[Any],
+    section_faculty_map: Dict[Tuple[str, str], Any],
+    section_classroom_map: Dict[str, Any],
+    pair_quotas: Dict[Tuple[str, str], Tuple[int, int]],
+    pair_length: Dict[Tuple[str, str], int],
+    virtual_sids,
+) -> List[List[str]]:
+    """Classes (2+ members, normalized order) of interchangeable real sections."""
+    sections_of_faculty: Dict[Any, set] = defaultdict(set)
+    for (sid, _), fac in section_faculty_map.items():
+        if fac is not None:
+            sections_of_faculty[fac].add(sid)
+    sections_of_room: Dict[Any, set] = defaultdict(set)
+    for sid, room in section_classroom_map.items():
+        if room is not None:
+            sections_of_room[room].add(sid)
+
+    classes: Dict[Tuple, List[str]] = defaultdict(list)
+    for sec in normalized_sections:
+        if sec.id in virtual_sids:
+            continue
+        subjects = sorted(subj.id for subj in sec.subjects if (sec.id, subj.id) in pair_quotas)
+        if not subjects:
+            continue
+        first_subject_of: Dict[Any, int] = {}
+        signature_subjects = []
+        for i, subj_id in enumerate(subjects):
+            fac = section_faculty_map.get((sec.id, subj_id))
+            if sections_of_faculty[fac] == {sec.id}:
+                # a private faculty is identified by the first subject it teaches here
+                fac_token = ("private", first_subject_of.setdefault(fac, i))
+            else:
+                fac_token = ("shared", fac)
+            signature_subjects.append((subj_id, pair_length.get((sec.id, subj_id)), pair_quotas[(sec.id, subj_id)], fac_token))
+        room = section_classroom_map.get(sec.id)
+        if room is None:
+            room_token = None
+        elif sections_of_room[room] == {sec.id}:
+            room_token = "private"
+        else:
+            room_token = ("shared", room)
+        classes[(sec.semester, tuple(signature_subjects), room_token)].append(sec.id)
+    return [members for members in classes.values() if len(members) > 1]
+
+
+def week_classes(available: np.ndarray) -> List[List[int]]:
+    """Classes (2+ members, ascending) of weeks with identical teachable slots."""
+    classes: Dict[bytes, List[int]] = defaultdict(list)
+    for w in range(available.shape[0]):
+        if available[w].any():
+            classes[available[w].tobytes()].append(w)
+    return [weeks for weeks in classes.values() if len(weeks) > 1]
+
+
+def refine_classes(classes: List[List[Any]], signature) -> List[List[Any]]:
+    """Split each class by signature(member); parts with 2+ members, in class order."""
+    refined = []
+    for members in classes:
+        parts: Dict[bytes, List[Any]] = defaultdict(list)
+        for m in members:
+            parts[signature(m)].append(m)
+        refined.extend(part for part in parts.values() if len(part) > 1)
+    return refined
+
+
+def _row_signature(store, mask: np.ndarray, columns: Sequence[str]) -> bytes:
+    """Sorted `columns` of the store rows in `mask`, as bytes."""
+    cols = np.stack([getattr(store, c)[mask] for c in columns])
+    return cols[:, np.lexsort(cols[::-1])].tobytes()
+
+
+def add_lex_geq(builder, a: Sequence[int], b: Sequence[int]) -> int:
+    """
+    a >=lex b over Boolean proto indices (equal lengths). e_i (i >= 1) means "a and b agree
+    on the first i positions"; while they agree, a_i >= b_i. Returns constraints added.
+    """
+    n = len(a)
+    if n == 0:
+        return 0
+    builder.add_linear([a[0], b[0]], [1, -1], lo=0)
+    if n == 1:
+        return 1
+    equal = builder.new_bool_vars(n - 1).tolist()  # equal[i - 1] is e_i
+    # e_1 >= 1 - (a_0 - b_0)
+    builder.add_linear([equal[0], a[0], b[0]], [1, 1, -1], lo=1)
+    for i in range(1, n):
+        e = equal[i - 1]
+        # e_i -> a_i >= b_i
+        builder.add_linear([a[i], b[i], e], [1, -1, -1], lo=-1)
+        if i + 1 < n:
+            # e_{i+1} >= e_i - (a_i - b_i)
+            builder.add_linear([equal[i], e, a[i], b[i]], [1, -1, 1, -1], lo=0)
+    return 2 * n - 1
+
+
+def add_symmetry_breaking(
+    builder,
+    store,
+    normalized_sections: Sequence[Any],
+    section_faculty_map: Dict[Tuple[str, str], Any],
+    section_classroom_map: Dict[str, Any],
+    pair_quotas: Dict[Tuple[str, str], Tuple[int, int]],
+    virtual_sids,
+    available: np.ndarray,
+    max_positions: int = 512,
+) -> Dict[str, Any]:
+    """
+    Detect section and week symmetries and add the lex constraints (each compares at
+    most `max_positions` start variables). Returns the report stored in meta["symmetry"].
+    """
+    tables = store.tables
+    pair_length = {(tables["section"][sc], tables["subject"][jc]): int(store.length[lo])
+                   for (sc, jc), (lo, hi) in zip(store.pairs, store.pair_rows) if hi > lo}
+    sections = section_classes(normalized_sections, section_faculty_map, section_classroom_map,
+                               pair_quotas, pair_length, virtual_sids)
+    weeks = week_classes(available)
+    # keep only members whose screened candidate starts match (subject, slot by slot)
+    sections = refine_classes(sections, lambda sid: _row_signature(
+        store, store.section == store.registry.id("section", sid), ("subject", "week", "day", "period")))
+    weeks = refine_classes(weeks, lambda w: _row_signature(
+        store, store.week == w, ("section", "subject", "day", "period")))
+    virtual_codes = {store.registry.id("section", sid) for sid in virtual_sids}
+    real = ~np.isin(store.section, list(virtual_codes)) if virtual_codes else np.ones(len(store), dtype=bool)
+
+    constraints = 0
+    section_pairs = 0
+    for members in sections:
+        for first, second in zip(members, members[1:]):
+            a, b = [], []
+            for (sc, jc), (lo, hi) in zip(store.pairs, store.pair_rows):
+                if tables["section"][sc] != first:
+                    continue
+                subj_id = tables["subject"][jc]
+                # the same (subject, slot) row of the second section
+                for row in range(lo, hi):
+                    other = store.row((second, subj_id) + store.key(row)[2:])
+                    if other >= 0:
+                        a.append(int(store.var[row]))
+                        b.append(int(store.var[other]))
+                if len(a) >= max_positions:
+                    break
+            constraints += add_lex_geq(builder, a[:max_positions], b[:max_positions])
+            section_pairs += 1
+
+    week_pairs = 0
+    for members in weeks:
+        for first, second in zip(members, members[1:]):
+            rows_a = np.flatnonzero(real & (store.week == first))[:max_positions]
+            # the same (section, subject, day, period) row in the second week (weeks of a class
+            # have the same candidate starts; a missing row is never indexed)
+            keys = store.iter_keys(rows_a)
+            rows_b = np.array([store.row((sid, subj, second, d, p)) for sid, subj, _, d, p in keys], dtype=np.int64)
+            found = rows_b >= 0
+            constraints += add_lex_geq(builder, store.var[rows_a[found]].tolist(), store.var[rows_b[found]].tolist())
+            week_pairs += 1
+
+    report = {
+        "section_classes": sections,
+        "week_classes": weeks,
+        "section_swaps": section_pairs,
+        "week_swaps": week_pairs,
+        "constraints": constraints,
+        "max_positions": max_positions,
+    }
+    logger.info("Symmetry breaking: %d interchangeable section classes (%d swaps), %d week classes (%d swaps), "
+                "%d constraints", len(sections), section_pairs, len(weeks), week_pairs, constraints)
+    return report
+
@@ -0,0 +1,248 @@
+"""
+synthetic.py - generate synthetic department inputs at any scale.
+
+generate_inputs(out_dir, ...) writes the nine files loader.load_all_inputs reads, shaped
+like the shipped input/ data:
+ - one "current" term per year (semester ids "<year>-<term>"), `sections_per_semester`
+   real sections each, all sharing the same semester dates,
+ - per semester: theory + lab subjects, plus `elective_groups` groups of
+   `electives_per_group` options with every section enrolled in every group,
+ - `faculty` faculty, each subject eligible for `faculty_per_subject` of them,
+ - enough classrooms for every real section plus `spare_classrooms`, and `lab_rooms` labs.
+The same seed always yields byte-identical files.
+
+Run directly for a one-off data set:
+    python -m src.timetable.synthetic --out input_synth --sections-per-semester 10 --faculty 150
+"""
+
+import argparse
+import json
+import logging
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+logger = logging.getLogger("src.timetable.synthetic")
+logger.setLevel(logging.INFO)
+
+# loader.load_all_inputs file names
+FILES = {
+    "semesterdates": "semesterdates.json",
+    "examdates": "semester-exam-dates.json",
+    "holidays": "semester-holidays.json",
+    "subjects_master": "aiml_subjects_master.json",
+    "semester_subjects": "aiml-semester_subjects.json",
+    "faculty": "aiml-faculty-detailed.json",
+    "sections": "department-sections-semester2.json",
+    "classrooms": "classrooms.json",
+    "elective_enrollments": "elective-subjects-enrollment.json",
+}
+
+SECTION_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _subject(subj_id: str, name: str, hours: int, is_lab: bool) -> Dict[str, Any]:
+    return {"id": subj_id, "name": name, "totalHours": hours, "is_lab": is_lab}
+
+
+def _faculty(idx: int, subjects: List[str]) -> Dict[str, Any]:
+    return {
+        "id": str(idx),
+        "name": f"Faculty {idx}",
+        "facultyId": f"FAC{idx:03d}",
+        "department": "AIML",
+        "qualification": "Ph.D.",
+        "contact": None,
+        "email": f"faculty{idx}@example.edu",
+        "status": "Active",
+        "joiningDate": "2015-06-01",
+        "experience": 10,
+        "specialization": ["AI"],
+        "subjects": sorted(subjects),
+        "address": None,
+        "designations": [],
+    }
+
+
+def _room(idx: int, room_type: str, capacity: int) -> Dict[str, Any]:
+    prefix = "LAB" if room_type == "lab" else "CLS"
+    return {
+        "id": str(idx),
+        "name": f"{room_type.title()} {idx}",
+        "number": f"{prefix}-{idx:03d}",
+        "type": room_type,
+        "capacity": capacity,
+        "floor": 1 + idx // 20,
+        "building": "Main Block",
+        "department": "AIML",
+        "description": None,
+        "amenities": [],
+        "status": "active",
+    }
+
+
+def generate_inputs(
+    out_dir,
+    sections_per_semester: int = 2,
+    semesters: Sequence[str] = ("1-2", "2-2", "3-2", "4-2"),
+    theory_per_semester: int = 5,
+    labs_per_semester: int = 2,
+    elective_groups: int = 1,
+    electives_per_group: int = 3,
+    faculty: int = 24,
+    faculty_per_subject: int = 2,
+    spare_classrooms: int = 2,
+    lab_rooms: int = 2,
+    students_per_section: int = 60,
+    start_date: str = "2025-12-01",
+    end_date: str = "2026-06-08",
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Write a synthetic input directory and return a summary of what was generated."""
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    exam_start = end - timedelta(days=19)
+
+    semesterdates, examdates, sections, enrollments = [], [], [], []
+    semester_subjects: Dict[str, Any] = {}
+    subjects_master: List[Dict[str, Any]] = []
+    counter = 0
+
+    def next_id() -> str:
+        nonlocal counter
+        counter += 1
+        return f"SUBJ{counter:03d}"
+
+    for sem in semesters:
+        year = int(sem.split("-")[0])
+        semesterdates.append({
+            "id": sem, "name": f"Semester {sem}", "startDate": start_date, "endDate": end_date,
+            "totalHours": 0, "theoryHours": 0, "practicalHours": 0,
+        })
+        examdates.append({"id": sem, "semesterId": sem, "startDate": exam_start.isoformat(),
+                          "endDate": (exam_start + timedelta(days=10)).isoformat()})
+
+        core = []
+        for i in range(theory_per_semester):
+            core.append(_subject(next_id(), f"Theory {sem}.{i + 1}", rng.choice((40, 45, 50, 60)), False))
+        for i in range(labs_per_semester):
+            core.append(_subject(f"{next_id()}-LAB", f"Lab {sem}.{i + 1}", rng.choice((24, 30)), True))
+
+        electives = {}
+        for g in range(elective_groups):
+            group = f"ELECTIVE {sem}.{g + 1}"
+            electives[group] = {"subjects": [
+                _subject(next_id(), f"Elective {sem}.{g + 1}.{o + 1}", rng.choice((30, 40)), False)
+                for o in range(electives_per_group)
+            ]}
+        semester_subjects[sem] = {"subjects": core, "electives": electives}
+        subjects_master.extend(core)
+        for eg in electives.values():
+            subjects_master.extend(eg["subjects"])
+
+        for s in range(sections_per_semester):
+            letter = SECTION_LETTERS[s % 26] + (str(s // 26) if s >= 26 else "")
+            sid = f"aiml-{year}{letter.lower()}"
+            sections.append({
+                "id": sid, "name": f"AI&ML {year}{letter}", "year": year, "section": letter,
+                "semester": sem, "totalStudents": students_per_section, "classTeacher": None,
+            })
+            for group, eg in electives.items():
+                # split the section across the options of the group
+                shares = [students_per_section // len(eg["subjects"])] * len(eg["subjects"])
+                shares[0] += students_per_section - sum(shares)
+                enrollments.append({
+                    "section_id": sid, "sectionName": f"AI&ML {year}{letter}", "semester": sem,
+                    "totalStudents": students_per_section, "elective_group": group,
+                    "subjects": [
+                        {"subject_id": subj["id"], "name": subj["name"], "hours": subj["totalHours"],
+                         "is_lab": subj["is_lab"], "studentsEnrolled": n}
+                        for subj, n in zip(eg["subjects"], shares)
+                    ],
+                })
+
+    # every subject eligible for `faculty_per_subject` faculty, spread round-robin then shuffled
+    teaches: Dict[int, List[str]] = {i: [] for i in range(1, faculty + 1)}
+    pool = list(teaches)
+    rng.shuffle(pool)
+    cursor = 0
+    for subj in subjects_master:
+        for _ in range(min(faculty_per_subject, faculty)):
+            teaches[pool[cursor % len(pool)]].append(subj["id"])
+            cursor += 1
+    faculty_rows = [_faculty(i, subjs) for i, subjs in teaches.items()]
+
+    rooms = [_room(i + 1, "classroom", students_per_section) for i in range(len(sections) + spare_classrooms)]
+    rooms += [_room(len(rooms) + i + 1, "lab", students_per_section) for i in range(lab_rooms)]
+
+    holidays = []
+    day = start + timedelta(days=17)
+    while day < exam_start:
+        holidays.append({"holiday_date": day.isoformat(), "description": "Synthetic holiday"})
+        day += timedelta(days=rng.randint(25, 40))
+
+    payload = {
+        "semesterdates": semesterdates,
+        "examdates": examdates,
+        "holidays": holidays,
+        "subjects_master": subjects_master,
+        "semester_subjects": semester_subjects,
+        "faculty": faculty_rows,
+        "sections": sections,
+        "classrooms": rooms,
+        "elective_enrollments": enrollments,
+    }
+    for key, filename in FILES.items():
+        with open(out_dir / filename, "w") as f:
+            json.dump(payload[key], f, indent=2)
+
+    summary = {
+        "semesters": len(semesters),
+        "sections": len(sections),
+        "subjects": len(subjects_master),
+        "elective_options": len(semesters) * elective_groups * electives_per_group,
+        "faculty": faculty,
+        "classrooms": len(rooms) - lab_rooms,
+        "lab_rooms": lab_rooms,
+        "seed": seed,
+    }
+    logger.info("Synthetic inputs written to %s: %s", out_dir, summary)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic timetable inputs.")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--sections-per-semester", type=int, default=2)
+    parser.add_argument("--semesters", default="1-2,2-2,3-2,4-2")
+    parser.add_argument("--theory-per-semester", type=int, default=5)
+    parser.add_argument("--labs-per-semester", type=int, default=2)
+    parser.add_argument("--elective-groups", type=int, default=1)
+    parser.add_argument("--electives-per-group", type=int, default=3)
+    parser.add_argument("--faculty", type=int, default=24)
+    parser.add_argument("--faculty-per-subject", type=int, default=2)
+    parser.add_argument("--lab-rooms", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    generate_inputs(
+        args.out,
+        sections_per_semester=args.sections_per_semester,
+        semesters=[s for s in args.semesters.split(",") if s],
+        theory_per_semester=args.theory_per_semester,
+        labs_per_semester=args.labs_per_semester,
+        elective_groups=args.elective_groups,
+        electives_per_group=args.electives_per_group,
+        faculty=args.faculty,
+        faculty_per_subject=args.faculty_per_subject,
+        lab_rooms=args.lab_rooms,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
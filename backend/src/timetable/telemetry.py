@@ -0,0 +1,169 @@
+"""
+telemetry.py - structured CP-SAT progress telemetry.
+
+SolverTelemetry replaces CP-SAT's stdout search log with events written as JSON lines
+(<output_dir>/telemetry.jsonl in runner.run_solver), each with the seconds since the
+solve started:
+ - "presolve": model size before / after presolve and presolve time, parsed from the
+   search log (received through CpSolver.log_callback, so nothing goes to stdout),
+ - "bound": every best-bound improvement (CpSolver.best_bound_callback),
+ - "solution": every improving solution with objective, bound, gap and solution count
+   (TelemetryCallback, or a SolutionStreamer that forwards to the telemetry),
+ - "final": status, objective, bound, gap and the response's search statistics.
+summary() condenses the run (time to first / best solution, final gap, presolve
+reduction) for summary.json. The raw log lines go to this module's logger at DEBUG.
+"""
+
+import json
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ortools.sat.python import cp_model
+
+logger = logging.getLogger("src.timetable.telemetry")
+logger.setLevel(logging.INFO)
+
+_COUNT = re.compile(r"^#(Variables|k\w+): ([\d']+)")
+_TIME = re.compile(r"at ([\d.e+-]+)s")
+
+
+def _number(text: str) -> int:
+    return int(text.replace("'", ""))
+
+
+def relative_gap(objective: Optional[float], bound: Optional[float]) -> Optional[float]:
+    """|objective - bound| / max(1, |objective|), None without both."""
+    if objective is None or bound is None:
+        return None
+    return abs(objective - bound) / max(1.0, abs(objective))
+
+
+class SolverTelemetry:
+    """Collect CP-SAT progress events; attach() before Solve, finish() after it."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text("")
+        self._t0 = time.perf_counter()
+        self.solutions = 0
+        self.first_solution = None
+        self.best_solution = None
+        self.best_bound = None
+        self.bound_updates = 0
+        self.final: Dict[str, Any] = {}
+        # "initial" / "presolved" -> {"variables": n, "constraints": n}; times in seconds
+        self.presolve: Dict[str, Any] = {}
+        self._model_block = None
+
+    # ---- hooks ----
+    def attach(self, solver: cp_model.CpSolver) -> None:
+        """Route the search log and bound updates of `solver` here instead of stdout."""
+        solver.parameters.log_search_progress = True
+        solver.parameters.log_to_stdout = False
+        solver.log_callback = self.on_log
+        solver.best_bound_callback = self.on_bound
+        self._t0 = time.perf_counter()
+
+    def on_log(self, message: str) -> None:
+        # one callback may carry several log lines
+        for line in message.split("\n"):
+            logger.debug("%s", line)
+            self._parse_line(line)
+
+    def _parse_line(self, line: str) -> None:
+        if line.startswith("Initial optimization model"):
+            self._model_block = "initial"
+        elif line.startswith("Presolved optimization model"):
+            self._model_block = "presolved"
+        elif line.startswith("Starting presolve"):
+            match = _TIME.search(line)
+            self.presolve["started"] = float(match.group(1)) if match else None
+        elif line.startswith("Starting search"):
+            match = _TIME.search(line)
+            self.presolve["search_started"] = float(match.group(1)) if match else None
+            self._emit("presolve", **self.presolve)
+        elif self._model_block:
+            match = _COUNT.match(line)
+            if match:
+                sizes = self.presolve.setdefault(self._model_block, {"variables": 0, "constraints": 0})
+                if match.group(1) == "Variables":
+                    sizes["variables"] = _number(match.group(2))
+                else:
+                    sizes["constraints"] += _number(match.group(2))
+            elif not line.startswith("  -") and not line.startswith("#"):
+                self._model_block = None
+
+    def on_bound(self, bound: float) -> None:
+        self.best_bound = bound
+        self.bound_updates += 1
+        self._emit("bound", bound=bound)
+
+    def on_solution(self, objective: float, bound: float, wall_time: float) -> None:
+        self.solutions += 1
+        self.best_bound = bound
+        event = self._emit("solution", objective=objective, bound=bound, gap=relative_gap(objective, bound),
+                           solutions=self.solutions, wall_time=round(wall_time, 3))
+        if self.first_solution is None:
+            self.first_solution = event
+        self.best_solution = event
+
+    def finish(self, solver: cp_model.CpSolver, status) -> Dict[str, Any]:
+        """Record the final event from the solver's response; returns summary()."""
+        response = solver.ResponseProto()
+        feasible = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        objective = solver.ObjectiveValue() if feasible else None
+        bound = solver.BestObjectiveBound() if feasible else self.best_bound
+        self.final = self._emit(
+            "final",
+            status=solver.StatusName(status),
+            objective=objective,
+            bound=bound,
+            gap=relative_gap(objective, bound),
+            solutions=self.solutions,
+            wall_time=round(solver.WallTime(), 3),
+            deterministic_time=round(response.deterministic_time, 3),
+            gap_integral=round(response.gap_integral, 3),
+            conflicts=solver.NumConflicts(),
+            branches=solver.NumBranches(),
+        )
+        return self.summary()
+
+    # ---- output ----
+    def _emit(self, event: str, **fields) -> Dict[str, Any]:
+        record = {"event": event, "t": round(time.perf_counter() - self._t0, 3), **fields}
+        if self.path:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        return record
+
+    def summary(self) -> Dict[str, Any]:
+        """Condensed run statistics for summary.json."""
+        presolve = dict(self.presolve)
+        if presolve.get("started") is not None and presolve.get("search_started") is not None:
+            presolve["seconds"] = round(presolve["search_started"] - presolve["started"], 3)
+        return {
+            "path": str(self.path) if self.path else None,
+            "status": self.final.get("status"),
+            "solutions": self.solutions,
+            "first_solution": self.first_solution,
+            "best_solution": self.best_solution,
+            "bound_updates": self.bound_updates,
+            "final": self.final,
+            "presolve": presolve,
+        }
+
+
+class TelemetryCallback(cp_model.CpSolverSolutionCallback):
+    """Solution callback that only reports improving solutions to a SolverTelemetry."""
+
+    def __init__(self, telemetry: SolverTelemetry):
+        super().__init__()
+        self._telemetry = telemetry
+
+    def OnSolutionCallback(self):
+        self._telemetry.on_solution(self.ObjectiveValue(), self.BestObjectiveBound(), self.WallTime())
@@ -0,0 +1,111 @@
+"""
+template.py - expand a weekly-template solution over the real teaching calendar.
+
+The solver (build_cp_model with weekly_template=True) schedules a short cycle of
+`cycle_weeks` weeks. Calendar week i repeats template week i % cycle_weeks:
+ - sessions landing on a holiday / exam / out-of-semester day are dropped and
+   reported as exceptions,
+ - once a section has received its semester total for a subject, further repeats
+   of that subject are not emitted,
+ - subjects that end the calendar short of their total are reported as shortfalls.
+Expanded keys keep the (sid, subj, week, day, start_period) shape, with week now a
+calendar week, so outputs.expand_and_write_outputs consumes them unchanged.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger("src.timetable.template")
+logger.setLevel(logging.INFO)
+
+
+def calendar_working_dates(teaching_calendar: List[List[Dict[str, Any]]]) -> List[str]:
+    """Flatten the calendar so that working_dates[w * days_per_week + d] is the date of (w, d)."""
+    return [day["date"] for week in teaching_calendar for day in week]
+
+
+def expand_weekly_template(
+    assigned_keys: List[Tuple],
+    assignment_meta: Dict[Tuple, Tuple],
+    teaching_calendar: List[List[Dict[str, Any]]],
+    cycle_weeks: int,
+    subject_periods_map: Dict[str, int],
+) -> Dict[str, Any]:
+    """
+    Returns:
+      - assigned: expanded start-keys over calendar weeks
+      - assignment_meta: meta for the expanded keys
+      - working_dates: flattened calendar dates for outputs
+      - exceptions: per dropped (week, date) -> reason, dropped session count, sections
+      - shortfalls: (section, subject) pairs delivered below their semester total
+    """
+    cycle_weeks = max(1, int(cycle_weeks))
+
+    # template week -> sessions ordered by (day, period)
+    by_template_week: Dict[int, List[Tuple]] = defaultdict(list)
+    for key in assigned_keys:
+        by_template_week[key[2]].append(key)
+    for sessions in by_template_week.values():
+        sessions.sort(key=lambda k: (k[3], k[4], k[0], k[1]))
+
+    expanded: List[Tuple] = []
+    expanded_meta: Dict[Tuple, Tuple] = {}
+    delivered: Dict[Tuple[str, str], int] = defaultdict(int)
+    dropped: Dict[Tuple[int, str], Dict[str, Any]] = {}
+
+    for week_idx, week in enumerate(teaching_calendar):
+        for key in by_template_week.get(week_idx % cycle_weeks, []):
+            sid, subj_id, _, d, p = key
+            meta = assignment_meta.get(key)
+            if meta is None or d >= len(week):
+                continue
+            length = meta[3]
+            day = week[d]
+            if not day["teachable"]:
+                exc = dropped.setdefault((week_idx, day["date"]), {
+                    "week": week_idx,
+                    "template_week": week_idx % cycle_weeks,
+                    "date": day["date"],
+                    "reason": day["reason"],
+                    "dropped_sessions": 0,
+                    "sections": set(),
+                })
+                exc["dropped_sessions"] += 1
+                exc["sections"].add(sid)
+                continue
+            required = int(subject_periods_map.get(subj_id, 0))
+            if delivered[(sid, subj_id)] >= required:
+                continue
+            new_key = (sid, subj_id, week_idx, d, p)
+            expanded.append(new_key)
+            expanded_meta[new_key] = meta
+            delivered[(sid, subj_id)] += length
+
+    exceptions = []
+    for _, exc in sorted(dropped.items(), key=lambda kv: kv[0]):
+        exc["sections"] = sorted(exc["sections"])
+        exceptions.append(exc)
+
+    shortfalls = []
+    for (sid, subj_id) in sorted({(k[0], k[1]) for k in assigned_keys}):
+        required = int(subject_periods_map.get(subj_id, 0))
+        if delivered[(sid, subj_id)] < required:
+            shortfalls.append({
+                "section": sid,
+                "subject": subj_id,
+                "required": required,
+                "delivered": delivered[(sid, subj_id)],
+            })
+
+    logger.info("Expanded %d template sessions over %d calendar weeks -> %d sessions "
+                "(%d exception days, %d shortfalls)",
+                len(assigned_keys), len(teaching_calendar), len(expanded), len(exceptions), len(shortfalls))
+
+    return {
+        "assigned": expanded,
+        "assignment_meta": expanded_meta,
+        "working_dates": calendar_working_dates(teaching_calendar),
+        "exceptions": exceptions,
+        "shortfalls": shortfalls,
+    }
@@ -0,0 +1,353 @@
+"""
+twolevel.py - two-level solve: weekly quota master problem plus per-week slot assignment.
+
+The semester totals in sec_sub_periods_map are the only thing that couples the weeks of
+build_cp_model (every other constraint lives inside one slot or one day). Here they are
+decided first and the weeks are then solved independently:
+ 1. plan_weekly_quotas: a small CP-SAT model picks how many blocks of each (section,
+    subject) go into each calendar week. It keeps every weekly total inside the week's
+    section / faculty / room / lab-room capacity, gives each elective option one count
+    for all of its virtual copies, prefers at most one theory start per teachable day
+    (the solver's theory-spread preference) and otherwise follows each week's share of
+    teachable slots.
+ 2. solve_weeks: every week is a one-week build_cp_model whose totals are fixed by
+    normalized["pair_quotas"], seeded by the greedy heuristic and solved in a process
+    pool.
+Week-local keys are shifted back to calendar weeks and merged into the runner / outputs
+shapes decompose.solve_components uses. A week that does not solve makes the merged
+status non-feasible; the master only checks necessary capacity conditions, so a week
+that is INFEASIBLE under its quota split proves nothing about the calendar: the run is
+then UNKNOWN with the failing weeks listed. Only the master's own INFEASIBLE is a proof.
+"""
+
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from ortools.sat.python import cp_model
+
+from src.timetable import decompose, greedy, solver, warmstart
+
+logger = logging.getLogger("src.timetable.twolevel")
+logger.setLevel(logging.INFO)
+
+# master objective weights: theory starts beyond one per teachable day, then distance from the week's share
+SPREAD_WEIGHT = 10
+SHARE_WEIGHT = 1
+
+
+def _planning_units(normalized: Dict[str, Any], inputs: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    One planning unit per real (section, subject) and per elective option; an option's
+    virtual copies share one weekly count, as they share the solver's master variables.
+    """
+    subjects_lookup = {s.id: s for s in inputs.get("subjects_master", []) or []}
+    periods_map = normalized.get("sec_sub_periods_map", {})
+    room_of = normalized.get("section_classroom_map", {})
+
+    units: Dict[Tuple, Dict[str, Any]] = {}
+    for sec in normalized.get("normalized_sections", []):
+        virtual = getattr(sec, "is_virtual", False) and getattr(sec, "elective_group", None)
+        for subj in sec.subjects:
+            fac = getattr(subj, "assigned_faculty_id", None)
+            if not fac:
+                continue
+            is_lab = bool(getattr(subj, "is_lab", False))
+            if not is_lab and subj.id in subjects_lookup:
+                is_lab = bool(getattr(subjects_lookup[subj.id], "is_lab", False))
+            key = (sec.semester, sec.elective_group, subj.id) if virtual else (sec.id, subj.id)
+            unit = units.setdefault(key, {
+                "key": key,
+                "subject": subj.id,
+                "semester": sec.semester,
+                "group": sec.elective_group if virtual else None,
+                "length": 2 if is_lab else 1,
+                "periods": int(periods_map.get(subj.id, 0)),
+                "members": [],
+            })
+            unit["members"].append((sec.id, fac, room_of.get(sec.id)))
+    return [u for u in units.values() if u["periods"] > 0]
+
+
+def plan_weekly_quotas(
+    normalized: Dict[str, Any],
+    inputs: Dict[str, Any],
+    periods_per_day: int = 8,
+    days_per_week: int = 6,
+    default_weeks: int = 19,
+    lab_room_capacity: int = 2,
+    time_limit: int = 30,
+    num_workers: int = 8,
+) -> Dict[str, Any]:
+    """
+    Solve the weekly quota master problem.
+
+    Returns a dict with:
+      - status: CP-SAT status name
+      - weeks: number of calendar weeks planned
+      - quotas: per week, (sid, subj) -> periods (the week's normalized["pair_quotas"])
+      - week_periods: teachable periods per week
+      - spread_excess: theory starts planned beyond one per teachable day
+    """
+    calendar = solver.planning_calendar(normalized, days_per_week, default_weeks)
+    available = solver.calendar_availability(calendar, days_per_week, periods_per_day)
+    weeks = len(calendar)
+    week_periods = available.sum(axis=(1, 2)).tolist()
+    week_days = available.any(axis=2).sum(axis=1).tolist()
+    week_starts = {length: solver.start_availability(available, length).sum(axis=(1, 2)).tolist() for length in (1, 2)}
+    total_starts = {length: max(1, sum(counts)) for length, counts in week_starts.items()}
+
+    units = _planning_units(normalized, inputs)
+    model = cp_model.CpModel()
+    x = {}
+    for i, unit in enumerate(units):
+        length = unit["length"]
+        blocks = math.ceil(unit["periods"] / length)
+        for w in range(weeks):
+            cap = min(week_starts[length][w], week_periods[w] // length)
+            x[i, w] = model.NewIntVar(0, cap, f"blocks_{i}_w{w}")
+        # the week quotas add up to the semester total, as in build_cp_model
+        model.Add(sum(length * x[i, w] for w in range(weeks)) == unit["periods"])
+        unit["blocks"] = blocks
+
+    semester_of = {u["key"][0]: u["semester"] for u in units if u["group"] is None}
+    penalties = []
+    for w in range(weeks):
+        load: Dict[Tuple[str, Any], List] = {}
+        real_starts: Dict[str, List] = {}
+        group_starts: Dict[Tuple, List] = {}
+        lab_periods = []
+        for i, unit in enumerate(units):
+            length = unit["length"]
+            for sid, fac, room in unit["members"]:
+                for kind, entity in (("section", sid), ("faculty", fac), ("room", room)):
+                    if entity is not None:
+                        load.setdefault((kind, entity), []).append(length * x[i, w])
+                if length == 2:
+                    lab_periods.append(2 * x[i, w])
+            if unit["group"] is None:
+                real_starts.setdefault(unit["key"][0], []).append(x[i, w])
+            else:
+                group_starts.setdefault((unit["semester"], unit["group"]), []).append(x[i, w])
+
+            if length == 1:
+                # theory spread: one start per teachable day before anything is penalised
+                excess = model.NewIntVar(0, week_periods[w], f"spread_{i}_w{w}")
+                model.Add(x[i, w] - week_days[w] <= excess)
+                penalties.append(SPREAD_WEIGHT * excess)
+            share = round(unit["blocks"] * week_starts[length][w] / total_starts[length])
+            dev = model.NewIntVar(0, week_periods[w] + unit["blocks"], f"share_dev_{i}_w{w}")
+            model.AddAbsEquality(dev, x[i, w] - share)
+            penalties.append(SHARE_WEIGHT * dev)
+
+        # weekly capacity of every section, faculty and room, and of the shared lab rooms
+        for terms in load.values():
+            model.Add(sum(terms) <= week_periods[w])
+        if lab_periods:
+            model.Add(sum(lab_periods) <= lab_room_capacity * week_periods[w])
+        # an elective option's start blocks the real sections of its semester at that start, and
+        # the options of a group never share a start
+        for (semester, group), starts in group_starts.items():
+            model.Add(sum(starts) <= week_starts[1][w])
+            for sid, own in real_starts.items():
+                if semester_of.get(sid) == semester:
+                    model.Add(sum(own) + sum(starts) <= week_starts[1][w])
+
+    model.Minimize(sum(penalties))
+    logger.info("Weekly quota master: %d planning units x %d weeks (%d teachable periods)",
+                len(units), weeks, sum(week_periods))
+
+    cp = cp_model.CpSolver()
+    cp.parameters.max_time_in_seconds = time_limit
+    cp.parameters.num_search_workers = num_workers
+    status = cp.Solve(model)
+    status_name = cp.StatusName(status)
+    logger.info("Weekly quota master finished: status=%s objective=%s in %.2fs", status_name,
+                cp.ObjectiveValue() if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None, cp.WallTime())
+
+    quotas: List[Dict[Tuple[str, str], int]] = [{} for _ in range(weeks)]
+    spread_excess = 0
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        for i, unit in enumerate(units):
+            for w in range(weeks):
+                blocks = cp.Value(x[i, w])
+                for sid, _, _ in unit["members"]:
+                    quotas[w][(sid, unit["subject"])] = unit["length"] * blocks
+                if unit["length"] == 1:
+                    spread_excess += max(0, blocks - week_days[w])
+    return {
+        "status": status_name,
+        "weeks": weeks,
+        "quotas": quotas,
+        "week_periods": week_periods,
+        "spread_excess": spread_excess,
+    }
+
+
+def week_normalized(normalized: Dict[str, Any], week: List[Dict[str, Any]], quotas: Dict[Tuple[str, str], int]
+                    ) -> Dict[str, Any]:
+    """Shallow copy of `normalized` for a one-week build with fixed per-pair totals."""
+    sub = dict(normalized)
+    sub["teaching_calendar"] = [week] if normalized.get("teaching_calendar") else []
+    sub["working_weeks"] = 1
+    sub["pair_quotas"] = quotas
+    return sub
+
+
+def _solve_week(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Process-pool worker: build, greedy-seed and solve one week, return picklable results."""
+    t0 = time.perf_counter()
+    model, meta = solver.build_cp_model(task["normalized"], task["inputs"], **task["build_kwargs"])
+    build_seconds = time.perf_counter() - t0
+    if task.get("hint_keys"):
+        # the previous timetable's keys of this week, already shifted to week 0
+        warmstart.apply_hints(model, meta, task["hint_keys"])
+    else:
+        seed, _ = greedy.greedy_assign(task["normalized"], meta)
+        if seed:
+            warmstart.apply_hints(model, meta, seed, source="greedy")
+
+    cp = cp_model.CpSolver()
+    cp.parameters.max_time_in_seconds = task["time_limit"]
+    cp.parameters.num_search_workers = task["num_workers"]
+    status = cp.Solve(model)
+
+    week = task["week"]
+    out = {
+        "week": week,
+        "status": cp.StatusName(status),
+        "objective": None,
+        "assigned": [],
+        "assignment_meta": {},
+        "build_seconds": round(build_seconds, 3),
+        "solve_seconds": round(cp.WallTime(), 3),
+        "variables": len(model.Proto().variables),
+        "section_faculty_map": meta.get("section_faculty_map", {}),
+        "constraint_flags": solver.constraint_flags(meta),
+    }
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        out["objective"] = cp.ObjectiveValue()
+        # the week was modelled as week 0: shift its keys back onto the calendar week
+        for key in solver.masked_keys(meta, solver.solution_mask(cp.ResponseProto().solution, meta)):
+            sid, subj, _, d, p = key
+            out["assigned"].append((sid, subj, week, d, p))
+            out["assignment_meta"][(sid, subj, week, d, p)] = meta["assignment_meta"][key]
+    return out
+
+
+def solve_weeks(
+    normalized: Dict[str, Any],
+    inputs: Dict[str, Any],
+    time_limit: int = 60,
+    num_workers: int = 8,
+    max_processes: Optional[int] = None,
+    master_time_limit: int = 30,
+    periods_per_day: int = 8,
+    days_per_week: int = 6,
+    default_weeks: int = 19,
+    lab_room_capacity: int = 2,
+    hint_keys: Optional[List[Tuple]] = None,
+    **build_kwargs,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Plan weekly quotas, solve every week in a process pool and stitch the weeks together.
+
+    time_limit applies to each week. With `hint_keys` (a previous timetable's start-keys)
+    each week is hinted from its own keys instead of the greedy seed. Returns (result, meta) in the shapes
+    runner.write_solution uses, like decompose.solve_components.
+    """
+    if build_kwargs.get("weekly_template"):
+        raise ValueError("two-level solving plans the full calendar; it cannot be combined with weekly_template")
+    build_kwargs = dict(build_kwargs, periods_per_day=periods_per_day, days_per_week=days_per_week,
+                        lab_room_capacity=lab_room_capacity)
+
+    plan = plan_weekly_quotas(normalized, inputs, periods_per_day=periods_per_day, days_per_week=days_per_week,
+                              default_weeks=default_weeks, lab_room_capacity=lab_room_capacity,
+                              time_limit=master_time_limit, num_workers=num_workers)
+    calendar = solver.planning_calendar(normalized, days_per_week, default_weeks)
+    meta: Dict[str, Any] = {
+        "assignment_meta": {},
+        "section_faculty_map": {},
+        "section_classroom_map": normalized.get("section_classroom_map", {}),
+        "subject_periods_map": normalized.get("sec_sub_periods_map", {}),
+        "teaching_calendar": normalized.get("teaching_calendar", []),
+        "working_dates": [day["date"] for week in calendar for day in week[:days_per_week]]
+        if normalized.get("teaching_calendar") else [],
+        "days": list(range(days_per_week)),
+        "weekly_template": None,
+        "backend": build_kwargs.get("backend", "boolean"),
+        "elective_masters": any(getattr(s, "is_virtual", False) for s in normalized.get("normalized_sections", [])),
+    }
+    master = {k: plan[k] for k in ("status", "weeks", "week_periods", "spread_excess")}
+    if plan["status"] not in ("OPTIMAL", "FEASIBLE"):
+        # the master caps every week's section / faculty / room totals
+        meta.update({name: True for name in solver.OCCUPANCY_FAMILIES})
+        result = {"status": "INFEASIBLE" if plan["status"] == "INFEASIBLE" else plan["status"],
+                  "assigned": [], "objective": None, "violations": 0, "master": master, "weeks": [],
+                  "infeasible_weeks": []}
+        return result, meta
+
+    hints_of_week: Dict[int, List[Tuple]] = {}
+    for sid, subj, w, d, p in hint_keys or ():
+        hints_of_week.setdefault(int(w), []).append((sid, subj, 0, d, p))
+    tasks = [
+        {
+            "week": w,
+            "normalized": week_normalized(normalized, calendar[w], plan["quotas"][w]),
+            "inputs": inputs,
+            "build_kwargs": build_kwargs,
+            "time_limit": time_limit,
+            "hint_keys": hints_of_week.get(w),
+        }
+        for w in range(plan["weeks"])
+        if plan["week_periods"][w] > 0 and any(plan["quotas"][w].values())
+    ]
+    processes = max(1, min(len(tasks), max_processes or os.cpu_count() or 1))
+    for task in tasks:
+        task["num_workers"] = max(1, num_workers // processes)
+    logger.info("Solving %d weeks on %d processes (%d CP-SAT workers each)",
+                len(tasks), processes, max(1, num_workers // processes))
+
+    if processes == 1:
+        parts = [_solve_week(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            parts = list(pool.map(_solve_week, tasks))
+
+    for part in parts:
+        logger.info("Week %d: status=%s objective=%s vars=%d build=%.2fs solve=%.2fs", part["week"], part["status"],
+                    part["objective"], part["variables"], part["build_seconds"], part["solve_seconds"])
+
+    status_name = decompose.merge_status([p["status"] for p in parts]) if parts else "OPTIMAL"
+    infeasible_weeks = [p["week"] for p in parts if p["status"] == "INFEASIBLE"]
+    if status_name == "INFEASIBLE":
+        # only the quota split the master picked is infeasible, not the calendar
+        logger.warning("Weeks %s are infeasible under the master's quotas; reporting UNKNOWN", infeasible_weeks)
+        status_name = "UNKNOWN"
+    feasible = status_name in ("OPTIMAL", "FEASIBLE")
+    objective = sum(p["objective"] or 0 for p in parts) if feasible else None
+
+    assigned: List[Tuple] = []
+    for part in parts:
+        assigned.extend(part["assigned"])
+        meta["assignment_meta"].update(part["assignment_meta"])
+        meta["section_faculty_map"].update(part["section_faculty_map"])
+        for name, present in part["constraint_flags"].items():
+            meta[name] = meta.get(name, False) or present
+
+    result = {
+        "status": status_name,
+        "assigned": assigned if feasible else [],
+        "objective": objective,
+        "violations": int(objective) if objective is not None else 0,
+        "master": master,
+        "weeks": [
+            {k: p[k] for k in ("week", "status", "objective", "variables", "build_seconds", "solve_seconds")}
+            for p in parts
+        ],
+        "infeasible_weeks": infeasible_weeks,
+    }
+    return result, meta
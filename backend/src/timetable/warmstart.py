@@ -0,0 +1,125 @@
+"""
+warmstart.py - seed CP-SAT with a previous timetable via solution hints.
+
+Accepted sources:
+ - assignments.json written by the runner: {"assigned": [[sid, subj, w, d, p], ...], ...}
+ - a timetable_section.json from outputs: section -> list of period entries; lab blocks
+   are re-assembled from consecutive periods of the same lab subject.
+ - a solutions.jsonl streamed by runner.SolutionStreamer: the last snapshot is used.
+Previous start-keys are mapped onto the new model's assign_vars (weeks folded into the
+template cycle for weekly-template models) and every start variable is hinted 1 / 0,
+written straight into the proto's solution_hint in one bulk extend.
+Virtual elective copies share their master variable, which is hinted on if any copy was.
+"""
+
+import json
+import logging
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+logger = logging.getLogger("src.timetable.warmstart")
+logger.setLevel(logging.INFO)
+
+
+def write_assignments(path, keys: Iterable[Tuple], **info) -> None:
+    """Persist solver start-keys in the compact format load_previous_assignments reads."""
+    payload = dict(info)
+    payload["assigned"] = [list(k) for k in keys]
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # write-then-rename so a checkpoint is never left half written
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+    logger.info("Wrote %d assignments to %s", len(payload["assigned"]), path)
+
+
+def _keys_from_section_timetable(section_json: Dict[str, List[Dict[str, Any]]],
+                                 days_per_week: int) -> List[Tuple]:
+    keys = []
+    for sid, entries in section_json.items():
+        by_day_subject: Dict[Tuple[int, str, bool], List[int]] = defaultdict(list)
+        for e in entries:
+            by_day_subject[(e["day_index"], e["subject"], bool(e.get("is_lab")))].append(e["period"])
+        for (day_idx, subj, is_lab), periods in by_day_subject.items():
+            periods = sorted(set(periods))
+            w, d = divmod(day_idx, days_per_week)
+            if not is_lab:
+                keys.extend((sid, subj, w, d, p) for p in periods)
+                continue
+            # labs are 2-period blocks: pair consecutive periods
+            i = 0
+            while i < len(periods):
+                keys.append((sid, subj, w, d, periods[i]))
+                i += 2 if i + 1 < len(periods) and periods[i + 1] == periods[i] + 1 else 1
+    return keys
+
+
+def load_previous_assignments(path, days_per_week: int = 6) -> List[Tuple]:
+    """
+    Read previous start-keys from an assignments.json, a timetable_section.json or a
+    streamed solutions.jsonl (its last snapshot).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if str(path).endswith(".jsonl"):
+            lines = [line for line in f if line.strip()]
+            data = json.loads(lines[-1]) if lines else {"assigned": []}
+        else:
+            data = json.load(f)
+    if isinstance(data, dict) and isinstance(data.get("assigned"), list):
+        keys = [tuple(k) for k in data["assigned"]]
+    elif isinstance(data, dict):
+        keys = _keys_from_section_timetable(data, days_per_week)
+    else:
+        raise ValueError(f"Unrecognised warm-start file format: {path}")
+    logger.info("Loaded %d previous start-keys from %s", len(keys), path)
+    return keys
+
+
+def apply_hints(model: cp_model.CpModel, meta: Dict[str, Any], previous_keys: Iterable[Tuple],
+                source: str = "previous") -> Dict[str, Any]:
+    """
+    Hint every start variable from `previous_keys` and return a fit report:
+    source / previous / matched (still a candidate in the new model) / unmatched counts.
+    """
+    store = meta["candidates"]
+    template_cfg = meta.get("weekly_template")
+    cycle = template_cfg["cycle_weeks"] if template_cfg else None
+
+    previous = set()
+    for k in previous_keys:
+        sid, subj, w, d, p = k
+        if cycle:
+            w = w % cycle
+        previous.add((sid, subj, int(w), int(d), int(p)))
+
+    # one 0/1 value per start variable, written to the proto hint in a single bulk extend;
+    # elective copies share their master variable, which is on if any copy was
+    matched_rows = np.array(sorted(r for r in (store.row(k) for k in previous) if r >= 0), dtype=np.int64)
+    hint_vars = np.unique(store.var)
+    values = np.zeros(len(hint_vars), dtype=np.int64)
+    values[np.searchsorted(hint_vars, store.var[matched_rows])] = 1
+
+    model.ClearHints()
+    hint = model.Proto().solution_hint
+    hint.vars.extend(hint_vars.tolist())
+    hint.values.extend(values.tolist())
+    matched = set(store.iter_keys(matched_rows))
+
+    report = {
+        "source": source,
+        "previous": len(previous),
+        "matched": len(matched),
+        "unmatched": len(previous) - len(matched),
+        "hinted_vars": len(hint_vars),
+    }
+    logger.info("Warm start (%s): %d/%d previous starts still fit the model (%d hinted vars)",
+                source, report["matched"], report["previous"], report["hinted_vars"])
+    meta["warm_start"] = dict(report, hinted_keys=matched)
+    return report
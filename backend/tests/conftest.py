@@ -0,0 +1,45 @@
+import pytest
+
+from src.timetable.models import NormalizedSection, SubjectMaster
+
+
+def _subject(subj_id, hours, is_lab=False, faculty=None):
+    return SubjectMaster(id=subj_id, name=subj_id, totalHours=hours, is_lab=is_lab,
+                         assigned_faculty_id=faculty)
+
+
+@pytest.fixture
+def small_normalized():
+    """Two real sections sharing a lab faculty plus one elective group with two options."""
+    sec_a = NormalizedSection(
+        id="aiml-3a", name="AI&ML 3A", year=3, section="A", semester="3-2", totalStudents=60,
+        subjects=[_subject("MATH", 4, faculty="F1"), _subject("PHY-LAB", 4, is_lab=True, faculty="F3")],
+        mapped_classroom="R1",
+    )
+    sec_b = NormalizedSection(
+        id="aiml-3b", name="AI&ML 3B", year=3, section="B", semester="3-2", totalStudents=60,
+        subjects=[_subject("MATH", 4, faculty="F2"), _subject("PHY-LAB", 4, is_lab=True, faculty="F3")],
+        mapped_classroom="R2",
+    )
+    virtuals = [
+        NormalizedSection(
+            id=f"VIRTUAL-3-2-ELECTIVE I-{subj}", name=f"VIRTUAL-3-2-ELECTIVE I-{subj}", year=3,
+            section=f"ELECTIVE I-{subj}", semester="3-2", totalStudents=30,
+            subjects=[_subject(subj, 2, faculty=fac)], mapped_classroom=room,
+            is_virtual=True, elective_group="ELECTIVE I",
+        )
+        for subj, fac, room in (("EL1", "F4", "R1"), ("EL2", "F5", "R2"))
+    ]
+    sections = [sec_a, sec_b] + virtuals
+    return {
+        "normalized_sections": sections,
+        "sec_sub_periods_map": {"MATH": 4, "PHY-LAB": 4, "EL1": 2, "EL2": 2},
+        "section_classroom_map": {s.id: s.mapped_classroom for s in sections},
+        "working_weeks": 1,
+        "periods_per_day": 4,
+    }
+
+
+@pytest.fixture
+def small_inputs():
+    return {"subjects_master": []}
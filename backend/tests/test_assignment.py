@@ -0,0 +1,100 @@
+import json
+import time
+from datetime import date
+
+from src.timetable import assignment, loader, model_cache, precompute, synthetic
+from src.timetable.models import Faculty, FacultyWorkloadMetrics, NormalizedSection, SubjectMaster
+
+
+def _metrics(fac_id, available):
+    faculty = Faculty(id=fac_id, name=f"Faculty {fac_id}", facultyId=fac_id, department="AIML", qualification="PhD",
+                      contact=None, email=None, status="Active", joiningDate=date(2020, 1, 1), experience=5,
+                      specialization=[], subjects=[], address=None, designations=[])
+    return FacultyWorkloadMetrics(facultyDetails=faculty, periods_available=available, max_possible_periods=0,
+                                  actual_allocated_periods=0)
+
+
+def test_balanced_loads_and_per_section_subjects():
+    # one shared subject list, as precompute builds it for the sections of a semester
+    shared = [SubjectMaster(id="MATH", name="MATH", totalHours=10), SubjectMaster(id="AI", name="AI", totalHours=10)]
+    sections = [NormalizedSection(id=f"s{i}", name=f"s{i}", year=3, section=str(i), semester="3-2", totalStudents=60,
+                                  subjects=shared) for i in range(3)]
+    fac_map = {"A": ["MATH", "AI"], "B": ["MATH"], "C": ["AI"]}
+    periods = {"MATH": 10, "AI": 6}
+
+    loads, report = assignment.balance_faculty_assignment(sections, fac_map, periods,
+                                                          [_metrics(f, 100) for f in "ABC"])
+    assert report["status"] == "OPTIMAL" and report["capped"] and report["pairs"] == 6
+    assert sections[0].subjects[0] is not sections[1].subjects[0]
+    chosen = [(sec.subjects[0].assigned_faculty_id, sec.subjects[1].assigned_faculty_id) for sec in sections]
+    assert all(m in fac_map and "MATH" in fac_map[m] and "AI" in fac_map[a] for m, a in chosen)
+    # 30 MATH + 18 AI periods: the best spread is 16 / 20 / 12 (A: 1 MATH + 1 AI)
+    assert {row["faculty"]: row["periods"] for row in report["table"]} == {"A": 16, "B": 20, "C": 12}
+    assert {m.facultyDetails.id: m.actual_allocated_periods for m in loads} == {"A": 16, "B": 20, "C": 12}
+
+    # a 15-period cap cannot hold 48 periods over three people: assigned uncapped
+    _, report = assignment.balance_faculty_assignment(sections, fac_map, periods, [_metrics(f, 30) for f in "ABC"])
+    assert not report["capped"] and report["max_load"] == 20
+
+
+
+def test_phases_share_one_time_limit(monkeypatch):
+    shared = [SubjectMaster(id="MATH", name="MATH", totalHours=10), SubjectMaster(id="AI", name="AI", totalHours=10)]
+    sections = [NormalizedSection(id=f"s{i}", name=f"s{i}", year=3, section=str(i), semester="3-2", totalStudents=60,
+                                  subjects=shared) for i in range(3)]
+    ends = []
+    solve_phase = assignment._solve_phase
+
+    def slow_phase(model, limit, workers):
+        # a phase that uses most of its budget, as a larger model would
+        ends.append(time.perf_counter() + limit)
+        result = solve_phase(model, limit, workers)
+        time.sleep(0.9 * limit)
+        return result
+
+    monkeypatch.setattr(assignment, "_solve_phase", slow_phase)
+    # a 15-period cap cannot hold: capped solve, uncapped retry and the spreading phase all run
+    started = time.perf_counter()
+    _, report = assignment.balance_faculty_assignment(sections, {"A": ["MATH", "AI"], "B": ["MATH"], "C": ["AI"]},
+                                                      {"MATH": 10, "AI": 6}, [_metrics(f, 30) for f in "ABC"],
+                                                      time_limit=1.0)
+    assert not report["capped"] and len(ends) == 3
+    # no phase may run past the one overall deadline
+    assert max(ends) <= started + 1.0 + 0.01
+
+def test_prepare_balanced_engine(tmp_path):
+    synthetic.generate_inputs(tmp_path / "input", sections_per_semester=3, semesters=("1-2", "3-2"), faculty=10,
+                              seed=7)
+    tank = precompute.prepare(loader.load_all_inputs(str(tmp_path / "input")), outputs_dir=str(tmp_path / "tank"))
+    normalized = precompute.prepare(loader.load_all_inputs(str(tmp_path / "input")),
+                                    outputs_dir=str(tmp_path / "output"), faculty_assignment="balanced")
+
+    def loads(norm):
+        totals = {}
+        for sec in norm["normalized_sections"]:
+            for subj in sec.subjects:
+                assert subj.assigned_faculty_id in norm["fac_sems_sub_map"]
+                assert subj.id in norm["fac_sems_sub_map"][subj.assigned_faculty_id]
+                totals[subj.assigned_faculty_id] = (totals.get(subj.assigned_faculty_id, 0)
+                                                    + norm["sec_sub_periods_map"][subj.id])
+        return totals
+
+    balanced = loads(normalized)
+    assert max(balanced.values()) <= max(loads(tank).values())
+    report = normalized["faculty_assignment"]
+    assert report["max_load"] == max(balanced.values())
+    written = json.loads((tmp_path / "output" / "3-faculty-workload.json").read_text())
+    assert {row["faculty"]: row["periods"] for row in written["table"] if row["periods"]} == balanced
+
+
+def test_prepare_balanced_cache_key_is_stable(tmp_path):
+    synthetic.generate_inputs(tmp_path / "input", sections_per_semester=2, semesters=("3-2",), faculty=6, seed=3)
+    keys = []
+    for run in range(2):
+        inputs = loader.load_all_inputs(str(tmp_path / "input"))
+        normalized = precompute.prepare(inputs, outputs_dir=str(tmp_path / f"out{run}"), faculty_assignment="balanced")
+        assert "seconds" not in normalized["faculty_assignment"]
+        keys.append(model_cache.cache_key(normalized, inputs, periods_per_day=8))
+    assert keys[0] == keys[1]
+    # the timing is still reported next to the workload table
+    assert "seconds" in json.loads((tmp_path / "out0" / "3-faculty-workload.json").read_text())
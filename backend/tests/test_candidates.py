@@ -0,0 +1,67 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from src.timetable import solver
+from src.timetable.candidates import CandidateStore, _KeyMapping
+
+
+def _toy_store():
+    store = CandidateStore(weeks=1, days_per_week=2, periods_per_day=3)
+    store.add_pair("A", "MATH", "F1", "R1", 1, [(0, d, p) for d in range(2) for p in range(3)], list(range(6)))
+    store.add_pair("A", "LAB", "F2", "R1", 2, [(0, d, p) for d in range(2) for p in range(2)], list(range(6, 10)))
+    store.add_pair("B", "MATH", "F1", None, 1, [(0, 1, 2)], [10])
+    return store.freeze()
+
+
+def test_rows_keys_and_slots_round_trip():
+    store = _toy_store()
+    assert len(store) == 11
+    for row in range(len(store)):
+        assert store.row(store.key(row)) == row
+    assert store.row(("A", "LAB", 0, 0, 2)) == -1       # a lab block cannot start in the last period
+    assert store.row(("C", "MATH", 0, 0, 0)) == -1
+    assert store.row(("A", "MATH", 0, 5, 0)) == -1
+
+    lab = store.row(("A", "LAB", 0, 1, 1))
+    assert store.meta_tuple(lab) == ("A", "LAB", "F2", 2)
+    assert store.covers(lab) == [("A", 0, 1, 1), ("A", 0, 1, 2)]
+    # F1 teaches A and B at (0, 1, 2); the unroomed B start is not in the room family
+    assert sorted(store.slot_rows("faculty", "F1", 0, 1, 2)) == [store.row(("A", "MATH", 0, 1, 2)), 10]
+    assert store.slot_rows("room", "R1", 0, 1, 2) == [store.row(("A", "MATH", 0, 1, 2)), lab]
+    assert store.slot_rows("lab", None, 0, 1, 2) == [lab]
+
+    clone = pickle.loads(pickle.dumps(store))
+    assert list(clone.iter_keys()) == list(store.iter_keys())
+    assert np.array_equal(clone.var, store.var)
+
+
+def test_meta_views_match_the_per_key_layout(small_normalized, small_inputs):
+    model, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    keys = list(meta["assign_keys"])
+    assert keys == list(meta["assign_vars"]) and len(set(keys)) == len(keys)
+    assert [meta["assign_vars"][k].Index() for k in keys] == meta["assign_indices"].tolist()
+
+    for key in keys:
+        sid, subj, w, d, p = key
+        _, _, _, length = meta["assignment_meta"][key]
+        assert meta["assign_var_covers"][key] == [(sid, w, d, pp) for pp in range(p, p + length)]
+        assert (w, d, p) in meta["sec_subj_vars"][(sid, subj)]
+
+    # the slot view covers exactly the (key, covered slot) pairs, once each
+    by_slot = {}
+    for key in keys:
+        for slot in meta["assign_var_covers"][key]:
+            by_slot.setdefault(slot, []).append(key)
+    assert {slot: sorted(v) for slot, v in meta["slot_index"]["section"].items()} == \
+        {slot: sorted(v) for slot, v in by_slot.items()}
+    assert ("aiml-3a", "NOPE", 0, 0, 0) not in meta["assign_vars"]
+
+
+def test_key_mapping_views_must_define_values():
+    class NoValues(_KeyMapping):
+        pass
+
+    with pytest.raises(TypeError):
+        NoValues(_toy_store())
@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pytest
+
+import timetable_generator
+from src.timetable import capacity, runner, solver, synthetic
+from src.timetable.models import SubjectMaster
+
+KWARGS = dict(periods_per_day=4, days_per_week=5)
+
+
+def test_small_inputs_fit(small_normalized, small_inputs):
+    report = capacity.check_capacity(small_normalized, small_inputs, **KWARGS)
+    assert report["feasible"] and report["max_flow"] == report["demand"] > 0
+    assert report["short_pairs"] == [] and report["cut"] == []
+
+
+def test_overloaded_faculty_is_the_cut(small_normalized, small_inputs):
+    # F1 teaches MATH in both sections: 22 periods, 20 slots
+    for sec in small_normalized["normalized_sections"][:2]:
+        sec.subjects[0].assigned_faculty_id = "F1"
+    small_normalized["sec_sub_periods_map"]["MATH"] = 11
+    report = capacity.check_capacity(small_normalized, small_inputs, **KWARGS)
+    assert not report["feasible"] and report["max_flow"] < report["demand"]
+    assert {"kind": "faculty", "entity": "F1"}.items() <= report["cut"][0].items()
+    assert {(p["section"], p["subject"]) for p in report["short_pairs"]} <= {("aiml-3a", "MATH"), ("aiml-3b", "MATH")}
+    assert report["short_pairs"]
+
+
+def test_lab_pairs_keep_their_faculty(small_normalized, small_inputs):
+    # F3 has 24 lab periods for 20 slots while F6 (one short lab) is mostly idle: F6's days
+    # must not absorb F3's labs
+    small_normalized["normalized_sections"][1].subjects.append(
+        SubjectMaster(id="CHEM-LAB", name="CHEM-LAB", totalHours=2, is_lab=True, assigned_faculty_id="F6"))
+    small_normalized["sec_sub_periods_map"].update({"PHY-LAB": 12, "CHEM-LAB": 2})
+    report = capacity.check_capacity(small_normalized, small_inputs, **KWARGS)
+    assert not report["feasible"]
+    assert report["lab_demand"] == 26 and report["lab_max_flow"] == 22
+    assert {e["entity"] for e in report["cut"] if e["kind"] == "faculty" or e["kind"] == "lab_faculty"} == {"F3"}
+    assert {(p["section"], p["subject"]) for p in report["short_pairs"]} <= {("aiml-3a", "PHY-LAB"),
+                                                                          ("aiml-3b", "PHY-LAB")}
+
+
+def test_lab_periods_per_day():
+    available = np.array([[[True, True, True, False, True, True]], [[False, True, False, True, True, True]]])
+    assert capacity.lab_periods_per_day(available).tolist() == [4, 2]
+
+
+@pytest.mark.parametrize("mode", ["rolling", "two_level", "full", "weekly_template"])
+def test_generator_stops_unless_weekly_template(mode, tmp_path, monkeypatch):
+    synthetic.generate_inputs(tmp_path / "input", sections_per_semester=1, semesters=("3-2",), faculty=4, seed=1)
+    monkeypatch.setattr(capacity, "check_capacity",
+                        lambda *a, **k: {"feasible": False, "max_flow": 1, "demand": 2, "cut": []})
+    calls = []
+
+    def fake_run(name, pair=True):
+        def run(*args, **kwargs):
+            calls.append(name)
+            return ({"status": "INFEASIBLE"}, {}) if pair else {"status": "INFEASIBLE"}
+        return run
+
+    monkeypatch.setattr(runner, "run_rolling", fake_run("rolling"))
+    monkeypatch.setattr(runner, "run_two_level", fake_run("two_level"))
+    monkeypatch.setattr(solver, "build_cp_model", fake_run("weekly_template"))
+    monkeypatch.setattr(runner, "run_solver", fake_run("solve", pair=False))
+    timetable_generator.generate(str(tmp_path / "input"), str(tmp_path / "output"), model_cache_dir=None,
+                                 rolling_window=2 if mode == "rolling" else None, two_level=mode == "two_level",
+                                 weekly_template=mode == "weekly_template", greedy_seed=False, diagnose_level=None)
+    if mode == "weekly_template":
+        # the template cycle is not the full calendar: only a warning
+        assert calls == ["weekly_template", "solve"]
+    else:
+        # rolling windows and the two-level master must deliver the same full-calendar totals
+        assert calls == []
+        written = json.loads((tmp_path / "output" / "diagnostics.json").read_text())
+        assert written["status"] == "CAPACITY_INFEASIBLE"
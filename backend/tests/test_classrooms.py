@@ -0,0 +1,84 @@
+import json
+
+from src.timetable import classrooms, loader, model_cache, precompute, synthetic
+from src.timetable.models import Classroom, Section
+
+
+def _room(room_id, capacity, room_type="classroom", department="AIML", building="Main", status="active"):
+    return Classroom(id=room_id, name=room_id, number=room_id, type=room_type, capacity=capacity, floor=1,
+                     building=building, department=department, description=None, amenities=[], status=status)
+
+
+def _section(sid, students, semester="3-2"):
+    return Section(id=sid, name=sid, year=3, section=sid, semester=semester, totalStudents=students)
+
+
+def test_best_fit_preferences_and_unassigned():
+    rooms = [
+        _room("big", 120), _room("mid", 70), _room("small", 40), _room("cse", 60, department="CSE"),
+        _room("lab", 60, room_type="lab"), _room("closed", 60, status="inactive"), _room("hall", 200),
+    ]
+    sections = [_section("a", 60), _section("b", 35), _section("c", 100), _section("x", 500, semester="1-2")]
+    virtual = [
+        {"id": "V-EL1", "semester": "3-2", "elective_group": "E", "totalStudents": 30},
+        {"id": "V-EL2", "semester": "3-2", "elective_group": "E", "totalStudents": 65},
+        {"id": "V-EL3", "semester": "3-2", "elective_group": "E", "totalStudents": 110},
+    ]
+    mapping, report = classrooms.allocate_classrooms(sections, virtual, rooms, department="aiml")
+
+    # smallest AIML room that seats each real section; the CSE room only when no AIML room fits
+    assert {sid: mapping[sid] for sid in "abcx"} == {"a": "mid", "b": "small", "c": "big", "x": None}
+    # options reuse the semester's rooms when they fit (largest option first), else a free room
+    assert mapping["V-EL3"] == "big" and mapping["V-EL2"] == "mid" and mapping["V-EL1"] == "small"
+    assert list(mapping) == ["a", "b", "c", "x", "V-EL1", "V-EL2", "V-EL3"]
+    assert virtual[0]["mapped_classroom"] == "small"
+
+    assert report["unassigned"] == [{"section": "x", "semester": "1-2", "students": 500, "virtual": False,
+                                     "reason": "no free room seats 500 (largest free: 200)"}]
+    assert report["assigned"] == 6 and report["rooms"] == 5 and report["rooms_used"] == 3
+    assert report["wasted_seats"] == (70 - 60) + (40 - 35) + (120 - 100) + (40 - 30) + (70 - 65) + (120 - 110)
+    assert report["preferred"] == 6
+
+
+def test_room_index_falls_back_to_other_tiers():
+    index = classrooms.RoomIndex([_room("aiml", 60), _room("cse-big", 100, department="CSE"),
+                                  _room("cse", 60, department="CSE")], department="AIML")
+    assert index.take(80) == "cse-big"
+    assert index.take(50) == "aiml"
+    assert index.take(50) == "cse"
+    assert index.take(1) is None and len(index) == 0
+
+
+def test_prepare_best_fit_cache_key_is_stable(tmp_path):
+    synthetic.generate_inputs(tmp_path / "input", sections_per_semester=2, semesters=("3-2",), faculty=6, seed=3)
+    keys = []
+    for run in range(3):
+        inputs = loader.load_all_inputs(str(tmp_path / "input"))
+        normalized = precompute.prepare(inputs, outputs_dir=str(tmp_path / f"out{run}"),
+                                        classroom_allocation="best_fit")
+        assert "seconds" not in normalized["classroom_allocation"]
+        keys.append(model_cache.cache_key(normalized, inputs, periods_per_day=8))
+    assert len(set(keys)) == 1
+    assert "seconds" in json.loads((tmp_path / "out0" / "4-classroom-allocation.json").read_text())
+
+
+def test_prepare_prefers_the_given_building(tmp_path):
+    synthetic.generate_inputs(tmp_path / "input", sections_per_semester=2, semesters=("3-2",), faculty=6, seed=3)
+    rooms_file = tmp_path / "input" / "classrooms.json"
+    rooms = json.loads(rooms_file.read_text())
+    classrooms_only = [r for r in rooms if r["type"] == "classroom"]
+    # the last two classrooms move to the annex
+    annex = {r["id"] for r in classrooms_only[-2:]}
+    for r in rooms:
+        if r["id"] in annex:
+            r["building"] = "Annex"
+    rooms_file.write_text(json.dumps(rooms))
+
+    def real_rooms(**kwargs):
+        inputs = loader.load_all_inputs(str(tmp_path / "input"))
+        normalized = precompute.prepare(inputs, outputs_dir=str(tmp_path / "output"), classroom_allocation="best_fit",
+                                        **kwargs)
+        return {sec.mapped_classroom for sec in normalized["normalized_sections"] if not sec.is_virtual}
+
+    assert not real_rooms() & annex
+    assert real_rooms(preferred_building="annex") == annex
@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+
+from src.timetable import conflicts, runner, solver
+
+
+def test_verify_flags_double_bookings():
+    assignment_meta = {
+        ("s1", "M", 0, 0, 1): ("s1", "M", "F1", 1),
+        ("s2", "M", 0, 0, 1): ("s2", "M", "F1", 1),
+        ("s1", "L", 0, 1, 0): ("s1", "L", "F2", 2),
+        ("s2", "L", 0, 1, 1): ("s2", "L", "F3", 2),
+        ("s3", "L", 0, 1, 1): ("s3", "L", "F4", 2),
+    }
+    available = np.ones((1, 2, 4), dtype=bool)
+    available[0, 0, 1] = False
+    report = conflicts.verify_timetable(list(assignment_meta) + [("s9", "X", 0, 0, 0)], assignment_meta,
+                                        {"s1": "R1", "s2": "R2", "s3": "R1"}, days_per_week=2, periods_per_day=4,
+                                        available=available)
+    assert not report["ok"]
+    assert report["sessions"] == 5 and report["periods"] == 8 and report["unverified"] == 1
+    # F1 at d0 p1; R1 at d1 p1 (s1 lab and s3 lab)
+    assert report["clashes"] == {"section": 0, "faculty": 1, "room": 1}
+    assert report["lab_overflow"] == 1 and report["unavailable"] == 1
+    faculty = next(e for e in report["examples"] if e["family"] == "faculty")
+    assert (faculty["entity"], faculty["week"], faculty["day"], faculty["period"]) == ("F1", 0, 0, 1)
+    assert sorted(faculty["sessions"]) == [["s1", "M", 0, 0, 1], ["s2", "M", 0, 0, 1]]
+
+
+def test_prescreen_drops_booked_starts_and_solution_verifies(small_normalized, small_inputs, tmp_path):
+    # F1 (aiml-3a MATH) is booked on day 0 periods 0-1, room R1 (aiml-3a, EL1) on day 1 period 0
+    small_normalized["occupied"] = {"faculty": {"F1": [(0, 0), (0, 1)]}, "room": {"R1": [(1, 0)]}}
+    model, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    starts = meta["sec_subj_vars"]
+    assert not {(0, 0, 0), (0, 0, 1), (0, 1, 0)} & set(starts[("aiml-3a", "MATH")])
+    assert (0, 1, 0) not in starts[("aiml-3a", "PHY-LAB")]
+    assert (0, 1, 0) not in starts[("VIRTUAL-3-2-ELECTIVE I-EL1", "EL1")]
+    assert (0, 0, 0) in starts[("aiml-3b", "MATH")]
+    # 3 MATH starts, 1 lab start, 1 elective master start
+    assert meta["prescreen"] == {"busy_entities": {"faculty": 1, "room": 1}, "pruned_starts": 5,
+                                 "dropped_bookings": {"faculty": 0, "room": 0}}
+
+    result = runner.run_solver(model, meta, output_dir=str(tmp_path), time_limit=20, num_workers=1)
+    assert result["status"] == "OPTIMAL"
+    assert result["verification"]["ok"] and result["verification"]["sessions"] == len(result["assigned"])
+    summary = json.loads((tmp_path / "summary.json").read_text())
+    assert summary["verification"]["clashes"] == {"section": 0, "faculty": 0, "room": 0}
+
+
+def test_bookings_outside_the_calendar_are_counted(small_normalized, small_inputs, caplog):
+    # dates from another calendar and a period past the end of the day cannot be placed
+    small_normalized["occupied"] = {"faculty": {"F1": [("1999-01-04", 0), ("1999-01-05", 1), (0, 9)]},
+                                    "room": {"R1": [(1, 0)]}}
+    _, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    assert meta["prescreen"]["dropped_bookings"] == {"faculty": 3, "room": 0}
+    assert meta["prescreen"]["busy_entities"] == {"room": 1}
+    assert "Dropped 3 of 3 booked faculty periods" in caplog.text
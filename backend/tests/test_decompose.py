@@ -0,0 +1,50 @@
+from src.timetable import decompose
+from src.timetable.models import NormalizedSection, SubjectMaster
+
+
+def _add_independent_section(normalized, sid="aiml-1a", semester="1-2", fac="F9", room="R9", is_lab=False):
+    sec = NormalizedSection(
+        id=sid, name=sid, year=1, section="A", semester=semester, totalStudents=60,
+        subjects=[SubjectMaster(id="CHEM", name="CHEM", totalHours=2, is_lab=is_lab, assigned_faculty_id=fac)],
+        mapped_classroom=room,
+    )
+    normalized["normalized_sections"].append(sec)
+    normalized["section_classroom_map"][sid] = room
+    normalized["sec_sub_periods_map"]["CHEM"] = 2
+
+
+def test_components_follow_shared_resources(small_normalized, small_inputs):
+    _add_independent_section(small_normalized)
+    components = decompose.find_components(small_normalized, small_inputs)
+    # 3-2 sections are tied by the lab faculty, rooms and the elective semester
+    assert sorted(map(sorted, components)) == sorted([
+        sorted(s.id for s in small_normalized["normalized_sections"] if s.semester == "3-2"),
+        ["aiml-1a"],
+    ])
+
+
+def test_lab_capacity_couples_or_splits(small_normalized, small_inputs):
+    _add_independent_section(small_normalized, is_lab=True)
+    assert len(decompose.find_components(small_normalized, small_inputs, couple_labs=True)) == 1
+
+    components = decompose.find_components(small_normalized, small_inputs, couple_labs=False)
+    assert len(components) == 2
+    assert decompose.apportion_lab_capacity(components, small_normalized, small_inputs, 2) == [1, 1]
+    assert decompose.apportion_lab_capacity(components, small_normalized, small_inputs, 1) is None
+
+
+def test_solve_components_merges_partial_timetables(small_normalized, small_inputs):
+    _add_independent_section(small_normalized)
+    result, meta = decompose.solve_components(
+        small_normalized, small_inputs, time_limit=10, num_workers=2, max_processes=2,
+        periods_per_day=4, days_per_week=3,
+    )
+    assert result["status"] in ("OPTIMAL", "FEASIBLE")
+    assert len(result["components"]) == 2
+    assert {k[0] for k in result["assigned"]} >= {"aiml-1a", "aiml-3a", "aiml-3b"}
+    assert set(meta["assignment_meta"]) == set(result["assigned"])
+    assert meta["days"] == [0, 1, 2]
+    # runner.write_solution verifies with the build parameters, not its defaults
+    assert meta["periods_per_day"] == 4 and meta["lab_room_capacity"] == 2
+    # write_diagnostics sees the constraint families although no occupancy arrays are merged
+    assert meta["occupancy_faculty"] is True and meta["occupancy_room"] is True
@@ -0,0 +1,59 @@
+import json
+
+from src.timetable import diagnostics, runner, solver
+
+KWARGS = dict(periods_per_day=4, days_per_week=5)
+
+
+def _overload_f1(normalized):
+    """F1 teaches MATH in both sections: 22 periods for 20 slots, each section alone still fits."""
+    for sec in normalized["normalized_sections"][:2]:
+        sec.subjects[0].assigned_faculty_id = "F1"
+    normalized["sec_sub_periods_map"]["MATH"] = 11
+
+
+def test_entity_core_names_faculty_and_sections(small_normalized, small_inputs):
+    _overload_f1(small_normalized)
+    report = diagnostics.find_conflicts(small_normalized, small_inputs, time_limit=30, num_workers=1, **KWARGS)
+    assert report["status"] == "INFEASIBLE" and report["minimal"]
+    assert {(c["family"], str(c["entity"])) for c in report["core"]} == {
+        ("faculty_no_double", "F1"),
+        ("subject_totals", "('aiml-3a', 'MATH')"),
+        ("subject_totals", "('aiml-3b', 'MATH')"),
+    }
+    assert report["culprits"]["faculty"] == ["F1"]
+    assert report["culprits"]["sections"] == ["aiml-3a", "aiml-3b"]
+    assert report["culprits"]["subjects"] == ["MATH"]
+
+
+def test_family_level_and_feasible_model(small_normalized, small_inputs, tmp_path):
+    report = diagnostics.find_conflicts(small_normalized, small_inputs, level="family", time_limit=30,
+                                        num_workers=1, **KWARGS)
+    assert report["status"] == "OPTIMAL" and report["core"] == []
+
+    _overload_f1(small_normalized)
+    _, meta = solver.build_cp_model(small_normalized, small_inputs, diagnostics="family", **KWARGS)
+    assert set(meta["diagnostic_guards"]) >= {("faculty_no_double", None), ("subject_totals", None)}
+
+    runner.diagnose_infeasibility(small_normalized, small_inputs, output_dir=str(tmp_path), time_limit=30,
+                                  num_workers=1, **KWARGS)
+    written = json.loads((tmp_path / "diagnostics.json").read_text())
+    assert written["summary"]["faculty_constraints"] == ["F1"]
+    assert written["conflicts"]["culprits"]["sections"] == ["aiml-3a", "aiml-3b"]
+
+
+def test_core_is_added_to_the_run_diagnostics(small_normalized, small_inputs, tmp_path):
+    _overload_f1(small_normalized)
+    model, meta = solver.build_cp_model(small_normalized, small_inputs, **KWARGS)
+    result = runner.run_solver(model, meta, output_dir=str(tmp_path), time_limit=30, num_workers=1)
+    assert result["status"] == "INFEASIBLE"
+    before = json.loads((tmp_path / "diagnostics.json").read_text())
+    assert "telemetry" in before
+
+    runner.diagnose_infeasibility(small_normalized, small_inputs, output_dir=str(tmp_path), time_limit=30,
+                                  num_workers=1, meta=meta, **KWARGS)
+    written = json.loads((tmp_path / "diagnostics.json").read_text())
+    # the solve's telemetry survives next to the core
+    assert written["telemetry"] == before["telemetry"]
+    assert written["backend"] == before["backend"]
+    assert written["summary"]["faculty_constraints"] == ["F1"]
@@ -0,0 +1,31 @@
+from ortools.sat.python import cp_model
+
+from src.timetable import greedy, runner, solver, warmstart
+
+
+def test_greedy_places_all_blocks_without_conflicts(small_normalized, small_inputs):
+    model, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    keys, report = greedy.greedy_assign(small_normalized, meta)
+    assert report["complete"]
+    # MATH 4 + PHY-LAB 2 blocks for both real sections, 2 theory blocks per elective option
+    assert report["required_blocks"] == 2 * (4 + 2) + 2 * 2
+    assert all(k in meta["assign_vars"] for k in keys)
+
+    # the greedy timetable satisfies every hard constraint of the model
+    warmstart.apply_hints(model, meta, keys, source="greedy")
+    cp = cp_model.CpSolver()
+    cp.parameters.fix_variables_to_their_hinted_value = True
+    cp.parameters.max_time_in_seconds = 10
+    assert cp.Solve(model) in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+
+def test_unknown_status_writes_greedy_fallback(small_normalized, small_inputs, tmp_path):
+    model, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    fallback = greedy.greedy_assign(small_normalized, meta)
+    # no time to search: the solver stops with UNKNOWN
+    result = runner.run_solver(model, meta, output_dir=str(tmp_path), time_limit=0, num_workers=1,
+                               fallback=fallback)
+    assert result["status"] == "UNKNOWN"
+    assert result["fallback"] == "greedy"
+    assert (tmp_path / "diagnostics.json").exists()
+    assert (tmp_path / "timetable_section.json").exists()
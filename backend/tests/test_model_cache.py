@@ -0,0 +1,51 @@
+from ortools.sat.python import cp_model
+
+from src.timetable import model_cache, solver
+
+
+def _solve(model):
+    cp = cp_model.CpSolver()
+    cp.parameters.max_time_in_seconds = 10
+    cp.parameters.num_search_workers = 1
+    status = cp.Solve(model)
+    return cp, status
+
+
+def test_cache_hit_restores_model_and_meta(small_normalized, small_inputs, tmp_path, monkeypatch):
+    kwargs = dict(periods_per_day=4, days_per_week=3)
+    model, meta = model_cache.build_cp_model_cached(small_normalized, small_inputs, tmp_path, **kwargs)
+    assert meta["model_cache"]["hit"] is False
+
+    # a hit must not rebuild
+    def no_build(*args, **kw):
+        raise AssertionError("build_cp_model called on a cache hit")
+    monkeypatch.setattr(solver, "build_cp_model", no_build)
+    cached, cached_meta = model_cache.build_cp_model_cached(small_normalized, small_inputs, tmp_path, **kwargs)
+    assert cached_meta["model_cache"]["hit"] is True
+
+    assert len(cached.Proto().variables) == len(model.Proto().variables)
+    assert len(cached.Proto().constraints) == len(model.Proto().constraints)
+    assert cached_meta["assignment_meta"] == meta["assignment_meta"]
+    assert {k: v.Index() for k, v in cached_meta["assign_vars"].items()} == \
+        {k: v.Index() for k, v in meta["assign_vars"].items()}
+
+    cp, status = _solve(cached)
+    assert status == cp_model.OPTIMAL
+    assigned = [k for k, v in cached_meta["assign_vars"].items() if cp.Value(v)]
+    sessions = {}
+    for key in assigned:
+        sessions[key[:2]] = sessions.get(key[:2], 0) + cached_meta["assignment_meta"][key][3]
+    assert sessions[("aiml-3a", "MATH")] == 4
+
+
+def test_key_tracks_parameters_and_eviction_is_lru(small_normalized, small_inputs, tmp_path):
+    k3 = model_cache.cache_key(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    assert k3 == model_cache.cache_key(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    assert k3 != model_cache.cache_key(small_normalized, small_inputs, periods_per_day=4, days_per_week=4)
+
+    for days in (3, 4, 5):
+        model_cache.build_cp_model_cached(small_normalized, small_inputs, tmp_path, max_entries=2,
+                                          periods_per_day=4, days_per_week=days)
+    entries = [p.name for p in tmp_path.iterdir()]
+    assert len(entries) == 2
+    assert k3 not in entries
@@ -0,0 +1,38 @@
+import json
+
+from ortools.sat.python import cp_model
+
+from src.timetable import outputs, solver
+from src.timetable.registry import build_registry
+
+
+def test_registry_ids_are_dense_and_stable(small_normalized):
+    registry = build_registry(small_normalized["normalized_sections"], small_normalized["section_classroom_map"])
+    assert registry.tables["section"][:2] == ["aiml-3a", "aiml-3b"]
+    assert registry.tables["faculty"] == ["F1", "F2", "F3", "F4", "F5"]
+    assert registry.tables["room"] == ["R1", "R2"]
+    assert registry.id("subject", "PHY-LAB") == 1 and registry.id("subject", "NOPE") == -1
+    assert registry.intern("room", "R9") == 2 and registry.intern("room", "R1") == 0
+    assert registry.name("room", -1) is None
+
+
+def test_store_rows_and_keys_expand_to_identical_json(small_normalized, small_inputs, tmp_path):
+    model, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    cp = cp_model.CpSolver()
+    cp.parameters.max_time_in_seconds = 10
+    assert cp.Solve(model) == cp_model.OPTIMAL
+    mask = solver.solution_mask(cp.ResponseProto().solution, meta)
+    dates = [f"2026-01-{d:02d}" for d in range(1, 4)]
+    args = (meta["assignment_meta"], meta["section_faculty_map"], meta["section_classroom_map"], dates, 3)
+
+    outputs.expand_and_write_outputs(meta["assign_keys"], *args, str(tmp_path / "rows"),
+                                     assigned_mask=mask, candidates=meta["candidates"])
+    outputs.expand_and_write_outputs(solver.masked_keys(meta, mask), *args, str(tmp_path / "keys"))
+
+    for suffix in ("section", "faculty", "room", "enriched_section"):
+        rows = json.loads((tmp_path / f"rows_{suffix}.json").read_text())
+        keys = json.loads((tmp_path / f"keys_{suffix}.json").read_text())
+        assert rows == keys
+    section = json.loads((tmp_path / "rows_section.json").read_text())
+    lab = [e for e in section["aiml-3a"] if e["is_lab"]]
+    assert lab and all(e["faculty"] == "F3" and e["room"] == "R1" for e in lab)
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+import timetable_generator
+from src.timetable import loader, portfolio, precompute, runner, solver
+
+
+def test_portfolio_configs_share_cores():
+    configs = portfolio.portfolio_configs(cores=16)
+    assert len(configs) == 4 and all(c["num_workers"] == 4 for c in configs)
+    assert len({c["seed"] for c in configs}) == 4 and len({c["profile"] for c in configs}) == 4
+    # more runs than profiles cycle through them
+    configs = portfolio.portfolio_configs(cores=2, runs=8, profiles=["default", "no_lp"])
+    assert [c["profile"] for c in configs[:3]] == ["default", "no_lp", "default"]
+    assert all(c["num_workers"] == 1 for c in configs)
+    with pytest.raises(ValueError):
+        portfolio.portfolio_configs(profiles=["fastest"])
+
+
+def test_run_solver_portfolio_writes_best_run(small_normalized, small_inputs, tmp_path):
+    model, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    result = runner.run_solver(model, meta, output_dir=str(tmp_path), time_limit=20,
+                               portfolio=True, portfolio_runs=2)
+    assert result["status"] == "OPTIMAL" and result["assigned"]
+    report = result["portfolio"]
+    assert report["winner"] in {run["config"]["name"] for run in report["runs"]}
+    assert len(report["runs"]) == 2
+
+    summary = json.loads((tmp_path / "summary.json").read_text())
+    assert summary["portfolio"]["winner"] == report["winner"]
+    history = (tmp_path / "portfolio_history.jsonl").read_text().splitlines()
+    assert len(history) == 2 and sum(json.loads(line)["winner"] for line in history) == 1
+
+
+def test_invalid_run_neither_stops_nor_wins(small_normalized, small_inputs, monkeypatch):
+    # pool processes fork after the patch, so they see the broken profile too
+    monkeypatch.setitem(portfolio.PROFILES, "broken", {"linearization_level": -1})
+    model, _ = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    report = portfolio.solve_portfolio(model, time_limit=20, cores=2, runs=2, profiles=["broken", "default"])
+    statuses = {run["config"]["profile"]: run for run in report["runs"]}
+    assert statuses["broken"]["status"] == "MODEL_INVALID"
+    assert not statuses["default"]["stopped"]
+    assert report["status"] == "OPTIMAL" and report["winner"] == statuses["default"]["config"]["name"]
+
+    assert portfolio._rank({"status": "MODEL_INVALID", "solve_seconds": 0.0}) > \
+        portfolio._rank({"status": "UNKNOWN", "solve_seconds": 9.0})
+
+
+def test_generator_warns_when_portfolio_is_ignored(small_normalized, small_inputs, monkeypatch, tmp_path, caplog):
+    monkeypatch.setattr(loader, "load_all_inputs", lambda _: small_inputs)
+    monkeypatch.setattr(precompute, "prepare", lambda *a, **k: small_normalized)
+    monkeypatch.setattr(runner, "run_decomposed", lambda *a, **k: ({"status": "UNKNOWN"}, {}))
+    timetable_generator.generate("unused", str(tmp_path), decompose=True, portfolio=True, capacity_check=False)
+    assert "portfolio only applies to the single-model solve; ignored with decompose" in caplog.text
@@ -1,2 +1,25 @@
+from datetime import date
+
+from src.timetable import precompute
+from src.timetable.models import ExamDate, Holiday, SemesterDate
+
+
 def test_precompute_basic():
     assert True
+
+
+def test_teaching_calendar_marks_blocked_days():
+    # Wednesday start, one holiday, a two-day exam window
+    sem = SemesterDate(id="3-2", name="Semester 3-2", startDate=date(2025, 12, 3), endDate=date(2025, 12, 16),
+                       totalHours=0, theoryHours=0, practicalHours=0)
+    holidays = [Holiday(holiday_date=date(2025, 12, 5), description="Holiday")]
+    exams = [ExamDate(id="3-2", semesterId="3-2", startDate=date(2025, 12, 15), endDate=date(2025, 12, 16))]
+
+    weeks = precompute.build_teaching_calendar(sem, holidays, exams)
+
+    assert len(weeks) == 3
+    assert all(len(week) == 6 for week in weeks)
+    assert weeks[0][0] == {"date": "2025-12-01", "teachable": False, "reason": "outside_semester", "periods": []}
+    assert weeks[0][2]["teachable"] and weeks[0][2]["periods"] == list(range(8))
+    assert weeks[0][4]["reason"] == "holiday"
+    assert [day["reason"] for day in weeks[2][:3]] == ["exam", "exam", "outside_semester"]
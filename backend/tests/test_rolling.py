@@ -0,0 +1,75 @@
+import json
+from collections import Counter
+
+from src.timetable import rolling, runner, solver, warmstart
+
+
+def test_window_quotas_keep_pace_and_close_out():
+    lengths = {("A", "MATH"): 1, ("A", "LAB"): 2}
+    remaining = {("A", "MATH"): 10, ("A", "LAB"): 6}
+    quotas = rolling.window_quotas(remaining, lengths, {1: 8, 2: 8}, {1: 24, 2: 2})
+    # MATH: the later weeks could hold everything, the share is a quarter (rounded up)
+    assert quotas[("A", "MATH")] == (0, 3)
+    # LAB: only 2 periods fit after the window, so at least 4 must go in now
+    assert quotas[("A", "LAB")] == (4, 6)
+    # nothing after the window: everything left is due
+    assert rolling.window_quotas(remaining, lengths, {1: 8, 2: 8}, {})[("A", "MATH")] == (10, 10)
+
+
+def test_rolling_windows_deliver_semester_totals(small_normalized, small_inputs):
+    small_normalized["working_weeks"] = 3
+    progress = []
+    result, meta = rolling.solve_rolling(small_normalized, small_inputs, window_weeks=2, freeze_weeks=1,
+                                         time_limit=10, num_workers=1, periods_per_day=4, days_per_week=3,
+                                         on_window=progress.append)
+    assert result["status"] in ("OPTIMAL", "FEASIBLE")
+    assert [w["frozen_weeks"] for w in result["windows"]] == [[0, 1], [1, 3]]
+    assert progress == result["windows"] and progress[-1]["delivered_fraction"] == 1.0
+
+    delivered = Counter()
+    for key in result["assigned"]:
+        delivered[key[:2]] += meta["assignment_meta"][key][3]
+    assert all(periods == small_normalized["sec_sub_periods_map"][subj] for (_, subj), periods in delivered.items())
+
+
+def test_infeasible_window_is_not_a_proof(small_normalized, small_inputs, monkeypatch, tmp_path):
+    small_normalized["working_weeks"] = 3
+    build = solver.build_cp_model
+    built = []
+
+    def second_window_fails(*args, **kwargs):
+        model, meta = build(*args, **kwargs)
+        built.append(model)
+        if len(built) == 2:
+            # stands in for weeks frozen by the first window that leave no room
+            x = model.NewBoolVar("blocked")
+            model.Add(x == 1)
+            model.Add(x == 0)
+        return model, meta
+
+    monkeypatch.setattr(solver, "build_cp_model", second_window_fails)
+    result, _ = runner.run_rolling(small_normalized, small_inputs, output_dir=str(tmp_path), window_weeks=2,
+                                   freeze_weeks=1, time_limit=10, num_workers=1, periods_per_day=4, days_per_week=3)
+    assert [w["status"] for w in result["windows"]] == ["OPTIMAL", "INFEASIBLE"]
+    assert result["status"] == "UNKNOWN" and result["infeasible_window"] == 1
+    written = json.loads((tmp_path / "diagnostics.json").read_text())
+    assert written["status"] == "UNKNOWN" and written["rolling"]["infeasible_window"] == 1
+    # plain presence flags stand in for the windows' occupancy arrays
+    assert written["summary"]["faculty_constraints"] == "present"
+
+
+def test_windows_are_hinted_from_a_previous_timetable(small_normalized, small_inputs, monkeypatch):
+    small_normalized["working_weeks"] = 3
+    kwargs = dict(window_weeks=2, freeze_weeks=1, time_limit=10, num_workers=1, periods_per_day=4, days_per_week=3)
+    first, _ = rolling.solve_rolling(small_normalized, small_inputs, **kwargs)
+    hinted = []
+    apply_hints = warmstart.apply_hints
+    monkeypatch.setattr(warmstart, "apply_hints",
+                        lambda model, meta, keys, source="previous": hinted.append((source, list(keys)))
+                        or apply_hints(model, meta, keys, source))
+    result, _ = rolling.solve_rolling(small_normalized, small_inputs, hint_keys=first["assigned"], **kwargs)
+    assert result["status"] in ("OPTIMAL", "FEASIBLE")
+    assert [source for source, _ in hinted] == ["previous", "previous"]
+    # the second window (weeks 1-2) sees weeks 1 and 2 of the previous timetable as its weeks 0 and 1
+    assert sorted(hinted[1][1]) == sorted((sid, subj, w - 1, d, p) for sid, subj, w, d, p in first["assigned"]
+                                          if w >= 1)
@@ -1,2 +1,152 @@
+import numpy as np
+import pytest
+from ortools.sat.python import cp_model
+
+from src.timetable import solver
+
+
 def test_solver_basic():
     assert True
+
+
+def test_slot_index_groups_covers_by_entity(small_normalized, small_inputs):
+    _, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    index = meta["slot_index"]
+
+    # a lab start at p=1 covers periods 1 and 2 for its section, faculty, room and the lab pool
+    lab_key = ("aiml-3a", "PHY-LAB", 0, 0, 1)
+    for slot in (("aiml-3a", 0, 0, 1), ("aiml-3a", 0, 0, 2)):
+        assert lab_key in index["section"][slot]
+    assert lab_key in index["faculty"][("F3", 0, 0, 2)]
+    assert lab_key in index["room"][("R1", 0, 0, 2)]
+    assert lab_key in index["lab"][(0, 0, 2)]
+
+    # every (key, covered slot) pair appears exactly once in the section index
+    total_covers = sum(len(c) for c in meta["assign_var_covers"].values())
+    assert sum(len(v) for v in index["section"].values()) == total_covers
+
+
+@pytest.mark.parametrize("backend", solver.MODEL_BACKENDS)
+def test_small_model_solves_without_double_booking(small_normalized, small_inputs, backend):
+    model, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3,
+                                        backend=backend)
+    cp = cp_model.CpSolver()
+    cp.parameters.max_time_in_seconds = 10
+    status = cp.Solve(model)
+    assert status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+    busy = {}
+    for key, var in meta["assign_vars"].items():
+        if not cp.Value(var):
+            continue
+        sid, _, fac, _ = meta["assignment_meta"][key]
+        for (_, w, d, p) in meta["assign_var_covers"][key]:
+            for slot in (("sec", sid, w, d, p), ("fac", fac, w, d, p)):
+                assert slot not in busy
+                busy[slot] = key
+
+
+def test_template_quota_rounds_to_whole_blocks():
+    assert solver.template_quota(80, 24.67, 1, 1) == (3, 4)
+    assert solver.template_quota(40, 24.67, 1, 2) == (2, 2)
+    assert solver.template_quota(16, 24.67, 1, 1) == (1, 1)
+    assert solver.template_quota(80, 24.67, 2, 1) == (6, 7)
+    assert solver.template_quota(0, 24.67, 1, 1) == (0, 0)
+
+
+def test_weekly_template_models_only_the_cycle(small_normalized, small_inputs):
+    small_normalized["working_weeks"] = 4
+    _, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3,
+                                    weekly_template=True, cycle_weeks=1)
+    assert {k[2] for k in meta["assign_vars"]} == {0}
+    assert meta["weekly_template"]["cycle_weeks"] == 1
+    assert meta["subject_quotas"]["MATH"] == (1, 1)
+    assert meta["subject_quotas"]["PHY-LAB"] == (2, 2)
+
+
+def test_interval_backend_drops_occupancy_booleans(small_normalized, small_inputs):
+    _, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3,
+                                    backend="interval")
+    assert all(len(meta[name]) == 0 for name in ("occupancy_section", "occupancy_faculty", "occupancy_room"))
+    assert len(meta["assign_intervals"]) == len(meta["assign_vars"])
+
+    with pytest.raises(ValueError):
+        solver.build_cp_model(small_normalized, small_inputs, backend="bogus")
+
+
+def test_solution_mask_matches_per_variable_values(small_normalized, small_inputs):
+    model, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    cp = cp_model.CpSolver()
+    cp.parameters.max_time_in_seconds = 10
+    assert cp.Solve(model) == cp_model.OPTIMAL
+
+    mask = solver.solution_mask(cp.ResponseProto().solution, meta)
+    assert mask.dtype == bool and len(mask) == len(meta["assign_keys"])
+    assert solver.masked_keys(meta, mask) == [k for k, v in meta["assign_vars"].items() if cp.Value(v)]
+
+
+def test_bulk_builder_emits_proto_constraints():
+    builder = solver.ModelBuilder(names=False)
+    x = builder.new_bool_vars(3).tolist()
+    builder.add_exactly_one(x)
+    builder.add_linear([x[0], x[1]], [1, 1], hi=0, enforce=[-x[2] - 1])   # not x2 -> x0 + x1 <= 0
+    builder.minimize([x[2]])
+    builder.flush()
+    proto = builder.model.Proto()
+    assert len(proto.variables) == 3 and len(proto.constraints) == 2 == builder.constraint_count
+    assert list(proto.constraints[1].enforcement_literal) == [-3]
+
+    cp = cp_model.CpSolver()
+    assert cp.Solve(builder.model) == cp_model.OPTIMAL
+    assert cp.ObjectiveValue() == 1
+
+
+def test_unnamed_model_matches_named_model(small_normalized, small_inputs):
+    named, _ = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    unnamed, _ = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3,
+                                       var_names=False)
+    a, b = named.Proto(), unnamed.Proto()
+    assert len(a.variables) == len(b.variables) and len(a.constraints) == len(b.constraints)
+    assert a.variables[0].name and not b.variables[0].name
+    assert all(str(ca) == str(cb) for ca, cb in zip(a.constraints, b.constraints))
+
+
+def test_calendar_limits_candidates_to_teachable_slots(small_normalized, small_inputs):
+    def day(date, teachable, periods=4):
+        return {"date": date, "teachable": teachable, "reason": None if teachable else "holiday",
+                "periods": list(range(periods)) if teachable else []}
+
+    # week 0: day 1 is a holiday; week 1: day 0 only teaches periods 0-1
+    small_normalized["teaching_calendar"] = [
+        [day("2025-12-01", True), day("2025-12-02", False), day("2025-12-03", True)],
+        [day("2025-12-08", True, periods=2), day("2025-12-09", True), day("2025-12-10", True)],
+    ]
+    model, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    keys = list(meta["assign_keys"])
+    assert meta["weeks"] == 2
+    assert not [k for k in keys if (k[2], k[3]) == (0, 1)]
+    # a lab block on week 1 day 0 must fit inside periods 0-1
+    assert {k[4] for k in keys if (k[2], k[3]) == (1, 0) and k[1] == "PHY-LAB"} == {0}
+    assert {k[4] for k in keys if (k[2], k[3]) == (1, 0) and k[1] == "MATH"} == {0, 1}
+    assert meta["working_dates"][1 * 3 + 0] == "2025-12-08"
+    assert (meta["occupancy_section"][:, 0, 1] == -1).all()
+
+    cp = cp_model.CpSolver()
+    cp.parameters.max_time_in_seconds = 10
+    assert cp.Solve(model) in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+
+def test_elective_copies_alias_their_master(small_normalized, small_inputs):
+    _, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    store = meta["candidates"]
+    for (semester, group), subj_map in meta["elective_index"].items():
+        for subj_id, sids in subj_map.items():
+            masters = meta["elective_masters"][(semester, group, subj_id)]
+            starts = set()
+            for sid in sids:
+                rows = store.rows_of(sid, subj_id)
+                grid = masters[store.week[rows], store.day[rows], store.period[rows]]
+                assert (grid == store.var[rows]).all()
+                starts.update(meta["sec_subj_vars"][(sid, subj_id)])
+            # masters exist exactly where the option has candidate starts
+            assert {tuple(x) for x in np.argwhere(masters >= 0).tolist()} == starts
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from ortools.sat.python import cp_model
+
+import timetable_generator
+from src.timetable import capacity, loader, precompute, runner, solver
+
+
+def _solve(model):
+    cp = cp_model.CpSolver()
+    cp.parameters.max_time_in_seconds = 20
+    cp.parameters.num_search_workers = 1
+    status = cp.Solve(model)
+    assert status == cp_model.OPTIMAL
+    return cp.ObjectiveValue()
+
+
+def test_symmetry_breaking_keeps_optimum(small_normalized, small_inputs):
+    # R1 / R2 become private to aiml-3a / aiml-3b, so the two sections are interchangeable
+    for sec in small_normalized["normalized_sections"]:
+        if sec.is_virtual:
+            small_normalized["section_classroom_map"][sec.id] = "R3"
+    small_normalized["working_weeks"] = 2
+    kwargs = dict(periods_per_day=4, days_per_week=3)
+
+    model, meta = solver.build_cp_model(small_normalized, small_inputs, **kwargs)
+    assert meta["symmetry"] is None
+    broken, broken_meta = solver.build_cp_model(small_normalized, small_inputs, symmetry_breaking=True, **kwargs)
+
+    report = broken_meta["symmetry"]
+    assert report["section_classes"] == [["aiml-3a", "aiml-3b"]]
+    assert report["week_classes"] == [[0, 1]]
+    assert report["constraints"] > 0
+    assert len(broken.Proto().constraints) > len(model.Proto().constraints)
+    assert _solve(broken) == _solve(model)
+
+
+def test_shared_room_is_not_swapped(small_normalized, small_inputs):
+    # EL1 shares R1 with aiml-3a only: swapping the sections would not map rooms onto rooms
+    _, meta = solver.build_cp_model(small_normalized, small_inputs, symmetry_breaking=True,
+                                    periods_per_day=4, days_per_week=3)
+    assert meta["symmetry"]["section_classes"] == []
+
+
+def test_prescreened_starts_split_classes(small_normalized, small_inputs):
+    for sec in small_normalized["normalized_sections"]:
+        if sec.is_virtual:
+            small_normalized["section_classroom_map"][sec.id] = "R3"
+    small_normalized["working_weeks"] = 2
+    # F1 (aiml-3a MATH only) is booked all of week 1 day 0: neither the weeks nor the sections
+    # have matching candidate starts any more
+    small_normalized["occupied"] = {"faculty": {"F1": [(3, p) for p in range(4)]}}
+    kwargs = dict(periods_per_day=4, days_per_week=3)
+
+    model, _ = solver.build_cp_model(small_normalized, small_inputs, **kwargs)
+    broken, meta = solver.build_cp_model(small_normalized, small_inputs, symmetry_breaking=True, **kwargs)
+    assert meta["symmetry"]["week_classes"] == [] and meta["symmetry"]["section_classes"] == []
+    assert _solve(broken) == _solve(model)
+
+
+@pytest.mark.parametrize("mode", ["decompose", "two_level", "rolling"])
+def test_every_solve_mode_gets_symmetry_breaking(mode, small_normalized, small_inputs, monkeypatch, tmp_path):
+    for sec in small_normalized["normalized_sections"]:
+        if sec.is_virtual:
+            small_normalized["section_classroom_map"][sec.id] = "R3"
+    small_normalized["working_weeks"] = 2
+    build = solver.build_cp_model
+    reports = []
+
+    def spy(*args, **kwargs):
+        model, meta = build(*args, **kwargs)
+        reports.append(meta["symmetry"])
+        return model, meta
+
+    monkeypatch.setattr(solver, "build_cp_model", spy)
+    monkeypatch.setattr(loader, "load_all_inputs", lambda _: small_inputs)
+    monkeypatch.setattr(precompute, "prepare", lambda *a, **k: small_normalized)
+    monkeypatch.setattr(capacity, "check_capacity", lambda *a, **k: {"feasible": True})
+    runner_kwargs = {"decompose": dict(max_processes=1), "two_level": dict(max_processes=1, master_time_limit=10),
+                     "rolling": dict(window_weeks=1, freeze_weeks=1)}[mode]
+    solve = {"decompose": runner.run_decomposed, "two_level": runner.run_two_level,
+             "rolling": runner.run_rolling}[mode]
+    monkeypatch.setattr(runner, solve.__name__,
+                        lambda *a, **k: solve(*a, **dict(k, **runner_kwargs, periods_per_day=4, days_per_week=3)))
+
+    timetable_generator.generate("unused", str(tmp_path), time_limit=10, num_workers=1, symmetry_breaking=True,
+                                 decompose=mode == "decompose", two_level=mode == "two_level",
+                                 rolling_window=1 if mode == "rolling" else None, diagnose_level=None)
+    assert reports and all(report is not None for report in reports)
+    assert json.loads((tmp_path / "summary.json").read_text())["status"] in ("OPTIMAL", "FEASIBLE")
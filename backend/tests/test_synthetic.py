@@ -0,0 +1,26 @@
+from src.timetable import loader, precompute, synthetic
+
+
+def test_generated_inputs_load_and_normalize(tmp_path):
+    summary = synthetic.generate_inputs(tmp_path / "input", sections_per_semester=3, semesters=("1-2", "3-2"),
+                                        elective_groups=1, electives_per_group=2, faculty=10, seed=7)
+    assert summary["sections"] == 6
+
+    inputs = loader.load_all_inputs(str(tmp_path / "input"))
+    assert set(inputs) == set(synthetic.FILES)
+    normalized = precompute.prepare(inputs, outputs_dir=str(tmp_path / "output"))
+
+    real = [s for s in normalized["normalized_sections"] if not s.is_virtual]
+    virtual = [s for s in normalized["normalized_sections"] if s.is_virtual]
+    assert len(real) == 6
+    assert len(virtual) == 2 * 2
+    assert all(normalized["section_classroom_map"][s.id] for s in real)
+    assert all(subj.assigned_faculty_id for s in real for subj in s.subjects)
+    assert normalized["teaching_calendar"]
+
+
+def test_same_seed_same_files(tmp_path):
+    synthetic.generate_inputs(tmp_path / "a", seed=3)
+    synthetic.generate_inputs(tmp_path / "b", seed=3)
+    for filename in synthetic.FILES.values():
+        assert (tmp_path / "a" / filename).read_bytes() == (tmp_path / "b" / filename).read_bytes()
@@ -0,0 +1,41 @@
+import json
+
+from src.timetable import runner, solver, telemetry
+
+
+def test_presolve_sizes_parsed_from_search_log():
+    recorder = telemetry.SolverTelemetry()
+    for line in ["Initial optimization model '': (model_fingerprint: 0x1)",
+                 "#Variables: 13'032 (#bools: 1'896 in objective)",
+                 "  - 13'032 Booleans in [0,1]",
+                 "#kAtMostOne: 19'680 (#literals: 53'184)",
+                 "#kLinearN: 8'754 (#enforced: 3'504)",
+                 "",
+                 "Starting presolve at 0.02s",
+                 "Presolved optimization model '': (model_fingerprint: 0x2)",
+                 "#Variables: 8'033 (#bools: 1'896 in objective)",
+                 "#kBoolOr: 144 (#literals: 576)",
+                 "[Symmetry] Graph for symmetry has 17'774 nodes and 66'142 arcs.",
+                 "#Bound   1.43s best:inf   next:[0,1896]   initial_domain",
+                 "Starting search at 1.44s with 4 workers."]:
+        recorder.on_log(line)
+    presolve = recorder.summary()["presolve"]
+    assert presolve["initial"] == {"variables": 13032, "constraints": 28434}
+    assert presolve["presolved"] == {"variables": 8033, "constraints": 144}
+    assert presolve["seconds"] == 1.42
+
+
+def test_run_solver_writes_telemetry(small_normalized, small_inputs, tmp_path):
+    model, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    result = runner.run_solver(model, meta, output_dir=str(tmp_path), time_limit=20, num_workers=1)
+    assert result["status"] == "OPTIMAL"
+
+    events = [json.loads(line) for line in (tmp_path / "telemetry.jsonl").read_text().splitlines()]
+    kinds = [e["event"] for e in events]
+    assert "presolve" in kinds and "solution" in kinds and kinds[-1] == "final"
+    assert events[-1]["gap"] == 0 and events[-1]["objective"] == result["objective"]
+    assert all(a["t"] <= b["t"] for a, b in zip(events, events[1:]))
+
+    summary = json.loads((tmp_path / "summary.json").read_text())["telemetry"]
+    assert summary["solutions"] == kinds.count("solution") >= 1
+    assert summary["presolve"]["initial"]["variables"] == len(model.Proto().variables)
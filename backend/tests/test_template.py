@@ -0,0 +1,42 @@
+from src.timetable import template
+
+
+def _calendar(n_weeks, blocked=()):
+    weeks = []
+    for w in range(n_weeks):
+        week = []
+        for d in range(2):
+            reason = "holiday" if (w, d) in blocked else None
+            week.append({"date": f"w{w}d{d}", "teachable": reason is None, "reason": reason})
+        weeks.append(week)
+    return weeks
+
+
+def test_expand_repeats_cycle_and_stops_at_semester_total():
+    keys = [("S1", "MATH", 0, 0, 1), ("S1", "LAB", 1, 1, 0)]
+    meta = {keys[0]: ("S1", "MATH", "F1", 1), keys[1]: ("S1", "LAB", "F2", 2)}
+
+    out = template.expand_weekly_template(keys, meta, _calendar(6), cycle_weeks=2,
+                                          subject_periods_map={"MATH": 2, "LAB": 4})
+
+    assert out["assigned"] == [
+        ("S1", "MATH", 0, 0, 1), ("S1", "LAB", 1, 1, 0),
+        ("S1", "MATH", 2, 0, 1), ("S1", "LAB", 3, 1, 0),
+    ]
+    assert out["working_dates"][3 * 2 + 1] == "w3d1"
+    assert out["exceptions"] == [] and out["shortfalls"] == []
+
+
+def test_expand_reports_blocked_days_and_shortfalls():
+    keys = [("S1", "MATH", 0, 0, 0)]
+    meta = {keys[0]: ("S1", "MATH", "F1", 1)}
+
+    out = template.expand_weekly_template(keys, meta, _calendar(3, blocked={(1, 0)}), cycle_weeks=1,
+                                          subject_periods_map={"MATH": 3})
+
+    assert [k[2] for k in out["assigned"]] == [0, 2]
+    assert out["exceptions"] == [{
+        "week": 1, "template_week": 0, "date": "w1d0", "reason": "holiday",
+        "dropped_sessions": 1, "sections": ["S1"],
+    }]
+    assert out["shortfalls"] == [{"section": "S1", "subject": "MATH", "required": 3, "delivered": 2}]
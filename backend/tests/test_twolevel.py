@@ -0,0 +1,78 @@
+import json
+from collections import Counter
+
+from src.timetable import runner, twolevel, warmstart
+
+
+def test_weekly_quotas_add_up_to_semester_totals(small_normalized, small_inputs):
+    small_normalized["working_weeks"] = 2
+    plan = twolevel.plan_weekly_quotas(small_normalized, small_inputs, periods_per_day=4, days_per_week=3,
+                                       time_limit=10, num_workers=1)
+    assert plan["status"] == "OPTIMAL" and plan["weeks"] == 2
+    totals = Counter()
+    for week in plan["quotas"]:
+        for pair, periods in week.items():
+            totals[pair] += periods
+    periods_map = small_normalized["sec_sub_periods_map"]
+    assert totals and all(periods == periods_map[subj] for (_, subj), periods in totals.items())
+    # labs are planned in whole two-period blocks
+    assert all(week[("aiml-3a", "PHY-LAB")] % 2 == 0 for week in plan["quotas"])
+
+
+def test_weeks_stitch_into_one_timetable(small_normalized, small_inputs):
+    small_normalized["working_weeks"] = 2
+    result, meta = twolevel.solve_weeks(small_normalized, small_inputs, time_limit=10, num_workers=1,
+                                        max_processes=1, master_time_limit=10, periods_per_day=4, days_per_week=3)
+    assert result["status"] in ("OPTIMAL", "FEASIBLE")
+    assert {w["week"] for w in result["weeks"]} <= {0, 1}
+    # plain presence flags stand in for the weeks' occupancy arrays
+    assert meta["occupancy_faculty"] is True and meta["occupancy_section"] is True
+
+    delivered = Counter()
+    busy = set()
+    for key in result["assigned"]:
+        sid, subj, w, d, p = key
+        length = meta["assignment_meta"][key][3]
+        delivered[(sid, subj)] += length
+        for pp in range(p, p + length):
+            assert (sid, w, d, pp) not in busy
+            busy.add((sid, w, d, pp))
+    assert all(periods == small_normalized["sec_sub_periods_map"][subj] for (_, subj), periods in delivered.items())
+
+
+def test_infeasible_week_is_not_a_proof(small_normalized, small_inputs, monkeypatch, tmp_path):
+    small_normalized["working_weeks"] = 2
+    solve_week = twolevel._solve_week
+
+    def week_one_fails(task):
+        part = solve_week(task)
+        if task["week"] == 1:
+            part.update(status="INFEASIBLE", objective=None, assigned=[], assignment_meta={})
+        return part
+
+    monkeypatch.setattr(twolevel, "_solve_week", week_one_fails)
+    result, _ = runner.run_two_level(small_normalized, small_inputs, output_dir=str(tmp_path), time_limit=10,
+                                     num_workers=1, max_processes=1, master_time_limit=10, periods_per_day=4,
+                                     days_per_week=3)
+    # the master's quota split failed, not the calendar
+    assert result["status"] == "UNKNOWN" and result["infeasible_weeks"] == [1]
+    written = json.loads((tmp_path / "diagnostics.json").read_text())
+    assert written["status"] == "UNKNOWN" and written["two_level"]["infeasible_weeks"] == [1]
+
+
+def test_weeks_are_hinted_from_a_previous_timetable(small_normalized, small_inputs, monkeypatch):
+    small_normalized["working_weeks"] = 2
+    kwargs = dict(time_limit=10, num_workers=1, max_processes=1, master_time_limit=10, periods_per_day=4,
+                  days_per_week=3)
+    first, _ = twolevel.solve_weeks(small_normalized, small_inputs, **kwargs)
+    hinted = []
+    apply_hints = warmstart.apply_hints
+    monkeypatch.setattr(warmstart, "apply_hints",
+                        lambda model, meta, keys, source="previous": hinted.append((source, list(keys)))
+                        or apply_hints(model, meta, keys, source))
+    result, _ = twolevel.solve_weeks(small_normalized, small_inputs, hint_keys=first["assigned"], **kwargs)
+    assert result["status"] in ("OPTIMAL", "FEASIBLE")
+    # every week is hinted from its own keys, shifted to week 0, instead of the greedy seed
+    assert {source for source, _ in hinted} == {"previous"}
+    assert sorted(k for _, keys in hinted for k in keys) == sorted(
+        (sid, subj, 0, d, p) for sid, subj, _, d, p in first["assigned"])
@@ -0,0 +1,63 @@
+import json
+
+from ortools.sat.python import cp_model
+
+from src.timetable import solver, warmstart
+
+
+def _solve(model, meta):
+    cp = cp_model.CpSolver()
+    cp.parameters.max_time_in_seconds = 10
+    cp.parameters.num_search_workers = 2
+    status = cp.Solve(model)
+    assert status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    return [k for k, v in meta["assign_vars"].items() if cp.Value(v)]
+
+
+def test_hints_round_trip_through_assignments_file(small_normalized, small_inputs, tmp_path):
+    model, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    first = _solve(model, meta)
+
+    path = tmp_path / "assignments.json"
+    warmstart.write_assignments(path, first, status="OPTIMAL")
+    previous = warmstart.load_previous_assignments(path, days_per_week=3)
+    assert sorted(previous) == sorted(first)
+
+    model, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    report = warmstart.apply_hints(model, meta, previous + [("aiml-3a", "MATH", 9, 9, 9)])
+    assert report["matched"] == len(first)
+    assert report["unmatched"] == 1
+    assert len(model.Proto().solution_hint.vars) == report["hinted_vars"]
+
+    second = _solve(model, meta)
+    assert meta["warm_start"]["hinted_keys"] & set(second)
+
+
+def test_keys_rebuilt_from_section_timetable(tmp_path):
+    section_json = {
+        "aiml-3a": [
+            {"day_index": 4, "period": 0, "subject": "MATH", "is_lab": False},
+            {"day_index": 4, "period": 2, "subject": "PHY-LAB", "is_lab": True},
+            {"day_index": 4, "period": 3, "subject": "PHY-LAB", "is_lab": True},
+        ]
+    }
+    path = tmp_path / "timetable_section.json"
+    path.write_text(json.dumps(section_json))
+    keys = warmstart.load_previous_assignments(path, days_per_week=3)
+    assert sorted(keys) == [("aiml-3a", "MATH", 1, 1, 0), ("aiml-3a", "PHY-LAB", 1, 1, 2)]
+
+
+def test_streamed_snapshots_checkpoint_the_search(small_normalized, small_inputs, tmp_path):
+    from src.timetable import runner
+
+    model, meta = solver.build_cp_model(small_normalized, small_inputs, periods_per_day=4, days_per_week=3)
+    result = runner.run_solver(model, meta, output_dir=str(tmp_path), time_limit=10, num_workers=1,
+                               stream_solutions=True)
+    assert result["status"] == "OPTIMAL"
+
+    lines = (tmp_path / "solutions.jsonl").read_text().splitlines()
+    assert len(lines) == result["streamed_solutions"] >= 1
+    last = json.loads(lines[-1])
+    assert last["objective"] == result["objective"]
+    assert {"solution", "bound", "wall_time"} <= set(last)
+    assert sorted(warmstart.load_previous_assignments(tmp_path / "solutions.jsonl")) == sorted(result["assigned"])
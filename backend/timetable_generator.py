@@ -1,15 +1,15 @@
 """
 timetable_generator.py - orchestrates the pipeline:
   loader -> precompute -> solver -> runner -> outputs
-(Kept robust to different semesterdates representations.)
+Dates come from precompute's teaching calendar (via the solver meta), so day indices
+map onto teachable calendar days without any re-expansion here.
 """
 
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any
 
 # import your modules (adjust imports if your package layout differs)
-from src.timetable import loader, precompute, solver, runner, outputs
+from src.timetable import loader, precompute, solver, runner, outputs, warmstart, greedy, model_cache, capacity, conflicts
 
 logger = logging.getLogger("src.timetable.generator")
 logger.setLevel(logging.INFO)
@@ -18,70 +18,124 @@ handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"
 logger.addHandler(handler)
 
 
-def expand_semester_dates(semesters: List[Any]) -> List[str]:
-    """Expand each semester dict/model {startDate,endDate} into list of ISO dates."""
-    all_dates: List[str] = []
-    for sem in semesters:
-        try:
-            # support Pydantic model or dict
-            if hasattr(sem, "startDate"):
-                start_val = sem.startDate
-                end_val = sem.endDate
-            elif isinstance(sem, dict):
-                start_val = sem.get("startDate")
-                end_val = sem.get("endDate")
-            else:
-                logger.warning("Unknown semester entry type: %s", type(sem))
-                continue
-
-            if isinstance(start_val, str):
-                start = datetime.fromisoformat(start_val).date()
-            else:
-                start = start_val  # assumed date
-            if isinstance(end_val, str):
-                end = datetime.fromisoformat(end_val).date()
-            else:
-                end = end_val
-        except Exception as e:
-            logger.error("Invalid semester entry %s: %s", sem, e)
-            continue
-
-        cur = start
-        while cur <= end:
-            all_dates.append(cur.isoformat())
-            cur = cur + timedelta(days=1)
-    return all_dates
-
-
-def generate(input_dir: str, output_dir: str, time_limit: int = 60, num_workers: int = 8):
+def generate(input_dir: str, output_dir: str, time_limit: int = 60, num_workers: int = 8,
+             weekly_template: bool = False, cycle_weeks: int = 1,
+             decompose: bool = False, max_processes: int = None, lab_capacity_policy: str = "couple",
+             warm_start: str = None, greedy_seed: bool = True, model_cache_dir: str = None,
+             stream_solutions: bool = False, stream_outputs: bool = False, two_level: bool = False,
+             rolling_window: int = None, rolling_freeze: int = 2, symmetry_breaking: bool = False,
+             portfolio: bool = False, portfolio_runs: int = None, diagnose_level: str = "entity",
+             capacity_check: bool = True, occupied_from: list = None, faculty_assignment: str = "tank",
+             classroom_allocation: str = "first_fit", preferred_building: str = None):
     logger.info("Starting timetable generation pipeline...")
     inputs: Dict[str, Any] = loader.load_all_inputs(input_dir)
-    normalized = precompute.prepare(inputs, outputs_dir=output_dir)
-
-    # build cp model
-    model, meta = solver.build_cp_model(normalized, inputs)
-
-    # run solver (runner should return dict with keys 'status' and 'assigned')
-    result = runner.run_solver(model, meta, output_dir=output_dir, time_limit=time_limit, num_workers=num_workers)
-
-    if result.get("status") not in ("OPTIMAL", "FEASIBLE"):
+    # faculty_assignment="balanced" solves the faculty assignment for all pairs at once (assignment.py);
+    # classroom_allocation="best_fit" matches rooms to section / elective sizes (classrooms.py),
+    # preferring rooms in preferred_building
+    normalized = precompute.prepare(inputs, outputs_dir=output_dir, faculty_assignment=faculty_assignment,
+                                    classroom_allocation=classroom_allocation, preferred_building=preferred_building)
+
+    if occupied_from:
+        # periods another timetable already books for shared faculty / rooms / sections
+        # (its timetable_*.json files); the solver never creates starts on them
+        normalized["occupied"] = conflicts.load_occupied(occupied_from)
+
+    if capacity_check:
+        # max-flow bound on periods placeable per faculty / section / room / lab day: a
+        # shortfall proves the inputs infeasible before any CP-SAT model is built
+        report = capacity.check_capacity(normalized, inputs)
+        if not report["feasible"]:
+            if weekly_template:
+                # template quotas come from the cycle, not the full calendar: only a warning
+                # (rolling windows and the two-level master deliver the full totals, so they stop too)
+                logger.warning("Capacity check failed on the full calendar; continuing with the weekly template")
+            else:
+                runner.write_diagnostics("CAPACITY_INFEASIBLE", {}, output_dir, extra={
+                    "capacity": report,
+                    "note": "Required periods exceed what the calendar can hold; see capacity.cut for the bottlenecks.",
+                })
+                logger.error("Inputs exceed calendar capacity (%d of %d periods placeable); see diagnostics.json",
+                             report["max_flow"], report["demand"])
+                return
+
+    if portfolio and (rolling_window or two_level or decompose):
+        # their sub-models already run in a process pool; a portfolio per sub-model would nest pools
+        logger.warning("portfolio only applies to the single-model solve; ignored with %s",
+                       "rolling_window" if rolling_window else "two_level" if two_level else "decompose")
+
+    # previous assignments.json / timetable_section.json to hint the solver with
+    hint_keys = warmstart.load_previous_assignments(warm_start) if warm_start else None
+
+    if rolling_window:
+        # rolling horizon: `rolling_window`-week models, freezing `rolling_freeze` weeks per step
+        result, meta = runner.run_rolling(
+            normalized, inputs, output_dir=output_dir, time_limit=time_limit, num_workers=num_workers,
+            window_weeks=rolling_window, freeze_weeks=rolling_freeze, weekly_template=weekly_template,
+            hint_keys=hint_keys, symmetry_breaking=symmetry_breaking,
+        )
+    elif two_level:
+        # weekly quota master problem, then one small model per calendar week in a process pool
+        result, meta = runner.run_two_level(
+            normalized, inputs, output_dir=output_dir, time_limit=time_limit, num_workers=num_workers,
+            max_processes=max_processes, weekly_template=weekly_template, hint_keys=hint_keys,
+            symmetry_breaking=symmetry_breaking,
+        )
+    elif decompose:
+        # independent section components built and solved in a process pool
+        result, meta = runner.run_decomposed(
+            normalized, inputs, output_dir=output_dir, time_limit=time_limit, num_workers=num_workers,
+            max_processes=max_processes, lab_capacity_policy=lab_capacity_policy, hint_keys=hint_keys,
+            weekly_template=weekly_template, cycle_weeks=cycle_weeks, symmetry_breaking=symmetry_breaking,
+        )
+    else:
+        # build cp model (weekly_template solves a `cycle_weeks` cycle and expands it over the calendar)
+        # with model_cache_dir (opt-in, trusted directories only: meta is unpickled on a hit), identical
+        # inputs + parameters reuse the stored model
+        # symmetry_breaking adds lex constraints between interchangeable sections / identical weeks
+        if model_cache_dir:
+            model, meta = model_cache.build_cp_model_cached(normalized, inputs, model_cache_dir,
+                                                            weekly_template=weekly_template, cycle_weeks=cycle_weeks,
+                                                            symmetry_breaking=symmetry_breaking)
+        else:
+            model, meta = solver.build_cp_model(normalized, inputs, weekly_template=weekly_template,
+                                                cycle_weeks=cycle_weeks, symmetry_breaking=symmetry_breaking)
+        # greedy constructive timetable: hints (unless warm-starting) and UNKNOWN fallback
+        fallback = greedy.greedy_assign(normalized, meta) if greedy_seed else None
+        if hint_keys:
+            warmstart.apply_hints(model, meta, hint_keys)
+        elif fallback:
+            warmstart.apply_hints(model, meta, fallback[0], source="greedy")
+
+        # run solver (runner should return dict with keys 'status' and 'assigned')
+        # portfolio: differently seeded / configured runs race in separate processes, best one wins
+        result = runner.run_solver(model, meta, output_dir=output_dir, time_limit=time_limit, num_workers=num_workers,
+                                   fallback=fallback, stream_solutions=stream_solutions,
+                                   stream_outputs=stream_outputs, portfolio=portfolio, portfolio_runs=portfolio_runs)
+        if result.get("status") == "INFEASIBLE" and diagnose_level:
+            # name the conflicting sections / faculty / subjects in diagnostics.json
+            runner.diagnose_infeasibility(normalized, inputs, output_dir=output_dir, time_limit=time_limit,
+                                          num_workers=num_workers, level=diagnose_level, meta=meta,
+                                          weekly_template=weekly_template, cycle_weeks=cycle_weeks)
+
+    if result.get("status") not in ("OPTIMAL", "FEASIBLE") and not result.get("fallback"):
         logger.error("Solver did not find a feasible solution: status=%s", result.get("status"))
         return
 
-    # build working_dates by expanding semesters
-    sem_dates = inputs.get("semesterdates", [])
-    working_dates = expand_semester_dates(sem_dates)
-    logger.info("Working dates expanded: %d days", len(working_dates))
+    # day index w * days_per_week + d -> date, from the teaching calendar the model was built on
+    # (template runs carry the dates of the calendar they were expanded over)
+    working_dates = result.get("working_dates") or meta.get("working_dates", [])
+    logger.info("Working dates from teaching calendar: %d days", len(working_dates))
 
     # pass meta and assignments to outputs
     outputs.expand_and_write_outputs(
         solver_assignments=result.get("assigned", []),
-        assignment_meta=meta["assignment_meta"],
+        assignment_meta=result.get("assignment_meta", meta["assignment_meta"]),
         section_faculty_map=meta.get("section_faculty_map", {}),
         section_classroom_map=meta.get("section_classroom_map", {}),
         working_dates=working_dates,
         days_per_week=len(meta.get("days", [])),
         out_prefix=f"{output_dir}/timetable",
+        registry=normalized.get("registry"),
     )
 
     logger.info("Timetable generation complete. Files written to %s", output_dir)